@@ -0,0 +1,132 @@
+"""
+Golden-image regression check for the preview renderers.
+Renders a fixed set of themes in deterministic mode and compares them pixel by
+pixel against the reference images in golden/. Use ``update`` after an
+intentional rendering change and commit the new references.
+
+Usage:
+    python check_previews.py check
+    python check_previews.py update
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from preview_render import render_layered_preview
+from theme_io import BatchWriter
+from theme_randomizer import generate_theme_preview, load_theme
+
+GOLDEN_DIR = Path("golden")
+MANIFEST_NAME = "manifest.json"
+
+# (name, theme file, renderer, show popup); default themes only, so curated
+# theme edits never invalidate the references
+GOLDEN_CASES = [
+    ("template_flat", "defaults/template/template.json", "flat", False),
+    ("template_light_flat_popup", "defaults/template/template_light.json", "flat", True),
+    ("overcast_layered_popup", "defaults/overcast/overcast.json", "layered", True),
+    ("visibility_light_layered", "defaults/visibility/visibility_light.json", "layered", False),
+    ("overcast_bakkesmod_popup", "defaults/overcast/overcast.json", "bakkesmod", True),
+]
+
+RENDERERS = {"flat": generate_theme_preview, "layered": render_layered_preview,
+             "bakkesmod": partial(render_layered_preview, layout="bakkesmod")}
+
+
+def render_case(theme_file: str, renderer: str, show_popup: bool) -> bytes:
+    """Render one golden case deterministically and encode it as PNG bytes."""
+    theme = load_theme(theme_file)
+    is_light = Path(theme_file).stem.endswith("_light")
+    image = RENDERERS[renderer](theme, is_light=is_light, show_popup=show_popup, deterministic=True)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def pixel_diff(expected: np.ndarray, actual: np.ndarray, tolerance: int) -> Dict[str, Any]:
+    """Compare two images; returns the max channel difference and the share of pixels over ``tolerance``."""
+    if expected.shape != actual.shape:
+        return {"match": False, "reason": f"size {actual.shape[1]}x{actual.shape[0]} != "
+                                          f"{expected.shape[1]}x{expected.shape[0]}"}
+    delta = np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max(axis=2)
+    over = delta > tolerance
+    return {"match": not over.any(), "max_delta": int(delta.max()), "changed": float(over.mean()), "delta": delta}
+
+
+def check(golden_dir: Path, tolerance: int, failures_dir: Path) -> List[str]:
+    """Check every case against its reference and return the names that failed."""
+    with open(golden_dir / MANIFEST_NAME, 'r') as file:
+        manifest = json.load(file)
+    if manifest.get("pillow") != PIL.__version__:
+        print(f"⚠️  References were made with Pillow {manifest.get('pillow')}, this is {PIL.__version__}; "
+              f"text rasterization may differ")
+
+    failed = []
+    for name, theme_file, renderer, show_popup in GOLDEN_CASES:
+        data = render_case(theme_file, renderer, show_popup)
+        if hashlib.sha256(data).hexdigest() == manifest["images"].get(name):
+            print(f"✅ {name}: byte-identical")
+            continue
+
+        golden_path = golden_dir / f"{name}.png"
+        if not golden_path.exists():
+            print(f"❌ {name}: no reference image, run update")
+            failed.append(name)
+            continue
+        actual = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+        result = pixel_diff(np.asarray(Image.open(golden_path).convert("RGB")), actual, tolerance)
+        if result["match"]:
+            print(f"✅ {name}: pixel-identical within {tolerance} (encoding differs)")
+            continue
+
+        failed.append(name)
+        if "reason" in result:
+            print(f"❌ {name}: {result['reason']}")
+            continue
+        print(f"❌ {name}: {result['changed']:.2%} of pixels differ, max delta {result['max_delta']}")
+        failures_dir.mkdir(parents=True, exist_ok=True)
+        (failures_dir / f"{name}_actual.png").write_bytes(data)
+        highlight = np.minimum(result["delta"].astype(np.int32) * 8, 255).astype(np.uint8)
+        Image.fromarray(highlight, 'L').save(failures_dir / f"{name}_diff.png")
+    return failed
+
+
+def update(golden_dir: Path) -> None:
+    """Re-render every case and replace the references and manifest together."""
+    manifest = {"pillow": PIL.__version__, "images": {}}
+    with BatchWriter() as batch:
+        for name, theme_file, renderer, show_popup in GOLDEN_CASES:
+            data = render_case(theme_file, renderer, show_popup)
+            batch.write_bytes(golden_dir / f"{name}.png", data)
+            manifest["images"][name] = hashlib.sha256(data).hexdigest()
+        batch.write_json(golden_dir / MANIFEST_NAME, manifest)
+    print(f"✅ Updated {len(GOLDEN_CASES)} reference images in {golden_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check previews against golden reference images.")
+    parser.add_argument("command", choices=["check", "update"])
+    parser.add_argument("--golden", default=str(GOLDEN_DIR), help="reference image directory")
+    parser.add_argument("--tolerance", type=int, default=0, help="allowed per-channel difference (0-255)")
+    parser.add_argument("--failures", default="golden_failures", help="where to write actual/diff images of failures")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        update(Path(args.golden))
+    else:
+        failed_cases = check(Path(args.golden), args.tolerance, Path(args.failures))
+        if failed_cases:
+            print(f"\n❌ {len(failed_cases)} of {len(GOLDEN_CASES)} previews changed; "
+                  f"see {args.failures}/ or run update if the change is intended")
+            sys.exit(1)
+        print(f"\n✅ All {len(GOLDEN_CASES)} previews match")
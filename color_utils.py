@@ -0,0 +1,295 @@
+"""
+Shared color math for the theme tools.
+sRGB <-> linear <-> OKLab / CIELAB conversions, alpha compositing, relative
+luminance and contrast, each with a scalar API (plain floats, no dependencies)
+and a batched API over NumPy arrays. The 8-bit gamma curves use precomputed
+lookup tables.
+
+Channel values are floats in [0, 1] like in the theme JSON files unless a name
+says ``8`` (integers 0-255).
+"""
+
+import math
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the scalar API works without NumPy
+    np = None
+
+Color = Tuple[float, float, float]
+
+LINEAR_LUT_SIZE = 4096
+
+# sRGB -> XYZ (D65) and OKLab matrices
+_SRGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_D65_WHITE = (0.95047, 1.0, 1.08883)
+_LINEAR_TO_LMS = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+_LMS_TO_OKLAB = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+_OKLAB_TO_LMS = (
+    (1.0, 0.3963377774, 0.2158037573),
+    (1.0, -0.1055613458, -0.0638541728),
+    (1.0, -0.0894841775, -1.2914855480),
+)
+_LMS_TO_LINEAR = (
+    (4.0767416621, -3.3077115913, 0.2309699292),
+    (-1.2684380046, 2.6097574011, -0.3413193965),
+    (-0.0041960863, -0.7034186147, 1.7076147010),
+)
+
+
+def _mul(matrix, vector) -> Color:
+    return tuple(row[0] * vector[0] + row[1] * vector[1] + row[2] * vector[2] for row in matrix)
+
+
+def clamp01(value: float) -> float:
+    return 0.0 if value < 0.0 else 1.0 if value > 1.0 else value
+
+
+# ---------------------------------------------------------------------------
+# Gamma curves and lookup tables
+# ---------------------------------------------------------------------------
+
+def srgb_to_linear(c: float) -> float:
+    """Decode one sRGB channel to linear light."""
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(c: float) -> float:
+    """Encode one linear channel to sRGB."""
+    return c * 12.92 if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+
+
+# 8-bit sRGB -> linear, and linear (quantized to LINEAR_LUT_SIZE steps) -> 8-bit sRGB
+SRGB8_TO_LINEAR = tuple(srgb_to_linear(i / 255) for i in range(256))
+LINEAR_TO_SRGB8 = tuple(round(linear_to_srgb(i / (LINEAR_LUT_SIZE - 1)) * 255) for i in range(LINEAR_LUT_SIZE))
+
+
+def srgb8_to_linear(value: int) -> float:
+    """Decode an 8-bit sRGB channel with the lookup table."""
+    return SRGB8_TO_LINEAR[value]
+
+
+def linear_to_srgb8(value: float) -> int:
+    """Encode a linear channel to 8-bit sRGB with the lookup table."""
+    return LINEAR_TO_SRGB8[round(clamp01(value) * (LINEAR_LUT_SIZE - 1))]
+
+
+def to_rgb8(rgb: Sequence[float]) -> Tuple[int, int, int]:
+    """Convert float sRGB channels to a clamped, rounded 8-bit tuple."""
+    return tuple(int(clamp01(c) * 255 + 0.5) for c in rgb[:3])
+
+
+# ---------------------------------------------------------------------------
+# Scalar conversions
+# ---------------------------------------------------------------------------
+
+def linear_to_oklab(rgb: Color) -> Color:
+    """Convert linear sRGB to OKLab."""
+    lms = _mul(_LINEAR_TO_LMS, rgb)
+    return _mul(_LMS_TO_OKLAB, tuple(math.copysign(abs(v) ** (1 / 3), v) for v in lms))
+
+
+def oklab_to_linear(lab: Color) -> Color:
+    """Convert OKLab to linear sRGB (may fall outside [0, 1] for out-of-gamut colors)."""
+    lms = _mul(_OKLAB_TO_LMS, lab)
+    return _mul(_LMS_TO_LINEAR, tuple(v ** 3 for v in lms))
+
+
+def srgb_to_oklab(rgb: Color) -> Color:
+    """Convert sRGB floats to OKLab."""
+    return linear_to_oklab(tuple(srgb_to_linear(clamp01(c)) for c in rgb[:3]))
+
+
+def oklab_to_srgb(lab: Color) -> Color:
+    """Convert OKLab to clamped sRGB floats."""
+    return tuple(clamp01(linear_to_srgb(clamp01(c))) for c in oklab_to_linear(lab))
+
+
+def oklab_to_oklch(lab: Color) -> Color:
+    """Convert OKLab to (lightness, chroma, hue in degrees)."""
+    lightness, a, b = lab
+    return lightness, math.hypot(a, b), math.degrees(math.atan2(b, a)) % 360
+
+
+def oklch_to_oklab(lch: Color) -> Color:
+    lightness, chroma, hue = lch
+    return lightness, chroma * math.cos(math.radians(hue)), chroma * math.sin(math.radians(hue))
+
+
+def srgb_to_lab(rgb: Color) -> Color:
+    """Convert sRGB floats to CIELAB (D65)."""
+    xyz = _mul(_SRGB_TO_XYZ, tuple(srgb_to_linear(clamp01(c)) for c in rgb[:3]))
+
+    def f(t: float) -> float:
+        return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+    fx, fy, fz = (f(v / w) for v, w in zip(xyz, _D65_WHITE))
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def delta_e_ok(rgb1: Color, rgb2: Color) -> float:
+    """Perceptual difference between two sRGB colors (OKLab distance x100)."""
+    return 100 * math.dist(srgb_to_oklab(rgb1), srgb_to_oklab(rgb2))
+
+
+def relative_luminance(rgb: Color) -> float:
+    """WCAG relative luminance of an sRGB color."""
+    r, g, b = (srgb_to_linear(clamp01(c)) for c in rgb[:3])
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def contrast_ratio(rgb1: Color, rgb2: Color) -> float:
+    """WCAG contrast ratio (1-21) between two sRGB colors."""
+    l1, l2 = relative_luminance(rgb1), relative_luminance(rgb2)
+    return (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+
+
+def composite_over(rgba: Sequence[float], background: Color) -> Color:
+    """Straight-alpha "over" blend of an RGBA color onto an opaque background.
+
+    ImGui blends in sRGB space (no linearization), so this does too.
+    """
+    r, g, b, a = rgba
+    a = clamp01(a)
+    return (r * a + background[0] * (1 - a),
+            g * a + background[1] * (1 - a),
+            b * a + background[2] * (1 - a))
+
+
+def theme_color(color_dict: dict) -> Tuple[float, float, float, float]:
+    """Read a theme ``{"r", "g", "b", "a"}`` dict as an RGBA tuple."""
+    return color_dict['r'], color_dict['g'], color_dict['b'], color_dict.get('a', 1.0)
+
+
+# ---------------------------------------------------------------------------
+# Batched conversions (last axis holds the channels)
+# ---------------------------------------------------------------------------
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("The batched color API needs NumPy: pip install numpy")
+
+
+def srgb_to_linear_array(rgb):
+    _require_numpy()
+    rgb = np.clip(np.asarray(rgb, dtype=np.float32), 0.0, 1.0)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb_array(linear):
+    _require_numpy()
+    linear = np.clip(np.asarray(linear, dtype=np.float32), 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def srgb8_to_linear_array(values):
+    """Decode 8-bit sRGB values with the lookup table (a single gather, no pow)."""
+    _require_numpy()
+    return _srgb8_to_linear_table()[np.asarray(values, dtype=np.uint8)]
+
+
+def linear_to_srgb8_array(linear):
+    """Encode linear values to 8-bit sRGB with the lookup table."""
+    _require_numpy()
+    index = np.rint(np.clip(np.asarray(linear, dtype=np.float32), 0.0, 1.0) * (LINEAR_LUT_SIZE - 1)).astype(np.intp)
+    return _linear_to_srgb8_table()[index]
+
+
+def srgb_to_oklab_array(rgb):
+    """Convert sRGB floats (..., 3) to OKLab (..., 3)."""
+    _require_numpy()
+    lms = srgb_to_linear_array(rgb) @ np.array(_LINEAR_TO_LMS, dtype=np.float32).T
+    return np.cbrt(lms) @ np.array(_LMS_TO_OKLAB, dtype=np.float32).T
+
+
+def oklab_to_srgb_array(lab):
+    """Convert OKLab (..., 3) to clamped sRGB floats (..., 3)."""
+    _require_numpy()
+    lms = np.asarray(lab, dtype=np.float32) @ np.array(_OKLAB_TO_LMS, dtype=np.float32).T
+    return linear_to_srgb_array((lms ** 3) @ np.array(_LMS_TO_LINEAR, dtype=np.float32).T)
+
+
+def oklab_to_oklch_array(lab):
+    """Convert OKLab (..., 3) to (lightness, chroma, hue degrees) (..., 3)."""
+    _require_numpy()
+    lab = np.asarray(lab, dtype=np.float32)
+    hue = np.degrees(np.arctan2(lab[..., 2], lab[..., 1])) % 360
+    return np.stack([lab[..., 0], np.hypot(lab[..., 1], lab[..., 2]), hue], axis=-1)
+
+
+def delta_e_ok_array(rgb1, rgb2):
+    """OKLab distance x100 between two arrays of sRGB colors."""
+    return 100 * np.linalg.norm(srgb_to_oklab_array(rgb1) - srgb_to_oklab_array(rgb2), axis=-1)
+
+
+def relative_luminance_array(rgb):
+    return srgb_to_linear_array(rgb) @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def contrast_ratio_array(rgb1, rgb2):
+    l1, l2 = relative_luminance_array(rgb1), relative_luminance_array(rgb2)
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+
+def composite_over_array(rgba, background):
+    """Straight-alpha "over" blend of RGBA colors (..., 4) onto opaque backgrounds (..., 3)."""
+    _require_numpy()
+    rgba = np.asarray(rgba, dtype=np.float32)
+    alpha = np.clip(rgba[..., 3:4], 0.0, 1.0)
+    return rgba[..., :3] * alpha + np.asarray(background, dtype=np.float32) * (1 - alpha)
+
+
+_TABLES = {}
+
+
+def _srgb8_to_linear_table():
+    if "srgb8" not in _TABLES:
+        _TABLES["srgb8"] = np.array(SRGB8_TO_LINEAR, dtype=np.float32)
+    return _TABLES["srgb8"]
+
+
+def _linear_to_srgb8_table():
+    if "linear" not in _TABLES:
+        _TABLES["linear"] = np.array(LINEAR_TO_SRGB8, dtype=np.uint8)
+    return _TABLES["linear"]
+
+
+if __name__ == "__main__":
+    # Self-check: round trips, LUTs and scalar/batched agreement
+    import random
+    import time
+
+    samples = [(random.random(), random.random(), random.random()) for _ in range(2000)]
+    worst = max(max(abs(x - y) for x, y in zip(c, oklab_to_srgb(srgb_to_oklab(c)))) for c in samples)
+    print(f"OKLab round trip max error: {worst:.2e}")
+    assert worst < 1e-5
+    assert all(linear_to_srgb8(srgb8_to_linear(i)) == i for i in range(256)), "8-bit LUT round trip"
+    assert abs(contrast_ratio((0, 0, 0), (1, 1, 1)) - 21) < 1e-9
+    lab = srgb_to_lab((1.0, 1.0, 1.0))
+    assert abs(lab[0] - 100) < 1e-3 and abs(lab[1]) < 1e-2 and abs(lab[2]) < 1e-2
+
+    if np is not None:
+        batch = np.array(samples, dtype=np.float32)
+        scalar = np.array([srgb_to_oklab(c) for c in samples])
+        assert np.abs(srgb_to_oklab_array(batch) - scalar).max() < 1e-4
+        values8 = np.arange(256)
+        assert (linear_to_srgb8_array(srgb8_to_linear_array(values8)) == values8).all()
+
+        big = np.random.rand(1_000_000, 3).astype(np.float32)
+        start = time.perf_counter()
+        srgb_to_oklab_array(big)
+        print(f"Batched sRGB -> OKLab: {1_000_000 / (time.perf_counter() - start) / 1e6:.1f} M colors/s")
+    print("✅ color_utils self-check passed")
@@ -0,0 +1,116 @@
+"""
+Contact-sheet renderer for large batches of themes.
+Tiles downscaled previews of many themes into a single atlas image and writes
+an index (theme ID -> tile rect) next to it, so reviewers and the README can
+use one image instead of hundreds of individual previews.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image
+
+from theme_io import BatchWriter
+from theme_randomizer import encode_preview, generate_theme_preview, load_theme, parse_size, PREVIEW_ENCODINGS
+
+
+def collect_theme_files(themes_path: Path, pattern: str = "random_*") -> List[Path]:
+    """Collect theme JSON files from theme folders matching ``pattern``."""
+    files = []
+    for folder in sorted(themes_path.glob(pattern)):
+        if folder.is_dir():
+            files.extend(sorted(folder.glob("*.json")))
+    return files
+
+
+def load_tile(theme_file: Path, tile_size: Tuple[int, int]) -> Image.Image:
+    """Load a downscaled preview for a theme, rendering it if no PNG exists."""
+    preview_file = theme_file.with_suffix(".png")
+    if preview_file.exists():
+        with Image.open(preview_file) as preview:
+            image = preview.convert("RGB")
+    else:
+        theme = load_theme(str(theme_file))
+        is_light = theme.get("metadata", {}).get("variant") == "light" or theme_file.stem.endswith("_light")
+        image = generate_theme_preview(theme, is_light=is_light)
+
+    # reduce() is a cheap integer box downscale; LANCZOS only fixes up the remainder
+    factor = max(1, min(image.width // tile_size[0], image.height // tile_size[1]))
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.size != tile_size:
+        image = image.resize(tile_size, Image.LANCZOS)
+    return image
+
+
+def build_contact_sheet(theme_files: List[Path], tile_size: Tuple[int, int] = (200, 150),
+                        columns: int = 8, padding: int = 4) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Tile the previews of ``theme_files`` into one atlas image.
+
+    Returns the atlas and an index mapping each theme ID (the JSON file stem)
+    to its tile rect and source file.
+    """
+    columns = max(1, min(columns, len(theme_files)))
+    rows = (len(theme_files) + columns - 1) // columns
+    tile_w, tile_h = tile_size
+    atlas = Image.new("RGB", (columns * (tile_w + padding) + padding, rows * (tile_h + padding) + padding), (24, 24, 24))
+
+    tiles = {}
+    for i, theme_file in enumerate(theme_files):
+        row, col = divmod(i, columns)
+        x = padding + col * (tile_w + padding)
+        y = padding + row * (tile_h + padding)
+        tile = load_tile(theme_file, tile_size)
+        atlas.paste(tile, (x, y))
+        tile.close()
+        tiles[theme_file.stem] = {
+            "x": x, "y": y, "w": tile_w, "h": tile_h,
+            "row": row, "col": col,
+            "file": theme_file.as_posix(),
+        }
+
+    index = {
+        "tile_size": [tile_w, tile_h],
+        "columns": columns,
+        "rows": rows,
+        "tiles": tiles,
+    }
+    return atlas, index
+
+
+def write_contact_sheet(theme_files: List[Path], output_path: Path, tile_size: Tuple[int, int] = (200, 150),
+                        columns: int = 8, encoding: str = "png-palette") -> Dict[str, Any]:
+    """Render a contact sheet to ``output_path`` and write its ``.json`` index alongside."""
+    atlas, index = build_contact_sheet(theme_files, tile_size, columns)
+    index_path = output_path.with_suffix(".json")
+    
+    # The atlas and its index are committed together so they never disagree
+    with BatchWriter() as batch:
+        stats = encode_preview(atlas, batch.stage(output_path), PREVIEW_ENCODINGS[encoding])
+        index["image"] = (output_path.parent / Path(stats["path"]).name).as_posix()
+        batch.write_json(index_path, index)
+
+    print(f"🖼️  Contact sheet with {len(theme_files)} themes saved to {index['image']} "
+          f"({stats['bytes'] / 1024:.1f} KiB, {stats['encode_ms']:.1f} ms)")
+    print(f"📇 Tile index saved to {index_path}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tile theme previews into a single contact-sheet atlas.")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--pattern", default="random_*", help="glob for theme folders to include")
+    parser.add_argument("--output", default="previews/random_atlas.png", help="atlas image path")
+    parser.add_argument("--tile", type=parse_size, default=(200, 150), help="tile size as WIDTHxHEIGHT")
+    parser.add_argument("--columns", type=int, default=8, help="tiles per row")
+    parser.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="png-palette",
+                        help="atlas encoding preset")
+    args = parser.parse_args()
+
+    files = collect_theme_files(Path(args.themes), args.pattern)
+    if not files:
+        print(f"❌ No themes found in {args.themes} matching {args.pattern}")
+    else:
+        write_contact_sheet(files, Path(args.output), args.tile, args.columns, args.encoding)
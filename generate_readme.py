@@ -1,8 +1,52 @@
+import argparse
+import heapq
 import json
 import os
-from datetime import datetime
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from theme_catalog import DEFAULT_EMOJI, classify_themes as classify_batch, derive_color_properties, load_catalog
+from theme_changes import (MANIFEST_VERSION, changed_folders, file_ids, last_updated, load_manifest,
+                           should_render_preview)
+from theme_io import atomic_write_json, atomic_write_text, atomic_writer
+
+MANIFEST_PATH = Path(".readme_manifest.json")
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+class ThemeInfo:
+    """README record for one theme file.
+    
+    Uses slots instead of a per-theme dict; item access (``theme['name']``)
+    keeps working so the render functions accept either.
+    """
+    __slots__ = ('name', 'filename', 'image', 'author', 'description', 'category',
+                 'variant', 'theme_folder', 'auto_generated', 'emoji')
+    
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
 
-def get_theme_info(theme_folder_path):
+def get_theme_info(theme_folder_path, theme_data_out=None):
+    """Read every theme JSON in a folder; the parsed themes are appended to ``theme_data_out`` if given."""
     themes = []
     
     for file in os.listdir(theme_folder_path):
@@ -17,28 +61,51 @@ def get_theme_info(theme_folder_path):
                 if 'light' in theme_name.lower():
                     variant = 'light'
                 
-                themes.append({
-                    'name': theme_data['metadata']['name'],
-                    'filename': file,
-                    'image': file.replace('.json', '.png'),
-                    'author': theme_data['metadata']['author'],
-                    'description': theme_data['metadata'].get('description', ''),
-                    'variant': variant,
-                    'theme_folder': os.path.basename(theme_folder_path),
-                    'auto_generated': theme_data['metadata'].get('auto_generated', False)
-                })
+                themes.append(ThemeInfo(
+                    name=theme_data['metadata']['name'],
+                    filename=file,
+                    image=file.replace('.json', '.png'),
+                    author=theme_data['metadata']['author'],
+                    description=theme_data['metadata'].get('description', ''),
+                    category=theme_data['metadata'].get('category', ''),
+                    variant=variant,
+                    theme_folder=os.path.basename(theme_folder_path),
+                    auto_generated=theme_data['metadata'].get('auto_generated', False)
+                ))
+                if theme_data_out is not None:
+                    theme_data_out.append(theme_data)
             except Exception as e:
                 print(f"Error reading {file}: {e}")
     
     return themes
 
-def generate_readme():
-    
-    readme_content = f"""# 🎨 BakkesMod Theme Collection
+def load_atlas_index(atlas_index_path):
+    """Load a contact-sheet index written by contact_sheet.py, or None if missing."""
+    if not atlas_index_path or not os.path.exists(atlas_index_path):
+        return None
+    with open(atlas_index_path, 'r') as f:
+        return json.load(f)
+
+def render_atlas_section(atlas_index, random_themes):
+    """Render one contact-sheet image plus a tile table instead of one <img> per theme."""
+    tiles = atlas_index['tiles']
+    content = f"""<img src="{atlas_index['image']}" alt="Random theme contact sheet">
+
+| Tile (row, col) | Theme | Variant |
+|---|---|---|
+"""
+    for theme in sorted(random_themes, key=lambda t: (tiles[t['filename'][:-5]]['row'], tiles[t['filename'][:-5]]['col'])):
+        tile = tiles[theme['filename'][:-5]]
+        content += f"| {tile['row'] + 1}, {tile['col'] + 1} | [`{theme['filename']}`](themes/{theme['theme_folder']}/{theme['filename']}) | {theme['variant'].title()} |\n"
+    return content + "\n"
+
+def render_header(updated):
+    """Render the static README introduction and installation guide."""
+    return f"""# 🎨 BakkesMod Theme Collection
 
 A curated collection of custom themes for BakkesMod, featuring various color schemes from dark cyberpunk aesthetics to light pastel designs, plus a powerful random theme generator!
 
-*Generated on {datetime.now().strftime('%B %d, %Y')}*
+*Generated on {updated.strftime('%B %d, %Y')}*
 
 ## 🎲 Random Theme Generator
 
@@ -110,127 +177,113 @@ Each theme may include both light and dark variants. **Click to expand** any the
 
 """
 
-    themes_path = "themes"
+def classify_themes(themes_path, theme_info, catalog=None):
+    """Attach the cached catalog category and emoji to each theme info dict.
+
+    The catalog classifies every theme in one batched pass and only re-reads
+    files that changed since the last run. Pass an already up-to-date
+    ``catalog`` to skip refreshing it from the whole tree.
+    """
+    classifications = (catalog or load_catalog(Path(themes_path))).classifications()
+    for theme in theme_info:
+        key = Path(themes_path, theme['theme_folder'], theme['filename']).as_posix()
+        category, emoji = classifications.get(key, (theme['category'], DEFAULT_EMOJI))
+        theme['category'], theme['emoji'] = category, emoji
+    return theme_info
+
+def render_theme_section(theme_folder, theme_info):
+    """Render the collapsible README section for one regular theme folder."""
+    main_theme = next((t for t in theme_info if t['variant'] == 'dark'), theme_info[0])
     
-    # Separate regular themes from random themes
-    regular_themes = []
-    random_themes = []
+    clean_name = main_theme['name'].replace(' Dark', '').replace(' Light', '')
     
-    for theme_folder in sorted(os.listdir(themes_path)):
-        folder_path = os.path.join(themes_path, theme_folder)
-        if not os.path.isdir(folder_path):
-            continue
-        
-        theme_info = get_theme_info(folder_path)
-        if not theme_info:
-            continue
-        
-        if theme_folder.startswith('random_'):
-            random_themes.extend(theme_info)
-        else:
-            regular_themes.append((theme_folder, theme_info))
+    # Category and emoji come from the catalog index (see classify_themes)
+    theme_emoji = main_theme.get('emoji', DEFAULT_EMOJI)
     
-    # Regular Themes Section
-    for theme_folder, theme_info in regular_themes:
-        main_theme = next((t for t in theme_info if t['variant'] == 'dark'), theme_info[0])
-        
-        clean_name = main_theme['name'].replace(' Dark', '').replace(' Light', '')
-        
-        # Smart emoji selection based on theme name and category
-        name_lower = clean_name.lower()
-        category = main_theme.get('category', '').lower()
-        
-        if "cyber" in name_lower or category == 'cyberpunk':
-            theme_emoji = "🤖"
-        elif "space" in name_lower or "cosmic" in name_lower or category == 'space':
-            theme_emoji = "💫"
-        elif "neon" in name_lower or "pulse" in name_lower or category == 'neon':
-            theme_emoji = "⚡"
-        elif "retro" in name_lower or "wave" in name_lower or category == 'retro':
-            theme_emoji = "📼"
-        elif "pastel" in name_lower or category == 'pastel':
-            theme_emoji = "🌸"
-        elif "natural" in name_lower or "nature" in name_lower or category == 'nature':
-            theme_emoji = "🌿"
-        elif "nyan" in name_lower or "kurumi" in name_lower or category == 'anime':
-            theme_emoji = "🐱"
-        elif "mono" in name_lower or "blue" in name_lower or category == 'monochrome':
-            theme_emoji = "⚫"
-        elif "solar" in name_lower or "fire" in name_lower or "flare" in name_lower or category == 'fire':
-            theme_emoji = "🔥"
-        elif "dark" in name_lower and "mode" in name_lower:
-            theme_emoji = "🌑"
-        elif "glitch" in name_lower:
-            theme_emoji = "📺"
-        elif "frost" in name_lower:
-            theme_emoji = "❄️"
-        else:
-            theme_emoji = "🎨"
-        
-        readme_content += f"""<details>
+    section = f"""<details>
 <summary>{theme_emoji} <strong>{clean_name}</strong> - {main_theme['description']}</summary>
 
 **Author:** {main_theme['author']}
 
 """
+    
+    for theme in sorted(theme_info, key=lambda x: x['variant']):
+        variant_emoji = "🌙" if theme['variant'] == 'dark' else "☀️"
+        variant_name = theme['variant'].title()
+        
+        autogen_note = ""
+        if theme['auto_generated']:
+            autogen_note = " *(Auto-generated - may need adjustments)*"
         
-        for theme in sorted(theme_info, key=lambda x: x['variant']):
-            variant_emoji = "🌙" if theme['variant'] == 'dark' else "☀️"
-            variant_name = theme['variant'].title()
-            
-            autogen_note = ""
-            if theme['auto_generated']:
-                autogen_note = " *(Auto-generated - may need adjustments)*"
-            
-            readme_content += f"""#### {variant_emoji} **{variant_name} Variant** | [`{theme['filename']}`](themes/{theme['theme_folder']}/{theme['filename']}){autogen_note}
+        section += f"""#### {variant_emoji} **{variant_name} Variant** | [`{theme['filename']}`](themes/{theme['theme_folder']}/{theme['filename']}){autogen_note}
 
 ![{theme['name']}](themes/{theme['theme_folder']}/{theme['image']})
 
 """
-        
-        readme_content += "</details>\n\n"
     
-    # Random Themes Section (if any exist)
-    if random_themes:
-        readme_content += f"""<details>
-<summary>🎲 <strong>Generated Random Themes</strong> ({len(set(t['theme_folder'] for t in random_themes))} themes) - Click to expand</summary>
-
-*These themes were generated using the random theme generator. Each offers unique color combinations!*
+    section += "</details>\n\n"
+    
+    return section
 
-"""
-        
-        # Group random themes by folder
-        random_by_folder = {}
-        for theme in random_themes:
-            folder = theme['theme_folder']
-            if folder not in random_by_folder:
-                random_by_folder[folder] = []
-            random_by_folder[folder].append(theme)
-        
-        for folder, themes in sorted(random_by_folder.items()):
-            theme_id = folder.replace('random_', '')
-            main_theme = next((t for t in themes if t['variant'] == 'dark'), themes[0])
-            
-            readme_content += f"""### 🎲 Random Theme {theme_id}
+def render_random_theme_section(folder, themes):
+    """Render the README entry for one random theme folder."""
+    theme_id = folder.replace('random_', '')
+    main_theme = next((t for t in themes if t['variant'] == 'dark'), themes[0])
+    
+    section = f"""### 🎲 Random Theme {theme_id}
 
 **Author:** {main_theme['author']}  
 **Generated:** Auto-generated theme with unique color combinations
 
 """
-            
-            for theme in sorted(themes, key=lambda x: x['variant']):
-                variant_emoji = "🌙" if theme['variant'] == 'dark' else "☀️"
-                variant_name = theme['variant'].title()
-                
-                readme_content += f"""#### {variant_emoji} **{variant_name}** | [`{theme['filename']}`](themes/{theme['theme_folder']}/{theme['filename']})
+    
+    for theme in sorted(themes, key=lambda x: x['variant']):
+        variant_emoji = "🌙" if theme['variant'] == 'dark' else "☀️"
+        variant_name = theme['variant'].title()
+        
+        section += f"""#### {variant_emoji} **{variant_name}** | [`{theme['filename']}`](themes/{theme['theme_folder']}/{theme['filename']})
 
 <img src="themes/{theme['theme_folder']}/{theme['image']}" width="400" alt="{theme['name']}">
 
 """
-        
-        readme_content += "</details>\n\n"
+    return section
+
+def render_random_header(folder_count):
+    """Render the opening of the random themes section."""
+    return f"""<details>
+<summary>🎲 <strong>Generated Random Themes</strong> ({folder_count} themes) - Click to expand</summary>
+
+*These themes were generated using the random theme generator. Each offers unique color combinations!*
+
+"""
+
+def render_random_section(random_themes, atlas_index=None):
+    """Render the collapsible section listing all generated random themes."""
+    content = render_random_header(len(set(t['theme_folder'] for t in random_themes)))
+    
+    # Reference the contact sheet only if it covers every random theme
+    use_atlas = atlas_index is not None and all(t['filename'][:-5] in atlas_index['tiles'] for t in random_themes)
+    if use_atlas:
+        content += render_atlas_section(atlas_index, random_themes)
+    
+    # Group random themes by folder
+    random_by_folder = {}
+    for theme in ([] if use_atlas else random_themes):
+        folder = theme['theme_folder']
+        if folder not in random_by_folder:
+            random_by_folder[folder] = []
+        random_by_folder[folder].append(theme)
     
-    readme_content += f"""<details>
+    for folder, themes in sorted(random_by_folder.items()):
+        content += render_random_theme_section(folder, themes)
+    
+    content += "</details>\n\n"
+    
+    return content
+
+def render_footer(theme_count, file_count, updated):
+    """Render the development guide, contributing notes, credits and totals."""
+    return f"""<details>
 <summary>🛠️ <strong>Theme Development Guide</strong> - Click to expand</summary>
 
 ## Quick Start - Create Your First Theme
@@ -375,6 +428,7 @@ We welcome contributions! Here's how you can help:
 - **Rocket League** (Steam/Epic Games)
 - **Python 3.6+** (for theme randomizer)
 - **Pillow** library (for preview generation): `pip install Pillow`
+- **NumPy** (for the README generator, catalog and diff tools): `pip install numpy`
 
 ## 🐛 Issues & Support
 
@@ -407,16 +461,303 @@ This collection is open source. Individual themes may have different licenses -
 
 *Made with ❤️ for the BakkesMod community*
 
-- **Total Unique Themes:** {len([f for f in os.listdir(themes_path) if os.path.isdir(os.path.join(themes_path, f))])} themes with variants
-- **Total Theme Files:** {sum(len(get_theme_info(os.path.join(themes_path, d))) for d in os.listdir(themes_path) if os.path.isdir(os.path.join(themes_path, d)))} `.json` files
-- **Last Updated:** {datetime.now().strftime('%B %d, %Y')}
+- **Total Unique Themes:** {theme_count} themes with variants
+- **Total Theme Files:** {file_count} `.json` files
+- **Last Updated:** {updated.strftime('%B %d, %Y')}
 """
 
-    with open('README.md', 'w', encoding='utf-8') as f:
-        f.write(readme_content)
+def collect_themes(themes_path, catalog=None):
+    """Read every theme folder and split it into regular and random themes."""
+    # Separate regular themes from random themes
+    regular_themes = []
+    random_themes = []
+    
+    for theme_folder in sorted(os.listdir(themes_path)):
+        folder_path = os.path.join(themes_path, theme_folder)
+        if not os.path.isdir(folder_path):
+            continue
+        
+        theme_info = get_theme_info(folder_path)
+        if not theme_info:
+            continue
+        
+        if theme_folder.startswith('random_'):
+            random_themes.extend(theme_info)
+        else:
+            regular_themes.append((theme_folder, theme_info))
+    
+    classify_themes(themes_path, [theme for _, theme_info in regular_themes for theme in theme_info], catalog)
+    
+    theme_count = len([f for f in os.listdir(themes_path) if os.path.isdir(os.path.join(themes_path, f))])
+    return regular_themes, random_themes, theme_count
+
+def build_readme(sections, random_themes, theme_count, file_count, atlas_index=None, updated=None):
+    """Assemble the README from pre-rendered regular theme sections and the random themes.
+    
+    ``updated`` defaults to when the themes last changed, so an unchanged tree
+    always produces the same README.
+    """
+    updated = updated or last_updated()
+    readme_content = render_header(updated)
+    readme_content += "".join(sections)
+    
+    # Random Themes Section (if any exist)
+    if random_themes:
+        readme_content += render_random_section(random_themes, atlas_index)
+    
+    readme_content += render_footer(theme_count, file_count, updated)
+    return readme_content
+
+def write_if_changed(path, content):
+    """Write ``content`` unless the file already holds exactly that; returns whether it wrote."""
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read() == content:
+                return False
+    except OSError:
+        pass
+    atomic_write_text(path, content)
+    return True
+
+def generate_readme(atlas_index_path=None):
+    atlas_index = load_atlas_index(atlas_index_path)
+    themes_path = "themes"
+    
+    regular_themes, random_themes, theme_count = collect_themes(themes_path)
+    sections = [render_theme_section(theme_folder, theme_info) for theme_folder, theme_info in regular_themes]
+    file_count = sum(len(theme_info) for _, theme_info in regular_themes) + len(random_themes)
+    readme_content = build_readme(sections, random_themes, theme_count, file_count, atlas_index,
+                                  last_updated(Path(themes_path)))
+
+    if write_if_changed('README.md', readme_content):
+        print("README.md generated successfully!")
+    else:
+        print("README.md is already up to date")
+    print(f"Found {theme_count} themes")
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where it can't be measured."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def iter_sorted_folders(themes_path, chunk_size=10000):
+    """Yield theme folder names in sorted order holding at most ``chunk_size`` names in memory.
+    
+    Bigger trees are sorted in chunks that are spilled to temp files and
+    merged lazily.
+    """
+    chunk, spills = [], []
+    
+    def spill():
+        fd, path = tempfile.mkstemp(prefix="readme_folders_", suffix=".txt")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(name + "\n" for name in sorted(chunk))
+        spills.append(path)
+        chunk.clear()
+    
+    files = []
+    try:
+        with os.scandir(themes_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    chunk.append(entry.name)
+                    if len(chunk) >= chunk_size:
+                        spill()
+        if not spills:
+            yield from sorted(chunk)
+            return
+        if chunk:
+            spill()
+        files = [open(path, 'r', encoding='utf-8') for path in spills]
+        for line in heapq.merge(*files):
+            yield line.rstrip("\n")
+    finally:
+        for f in files:
+            f.close()
+        for path in spills:
+            os.remove(path)
+
+def iter_theme_chunks(themes_path, folders, chunk_size, classify=True):
+    """Yield lists of up to ``chunk_size`` ``(folder, [ThemeInfo])`` pairs.
+    
+    With ``classify`` each chunk gets its category and emoji from one
+    vectorized color pass, without loading the whole catalog index.
+    """
+    chunk, infos, themes = [], [], []
+    for folder in folders:
+        theme_data = [] if classify else None
+        theme_info = get_theme_info(os.path.join(themes_path, folder), theme_data)
+        if theme_info:
+            chunk.append((folder, theme_info))
+            if classify:
+                infos.extend(theme_info)
+                themes.extend(theme_data)
+        if len(chunk) >= chunk_size:
+            _classify_chunk(infos, themes)
+            yield chunk
+            chunk, infos, themes = [], [], []
+    if chunk:
+        _classify_chunk(infos, themes)
+        yield chunk
+
+def _classify_chunk(infos, themes):
+    if not infos:
+        return
+    result = classify_batch([t['name'] for t in infos], [t['category'] for t in infos], derive_color_properties(themes))
+    for theme, category, emoji in zip(infos, result['classification'].tolist(), result['emoji'].tolist()):
+        theme['category'], theme['emoji'] = category, emoji
+
+def generate_readme_bounded(themes_path="themes", readme_path="README.md", chunk_size=1000):
+    """Stream the README to disk holding at most ``chunk_size`` theme folders in memory.
+    
+    Regular and random themes are written in two passes over the sorted
+    folder names; the random section goes to a temp file first so its header
+    can show the final count.
+    """
+    folder_count = file_count = random_count = 0
+    updated = last_updated(Path(themes_path))
+    with atomic_writer(readme_path) as readme, tempfile.TemporaryFile('w+', encoding='utf-8') as random_part:
+        readme.write(render_header(updated))
+        
+        regular = (f for f in iter_sorted_folders(themes_path, chunk_size * 10) if not f.startswith('random_'))
+        for chunk in iter_theme_chunks(themes_path, regular, chunk_size):
+            for folder, theme_info in chunk:
+                readme.write(render_theme_section(folder, theme_info))
+                file_count += len(theme_info)
+        
+        random_folders = (f for f in iter_sorted_folders(themes_path, chunk_size * 10) if f.startswith('random_'))
+        for chunk in iter_theme_chunks(themes_path, random_folders, chunk_size, classify=False):
+            for folder, theme_info in chunk:
+                random_part.write(render_random_theme_section(folder, theme_info))
+                file_count += len(theme_info)
+                random_count += 1
+        
+        if random_count:
+            readme.write(render_random_header(random_count))
+            random_part.seek(0)
+            shutil.copyfileobj(random_part, readme)
+            readme.write("</details>\n\n")
+        
+        with os.scandir(themes_path) as entries:
+            folder_count = sum(1 for entry in entries if entry.is_dir())
+        readme.write(render_footer(folder_count, file_count, updated))
     
     print("README.md generated successfully!")
-    print(f"Found {len([f for f in os.listdir(themes_path) if os.path.isdir(os.path.join(themes_path, f))])} themes")
+    print(f"Found {folder_count} themes")
+
+def render_changed_previews(themes_path, folders, old_files, new_files, previews="auto", encoding="default"):
+    """Render previews for the changed theme JSONs in ``folders``; returns the PNG paths written."""
+    from theme_randomizer import PREVIEW_ENCODINGS, generate_theme_preview, load_theme
+
+    written = []
+    for folder in sorted(folders):
+        for json_path in sorted(Path(themes_path, folder).glob("*.json")):
+            preview_path = json_path.with_suffix(".png")
+            json_key = json_path.relative_to(themes_path).as_posix()
+            preview_key = preview_path.relative_to(themes_path).as_posix()
+            # A preview is stale if its JSON changed but the preview itself didn't
+            stale = (old_files.get(json_key) != new_files.get(json_key)
+                     and old_files.get(preview_key) == new_files.get(preview_key))
+            if preview_path.exists() and not stale:
+                continue
+            theme = load_theme(json_path)
+            if not should_render_preview(json_path, theme, previews):
+                continue
+            is_light = theme.get("metadata", {}).get("variant") == "light" or json_path.stem.endswith("_light")
+            generate_theme_preview(theme, is_light=is_light, output_path=str(preview_path),
+                                   encoding=PREVIEW_ENCODINGS[encoding]).close()
+            written.append(preview_path)
+    return written
+
+def generate_readme_incremental(themes_path="themes", readme_path="README.md", manifest_path=MANIFEST_PATH,
+                                previews="auto", encoding="default"):
+    """Rebuild only the README sections and previews of theme folders that changed since the last run.
+
+    Rendered sections are cached in the manifest next to the git blob IDs of
+    the files they came from. An unchanged tree returns without reading any
+    theme, and README.md is only rewritten when its content changes.
+    """
+    start = time.perf_counter()
+    themes_path = Path(themes_path)
+    manifest = load_manifest(manifest_path)
+    old_files = manifest.get("files", {})
+    files = file_ids(themes_path)
+    changed = changed_folders(old_files, files) if manifest else {p.parent.name for p in map(Path, files)}
+    if not changed and Path(readme_path).exists():
+        print(f"README.md is up to date ({len(files)} files unchanged, {time.perf_counter() - start:.2f}s)")
+        return False
+
+    rendered = render_changed_previews(themes_path, changed, old_files, files, previews, encoding)
+    if rendered:
+        files = file_ids(themes_path)
+        for path in rendered:
+            print(f"🖼️  Rendered {path}")
+
+    sections = manifest.get("sections", {})
+    random_sections = manifest.get("random_sections", {})
+    file_counts = manifest.get("file_counts", {})
+    regular = []
+    for folder in sorted(changed):
+        for cache in (sections, random_sections, file_counts):
+            cache.pop(folder, None)
+        theme_info = get_theme_info(str(themes_path / folder)) if (themes_path / folder).is_dir() else []
+        if not theme_info:
+            continue
+        file_counts[folder] = len(theme_info)
+        if folder.startswith('random_'):
+            random_sections[folder] = render_random_theme_section(folder, theme_info)
+        else:
+            regular.append((folder, theme_info))
+    classify_themes(str(themes_path), [theme for _, theme_info in regular for theme in theme_info])
+    for folder, theme_info in regular:
+        sections[folder] = render_theme_section(folder, theme_info)
+
+    updated = last_updated(themes_path)
+    content = render_header(updated) + "".join(sections[folder] for folder in sorted(sections))
+    if random_sections:
+        content += render_random_header(len(random_sections))
+        content += "".join(random_sections[folder] for folder in sorted(random_sections))
+        content += "</details>\n\n"
+    with os.scandir(themes_path) as entries:
+        folder_count = sum(1 for entry in entries if entry.is_dir())
+    content += render_footer(folder_count, sum(file_counts.values()), updated)
+
+    written = write_if_changed(readme_path, content)
+    atomic_write_json(manifest_path, {"version": MANIFEST_VERSION, "files": files, "sections": sections,
+                                      "random_sections": random_sections, "file_counts": file_counts})
+    status = "README.md updated" if written else "README.md unchanged"
+    print(f"{status}: {len(changed)} folder(s) changed, {time.perf_counter() - start:.2f}s")
+    return written
 
 if __name__ == "__main__":
-    generate_readme()
\ No newline at end of file
+    from theme_randomizer import PREVIEW_ENCODINGS
+
+    parser = argparse.ArgumentParser(description="Generate README.md from the themes directory.")
+    parser.add_argument("--atlas", metavar="INDEX",
+                        help="contact-sheet index from contact_sheet.py; random themes reference the atlas instead of individual previews")
+    parser.add_argument("--memory-bounded", action="store_true",
+                        help="stream the README in chunks so memory use does not grow with the number of themes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="theme folders held in memory at once (with --memory-bounded)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rebuild README sections and previews of theme folders changed since the last run")
+    parser.add_argument("--manifest", default=str(MANIFEST_PATH), help="change manifest used by --incremental")
+    parser.add_argument("--previews", choices=["auto", "all", "none"], default="auto",
+                        help="with --incremental: re-render previews of changed themes (auto: random, auto-generated or missing)")
+    parser.add_argument("--encoding", default="default", choices=sorted(PREVIEW_ENCODINGS),
+                        help="preview encoding preset for --incremental")
+    args = parser.parse_args()
+    if args.incremental:
+        if args.atlas or args.memory_bounded:
+            print("⚠️  --atlas and --memory-bounded are ignored with --incremental")
+        generate_readme_incremental(manifest_path=Path(args.manifest), previews=args.previews, encoding=args.encoding)
+    elif args.memory_bounded:
+        if args.atlas:
+            print("⚠️  --atlas is ignored with --memory-bounded")
+        generate_readme_bounded(chunk_size=args.chunk_size)
+    else:
+        generate_readme(atlas_index_path=args.atlas)
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS: {peak:.1f} MiB")
\ No newline at end of file
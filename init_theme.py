@@ -3,11 +3,31 @@ Interactive theme creator for BakkesMod themes.
 Creates new theme folders and files from templates with user-provided metadata.
 """
 
+import argparse
+import csv
 import json
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from theme_io import atomic_write_json, BatchWriter, recover_batches
+from theme_style import default_overlay
+
+CATEGORY_MAP = {
+    '1': 'dark', '2': 'light', '3': 'cyberpunk', '4': 'nature',
+    '5': 'space', '6': 'retro', '7': 'anime', '8': 'pastel',
+    '9': 'neon', '10': 'monochrome', '11': 'minimal', '12': 'gaming',
+    '13': 'fire', '14': 'other'
+}
+
+TEMPLATE_FILES = {
+    'dark': "template.json",
+    'light': "template_light.json",
+}
 
 
 def load_template(template_path: str) -> Dict[str, Any]:
@@ -26,8 +46,7 @@ def load_template(template_path: str) -> Dict[str, Any]:
 def save_theme(file_path: str, theme: Dict[str, Any]) -> bool:
     """Save a theme to a JSON file."""
     try:
-        with open(file_path, 'w') as file:
-            json.dump(theme, file, indent=4)
+        atomic_write_json(file_path, theme, indent=4)
         return True
     except Exception as e:
         print(f"❌ Error saving theme: {e}")
@@ -115,14 +134,8 @@ def create_theme_metadata(folder_name: str) -> Dict[str, Any]:
     
     while True:
         category = get_user_input("Category (1-14)", "1").strip()
-        category_map = {
-            '1': 'dark', '2': 'light', '3': 'cyberpunk', '4': 'nature',
-            '5': 'space', '6': 'retro', '7': 'anime', '8': 'pastel',
-            '9': 'neon', '10': 'monochrome', '11': 'minimal', '12': 'gaming',
-            '13': 'fire', '14': 'other'
-        }
-        if category in category_map:
-            category = category_map[category]
+        if category in CATEGORY_MAP:
+            category = CATEGORY_MAP[category]
             break
         print("❌ Please enter a number from 1-14")
     
@@ -138,6 +151,54 @@ def create_theme_metadata(folder_name: str) -> Dict[str, Any]:
     }
 
 
+def build_theme_variant(metadata: Dict[str, Any], template: Dict[str, Any], variant: str) -> Dict[str, Any]:
+    """Build a dark or light theme from a template and the shared metadata."""
+    variant_metadata = metadata.copy()
+    variant_metadata['variant'] = variant
+    if variant == 'light' and not metadata['name'].lower().endswith(' light'):
+        variant_metadata['name'] = metadata['name'] + ' Light'
+    
+    return {
+        'metadata': variant_metadata,
+        'imgui': template.get('imgui', {}),
+        'style': default_overlay().resolve_style(template)
+    }
+
+
+@lru_cache(maxsize=1)
+def get_placeholder_font():
+    """Load the placeholder font once; load_default() is slow to call per image."""
+    from PIL import ImageFont
+    return ImageFont.load_default()
+
+
+def create_placeholder_preview(theme_file: str, preview_file: str = None) -> str:
+    """Create a simple placeholder preview image next to a theme file (or at ``preview_file``)."""
+    from PIL import Image, ImageDraw
+    
+    preview_file = preview_file or theme_file.replace('.json', '.png')
+    
+    # Create a simple placeholder image (grayscale: a third of the pixels to encode)
+    img = Image.new('L', (400, 300), color=64)
+    draw = ImageDraw.Draw(img)
+    
+    # Add placeholder text
+    try:
+        font = get_placeholder_font()
+        text = f"Preview for\n{Path(theme_file).stem}"
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        x = (400 - text_width) // 2
+        y = (300 - text_height) // 2
+        draw.text((x, y), text, fill=255, font=font, align='center')
+    except:
+        draw.text((150, 140), "Preview Placeholder", fill=255)
+    
+    img.save(preview_file)
+    return preview_file
+
+
 def create_theme_variants(metadata: Dict[str, Any], folder_name: str, theme_folder: Path) -> None:
     """Create theme variants (dark/light) based on user choices."""
     
@@ -165,16 +226,7 @@ def create_theme_variants(metadata: Dict[str, Any], folder_name: str, theme_fold
         dark_template = load_template(str(dark_template_path))
         
         if dark_template:
-            # Update metadata
-            dark_metadata = metadata.copy()
-            dark_metadata['variant'] = 'dark'
-            if not metadata['name'].lower().endswith(' dark'):
-                dark_metadata['name'] = metadata['name']
-            
-            dark_theme = {
-                'metadata': dark_metadata,
-                'imgui': dark_template.get('imgui', {})
-            }
+            dark_theme = build_theme_variant(metadata, dark_template, 'dark')
             
             # Save dark theme
             dark_file = theme_folder / f"{folder_name}.json"
@@ -190,16 +242,7 @@ def create_theme_variants(metadata: Dict[str, Any], folder_name: str, theme_fold
         light_template = load_template(str(light_template_path))
         
         if light_template:
-            # Update metadata
-            light_metadata = metadata.copy()
-            light_metadata['variant'] = 'light'
-            if not metadata['name'].lower().endswith(' light'):
-                light_metadata['name'] = metadata['name'] + ' Light'
-            
-            light_theme = {
-                'metadata': light_metadata,
-                'imgui': light_template.get('imgui', {})
-            }
+            light_theme = build_theme_variant(metadata, light_template, 'light')
             
             # Save light theme
             light_file = theme_folder / f"{folder_name}_light.json"
@@ -218,30 +261,8 @@ def create_theme_variants(metadata: Dict[str, Any], folder_name: str, theme_fold
         # Offer to create placeholder preview files
         if get_yes_no("\nCreate placeholder preview files (.png)?", default=False):
             try:
-                # Create simple placeholder images if PIL is available
-                from PIL import Image, ImageDraw, ImageFont
-                
                 for theme_file in created_files:
-                    preview_file = theme_file.replace('.json', '.png')
-                    
-                    # Create a simple placeholder image
-                    img = Image.new('RGB', (400, 300), color=(64, 64, 64))
-                    draw = ImageDraw.Draw(img)
-                    
-                    # Add placeholder text
-                    try:
-                        font = ImageFont.load_default()
-                        text = f"Preview for\n{Path(theme_file).stem}"
-                        bbox = draw.textbbox((0, 0), text, font=font)
-                        text_width = bbox[2] - bbox[0]
-                        text_height = bbox[3] - bbox[1]
-                        x = (400 - text_width) // 2
-                        y = (300 - text_height) // 2
-                        draw.text((x, y), text, fill=(255, 255, 255), font=font, align='center')
-                    except:
-                        draw.text((150, 140), "Preview Placeholder", fill=(255, 255, 255))
-                    
-                    img.save(preview_file)
+                    preview_file = create_placeholder_preview(theme_file)
                     print(f"   🖼️  Created placeholder: {Path(preview_file).name}")
                     
             except ImportError:
@@ -264,6 +285,117 @@ def create_theme_variants(metadata: Dict[str, Any], folder_name: str, theme_fold
         print("❌ No theme files were created")
 
 
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """Load theme specs from a CSV (header row) or JSON (list of objects) manifest."""
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as file:
+        if manifest_path.lower().endswith('.csv'):
+            return list(csv.DictReader(file))
+        specs = json.load(file)
+    if isinstance(specs, dict):
+        specs = specs.get('themes', [])
+    return specs
+
+
+def normalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a manifest row and fill in the same defaults as the interactive flow."""
+    name = str(spec.get('name') or '').strip()
+    folder_name = sanitize_folder_name(str(spec.get('folder') or name))
+    if not name or not folder_name:
+        raise ValueError("missing or invalid theme name")
+    
+    category = str(spec.get('category') or 'dark').strip().lower()
+    category = CATEGORY_MAP.get(category, category)
+    if category not in CATEGORY_MAP.values():
+        raise ValueError(f"unknown category '{category}'")
+    
+    variants = spec.get('variants') or 'dark,light'
+    if isinstance(variants, str):
+        variants = [v.strip().lower() for v in re.split(r'[,;|\s]+', variants) if v.strip()]
+    unknown = [v for v in variants if v not in TEMPLATE_FILES]
+    if unknown or not variants:
+        raise ValueError(f"invalid variants {variants}")
+    
+    metadata = {
+        'name': name,
+        'author': str(spec.get('author') or '@borgox').strip(),
+        'description': str(spec.get('description') or '').strip(),
+        'category': category,
+        'version': str(spec.get('version') or '1.0').strip()
+    }
+    return {'folder_name': folder_name, 'metadata': metadata, 'variants': variants}
+
+
+def create_themes_from_manifest(manifest_path: str, themes_path: Path = Path("themes"), overwrite: bool = False,
+                                previews: bool = False, workers: int = None) -> Dict[str, int]:
+    """Scaffold every theme in a manifest without prompting.
+    
+    Templates are loaded once, placeholder previews are written in a thread
+    pool, all files are committed as one batch, and created/skipped/failed
+    counts are returned.
+    """
+    start = time.perf_counter()
+    templates_base = Path("defaults/template")
+    templates = {variant: load_template(str(templates_base / file)) for variant, file in TEMPLATE_FILES.items()}
+    
+    counts = {'created': 0, 'skipped': 0, 'failed': 0}
+    created_files = []
+    seen_folders = set()
+    recover_batches()
+    batch = BatchWriter()
+    
+    for row, spec in enumerate(load_manifest(manifest_path), 1):
+        try:
+            spec = normalize_spec(spec)
+        except ValueError as e:
+            print(f"❌ Row {row}: {e}")
+            counts['failed'] += 1
+            continue
+        
+        folder_name = spec['folder_name']
+        theme_folder = themes_path / folder_name
+        if folder_name in seen_folders or (theme_folder.exists() and not overwrite):
+            print(f"⏭️  Row {row}: themes/{folder_name} already exists, skipping")
+            counts['skipped'] += 1
+            continue
+        seen_folders.add(folder_name)
+        
+        missing = [v for v in spec['variants'] if not templates[v]]
+        if missing:
+            print(f"❌ Row {row}: template for {', '.join(missing)} variant could not be loaded")
+            counts['failed'] += 1
+            continue
+        
+        for variant in spec['variants']:
+            suffix = '' if variant == 'dark' else '_light'
+            theme_file = theme_folder / f"{folder_name}{suffix}.json"
+            batch.write_json(theme_file, build_theme_variant(spec['metadata'], templates[variant], variant))
+            created_files.append(theme_file)
+        counts['created'] += 1
+    
+    if previews and created_files:
+        try:
+            import PIL  # noqa: F401
+            staged = [(str(f), str(batch.stage(f.with_suffix('.png')))) for f in created_files]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda paths: create_placeholder_preview(*paths), staged))
+            print(f"🖼️  Created {len(created_files)} placeholder previews")
+        except ImportError:
+            print("⚠️  Pillow not available for preview generation")
+            print("📝 Create .png files manually or install Pillow: pip install Pillow")
+    
+    # All scaffolds are committed together with a single flush to disk
+    try:
+        batch.commit()
+    except BaseException:
+        batch.abort()
+        raise
+    
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 Created: {counts['created']} | Skipped: {counts['skipped']} | Failed: {counts['failed']} "
+          f"({len(created_files)} files in {elapsed:.2f}s)")
+    return counts
+
+
 def list_existing_themes() -> None:
     """List existing themes for reference."""
     themes_path = Path("themes")
@@ -343,8 +475,19 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create new BakkesMod theme folders from templates.")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="CSV or JSON manifest of theme specs (name, author, description, category, version, variants); skips all prompts")
+    parser.add_argument("--overwrite", action="store_true", help="overwrite existing theme folders in batch mode")
+    parser.add_argument("--previews", action="store_true", help="write placeholder previews in batch mode")
+    parser.add_argument("--workers", type=int, default=None, help="threads for placeholder previews")
+    args = parser.parse_args()
+    
     try:
-        main()
+        if args.manifest:
+            create_themes_from_manifest(args.manifest, overwrite=args.overwrite, previews=args.previews, workers=args.workers)
+        else:
+            main()
     except KeyboardInterrupt:
         print("\n\n❌ Theme creation cancelled by user")
     except Exception as e:
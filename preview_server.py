@@ -0,0 +1,271 @@
+"""
+Local HTTP preview server for reviewing themes.
+Serves a gallery of the theme catalog and renders previews on demand in a
+worker pool, with an in-memory LRU cache. POST a theme JSON to /render to
+preview live edits without touching disk.
+
+Endpoints:
+    GET  /                               gallery of every theme folder
+    GET  /preview/<folder>?variant=&size=&format=
+    GET  /theme/<folder>?variant=        raw theme JSON
+    POST /render?variant=&size=&format=  render the posted theme dict
+"""
+
+import argparse
+import asyncio
+import hashlib
+import html
+import io
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from PIL import Image
+
+from theme_randomizer import generate_theme_preview, parse_size
+
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp"}
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def render_preview_bytes(theme: Dict[str, Any], is_light: bool, size: Optional[Tuple[int, int]], fmt: str) -> bytes:
+    """Render a theme preview to encoded image bytes (runs in a worker process).
+
+    Renders are deterministic, so equal inputs always give byte-identical output.
+    """
+    image = generate_theme_preview(theme, is_light=is_light, deterministic=True)
+    if size and size != image.size:
+        image = image.resize(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", lossless=True)
+    else:
+        image.save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def theme_error(theme: Any) -> Optional[str]:
+    """Why a posted theme can't be rendered, or None if it can."""
+    if not isinstance(theme, dict) or not isinstance(theme.get("imgui"), dict):
+        return "theme must contain an 'imgui' object"
+    if not isinstance(theme.get("style", {}), dict):
+        return "'style' must be an object"
+    for key, color in theme["imgui"].items():
+        if not isinstance(color, dict) or not all(channel in color for channel in "rgb"):
+            return f"imgui.{key} must be an object with r, g, b (and optionally a)"
+        for channel in "rgba":
+            value = color.get(channel, 1.0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return f"imgui.{key}.{channel} must be a number"
+    return None
+
+
+class PreviewCache:
+    """Byte-bounded LRU cache of encoded previews."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: tuple, data: bytes) -> None:
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+
+class PreviewServer:
+    """asyncio HTTP server that renders previews in a process pool."""
+
+    def __init__(self, themes_path: Path, workers: int = None, cache_bytes: int = 64 * 1024 * 1024):
+        self.themes_path = themes_path
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache = PreviewCache(cache_bytes)
+        # Concurrent requests for the same preview share one render
+        self.in_flight: Dict[tuple, asyncio.Future] = {}
+
+    def theme_file(self, folder: str, variant: str) -> Optional[Path]:
+        """Resolve a theme folder and variant to its JSON file, refusing path traversal."""
+        if not folder or "/" in folder or "\\" in folder or folder.startswith("."):
+            return None
+        name = f"{folder}_light.json" if variant == "light" else f"{folder}.json"
+        path = self.themes_path / folder / name
+        return path if path.is_file() else None
+
+    async def render(self, key: tuple, theme: Dict[str, Any], is_light: bool,
+                     size: Optional[Tuple[int, int]], fmt: str) -> bytes:
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if key in self.in_flight:
+            return await self.in_flight[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, render_preview_bytes, theme, is_light, size, fmt)
+        self.in_flight[key] = future
+        try:
+            data = await future
+        finally:
+            self.in_flight.pop(key, None)
+        self.cache.put(key, data)
+        return data
+
+    def gallery(self, size: str) -> bytes:
+        """Render the HTML gallery page."""
+        cards = []
+        for folder in sorted(p.name for p in self.themes_path.iterdir() if p.is_dir()):
+            for variant in ("dark", "light"):
+                if self.theme_file(folder, variant) is None:
+                    continue
+                src = f"/preview/{quote(folder)}?variant={variant}&size={quote(size)}"
+                cards.append(
+                    f'<figure><a href="/theme/{quote(folder)}?variant={variant}">'
+                    f'<img loading="lazy" src="{src}" alt="{html.escape(folder)}"></a>'
+                    f'<figcaption>{html.escape(folder)} ({variant})</figcaption></figure>'
+                )
+        page = (
+            "<!doctype html><meta charset='utf-8'><title>BakkesMod Theme Previews</title>"
+            "<style>body{background:#181818;color:#ddd;font-family:sans-serif}"
+            "figure{display:inline-block;margin:8px}img{display:block}</style>"
+            f"<h1>🎨 BakkesMod Theme Previews</h1>{''.join(cards)}"
+        )
+        return page.encode("utf-8")
+
+    async def handle_request(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Route one request and return (status, content type, body)."""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        variant = "light" if query.get("variant") == "light" else "dark"
+        fmt = query.get("format", "png")
+        if fmt not in CONTENT_TYPES:
+            return 400, "text/plain", b"format must be png or webp"
+        try:
+            size = parse_size(query["size"]) if "size" in query else None
+        except ValueError:
+            return 400, "text/plain", b"size must be WIDTHxHEIGHT"
+        if size and not (16 <= size[0] <= 3200 and 16 <= size[1] <= 2400):
+            return 400, "text/plain", b"size out of range"
+
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        if method == "GET" and url.path == "/":
+            return 200, "text/html; charset=utf-8", self.gallery(query.get("size", "400x300"))
+
+        if method == "GET" and len(parts) == 2 and parts[0] in ("preview", "theme"):
+            theme_path = self.theme_file(parts[1], variant)
+            if theme_path is None:
+                return 404, "text/plain", b"theme not found"
+            if parts[0] == "theme":
+                return 200, "application/json", theme_path.read_bytes()
+            theme = json.loads(theme_path.read_bytes())
+            # mtime in the key keeps edited themes from being served stale
+            key = (str(theme_path), theme_path.stat().st_mtime_ns, variant, size, fmt)
+            return 200, CONTENT_TYPES[fmt], await self.render(key, theme, variant == "light", size, fmt)
+
+        if method == "POST" and url.path == "/render":
+            try:
+                theme = json.loads(body)
+            except ValueError:
+                return 400, "text/plain", b"body must be a theme JSON object"
+            error = theme_error(theme)
+            if error:
+                return 400, "text/plain", error.encode()
+            key = ("live", hashlib.sha1(body).hexdigest(), variant, size, fmt)
+            return 200, CONTENT_TYPES[fmt], await self.render(key, theme, variant == "light", size, fmt)
+
+        return 404, "text/plain", b"not found"
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    status, content_type, payload = 400, "text/plain", b"invalid Content-Length"
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, content_type, payload = 413, "text/plain", b"request body too large"
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, content_type, payload = await self.handle_request(method, target, body)
+                    except Exception as e:
+                        status, content_type, payload = 500, "text/plain", f"render failed: {e}".encode()
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Cache-Control: no-cache\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"🌐 Serving theme previews on http://{host}:{port}/ (Ctrl-C to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a live gallery of theme previews.")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind")
+    parser.add_argument("--port", type=int, default=8765, help="port to bind")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="render worker processes")
+    parser.add_argument("--cache-mb", type=int, default=64, help="LRU preview cache size in MiB")
+    args = parser.parse_args()
+
+    preview_server = PreviewServer(Path(args.themes), args.workers, args.cache_mb * 1024 * 1024)
+    try:
+        asyncio.run(preview_server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Preview server stopped")
+    finally:
+        preview_server.pool.shutdown(cancel_futures=True)
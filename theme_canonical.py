@@ -0,0 +1,120 @@
+"""
+Canonical form, 8-bit quantization and content hashes for themes.
+Theme channels are floats that often carry float32 noise
+(``0.25999999046325684``). Previews are rendered at 8 bits per channel, so
+two themes whose channels round to the same 8-bit values look identical;
+the content hash is taken over those 8-bit values (and the style section),
+which makes dedupe and cache lookups exact. Quantization at save time is
+optional and stores each channel as the shortest decimal that maps back to
+its 8-bit value, which also keeps files small.
+
+Usage:
+    python theme_canonical.py normalize themes --check     # list files that are not canonical
+    python theme_canonical.py normalize themes --quantize  # rewrite files canonically, 8-bit channels
+    python theme_catalog.py dupes                          # themes that look identical, from the index
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from theme_io import atomic_write_text
+
+LEVELS = 255  # 8 bits per channel
+DECIMALS = 3  # the fewest that keep every k/255 distinct
+# Channels are first rounded to this many units, which absorbs float32 noise
+# so 0.3 and 0.30000001192092896 land on the same level even though both sit
+# exactly between two levels
+NOISE_SCALE = 10000
+SECTION_ORDER = ("metadata", "imgui", "style")
+CHANNEL_ORDER = ("a", "r", "g", "b")  # as most themes and Theme.to_dict write them
+
+
+def channel_level(value: float) -> int:
+    """The 8-bit level of a channel, rounding halves up in exact integer arithmetic."""
+    units = round(min(max(value, 0.0), 1.0) * NOISE_SCALE)
+    return (units * LEVELS + NOISE_SCALE // 2) // NOISE_SCALE
+
+
+def quantize_channel(value: float) -> float:
+    """``value`` snapped to its 8-bit level, as a short decimal."""
+    return round(channel_level(value) / LEVELS, DECIMALS)
+
+
+def quantize_theme(theme: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of ``theme`` with every color channel quantized to 8 bits."""
+    quantized = dict(theme)
+    quantized["imgui"] = {key: {c: quantize_channel(v) for c, v in value.items()} if isinstance(value, dict) else value
+                          for key, value in theme.get("imgui", {}).items()}
+    return quantized
+
+
+def ordered_channels(color: Dict[str, Any]) -> Dict[str, Any]:
+    return {c: color[c] for c in CHANNEL_ORDER + tuple(sorted(set(color) - set(CHANNEL_ORDER))) if c in color}
+
+
+def canonical_theme(theme: Dict[str, Any]) -> Dict[str, Any]:
+    """``theme`` in canonical order: metadata, imgui, style, then other sections; keys sorted within sections."""
+    sections = [name for name in SECTION_ORDER if name in theme] + sorted(set(theme) - set(SECTION_ORDER))
+    canonical = {}
+    for name in sections:
+        section = theme[name]
+        if name == "metadata" or not isinstance(section, dict):
+            canonical[name] = section  # metadata keeps its authored order
+        else:
+            canonical[name] = {key: ordered_channels(value) if isinstance(value, dict) else value
+                               for key, value in sorted(section.items())}
+    return canonical
+
+
+def canonical_json(theme: Dict[str, Any], quantize: bool = False, indent: int = 4) -> str:
+    """Serialize a theme canonically (optionally quantized), as ``normalize`` rewrites files."""
+    return json.dumps(canonical_theme(quantize_theme(theme) if quantize else theme), indent=indent)
+
+
+def content_hash(theme: Dict[str, Any]) -> str:
+    """Hash of how a theme looks: 8-bit colors and style, independent of metadata, order and float noise."""
+    colors = {key: [channel_level(value.get(c, 1.0 if c == "a" else 0.0)) for c in "rgba"]
+              if isinstance(value, dict) else value for key, value in theme.get("imgui", {}).items()}
+    content = {"imgui": colors, "style": theme.get("style", {})}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def normalize_files(theme_files: List[Path], quantize: bool = False, check: bool = False) -> List[Path]:
+    """Rewrite theme files canonically; returns the files that were (or with ``check``, would be) changed."""
+    changed = []
+    for theme_file in theme_files:
+        text = theme_file.read_text(encoding="utf-8")
+        second_line = text.split("\n", 2)[1] if "\n" in text else ""
+        indent = len(second_line) - len(second_line.lstrip(" ")) or 4  # keep the file's indentation
+        canonical = canonical_json(json.loads(text), quantize, indent)
+        if canonical != text:
+            changed.append(theme_file)
+            if not check:
+                atomic_write_text(theme_file, canonical)
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite theme files in canonical form.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    normalize_parser = commands.add_parser("normalize", help="rewrite theme files in canonical form")
+    normalize_parser.add_argument("themes", nargs="?", default="themes", help="themes directory")
+    normalize_parser.add_argument("--quantize", action="store_true", help="also quantize channels to 8 bits")
+    normalize_parser.add_argument("--check", action="store_true", help="only list files that would change")
+
+    args = parser.parse_args()
+    files = sorted(Path(args.themes).glob("*/*.json"))
+    before = sum(path.stat().st_size for path in files)
+    changed = normalize_files(files, args.quantize, args.check)
+    for path in changed:
+        print(f"{'❌' if args.check else '✏️ '} {path}")
+    if args.check:
+        print(f"{len(changed)} of {len(files)} files are not canonical")
+        sys.exit(1 if changed else 0)
+    after = sum(path.stat().st_size for path in files)
+    print(f"✅ Rewrote {len(changed)} of {len(files)} files ({before / 1024:.1f} KiB -> {after / 1024:.1f} KiB)")
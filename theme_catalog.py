@@ -0,0 +1,416 @@
+"""
+Catalog index and query tool for the theme collection.
+The index stores metadata plus color properties derived once per theme file
+(background lightness, dominant hue, text contrast, accent saturation) as
+NumPy columns, so filters and sorts over very large trees are vectorized and
+return in milliseconds. Only files whose mtime/size changed are re-read when
+the index is refreshed. Each theme is also classified into a category and
+README emoji, from its metadata when present and from its colors otherwise.
+
+Usage:
+    python theme_catalog.py index
+    python theme_catalog.py query --variant dark --min-contrast 7 --sort accent_saturation --desc
+    python theme_catalog.py query --hue 280-340 --format paths | xargs ...
+    python theme_catalog.py dupes
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from color_utils import composite_over_array, contrast_ratio_array, oklab_to_oklch_array, srgb_to_oklab_array
+from theme_canonical import content_hash
+from theme_model import default_schema
+
+INDEX_PATH = Path(".theme_index.npz")
+INDEX_VERSION = 4
+
+BACKGROUND_KEY = "ImGuiCol_WindowBg"
+TEXT_KEY = "ImGuiCol_Text"
+ACCENT_KEYS = (
+    "ImGuiCol_Button", "ImGuiCol_ButtonHovered", "ImGuiCol_ButtonActive",
+    "ImGuiCol_CheckMark", "ImGuiCol_SliderGrab", "ImGuiCol_SliderGrabActive",
+    "ImGuiCol_Header", "ImGuiCol_HeaderHovered", "ImGuiCol_HeaderActive",
+    "ImGuiCol_Tab", "ImGuiCol_TabHovered", "ImGuiCol_TabActive",
+    "ImGuiCol_TitleBgActive", "ImGuiCol_PlotHistogram", "ImGuiCol_Border",
+)
+FALLBACK_COLOR = (0.5, 0.5, 0.5, 1.0)
+
+CATEGORY_EMOJI = {
+    "cyberpunk": "🤖", "space": "💫", "neon": "⚡", "retro": "📼", "pastel": "🌸", "nature": "🌿",
+    "anime": "🐱", "monochrome": "⚫", "fire": "🔥", "minimal": "◽", "gaming": "🎮",
+}
+DEFAULT_EMOJI = "🎨"
+# Name substrings checked in order when metadata has no usable category;
+# a None category leaves the category to color analysis but keeps the emoji
+NAME_HINTS = (
+    (("cyber",), "cyberpunk", None),
+    (("space", "cosmic"), "space", None),
+    (("neon", "pulse"), "neon", None),
+    (("retro", "wave"), "retro", None),
+    (("pastel",), "pastel", None),
+    (("natural", "nature"), "nature", None),
+    (("nyan", "kurumi"), "anime", None),
+    (("mono", "blue"), "monochrome", None),
+    (("solar", "fire", "flare"), "fire", None),
+    (("dark mode",), None, "🌑"),
+    (("glitch",), None, "📺"),
+    (("frost",), None, "❄️"),
+)
+
+STRING_COLUMNS = ("path", "folder", "name", "author", "category", "variant", "classification", "emoji", "content_hash")
+KEY_SEPARATOR = "|"
+NUMERIC_COLUMNS = ("bg_lightness", "dominant_hue", "text_contrast", "accent_saturation")
+
+
+def derive_color_properties(themes: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Compute the derived color columns for a batch of themes in one vectorized pass."""
+    keys = (BACKGROUND_KEY, TEXT_KEY) + ACCENT_KEYS
+    values = np.array([
+        [[imgui.get(key, {}).get(c, fallback) for c, fallback in zip("rgba", FALLBACK_COLOR)] for key in keys]
+        for imgui in (theme.get("imgui", {}) for theme in themes)
+    ], dtype=np.float32).reshape(len(themes), len(keys), 4)
+
+    # Same blending as the preview: the window over black, everything else over the window
+    background = composite_over_array(values[:, 0], np.zeros(3, dtype=np.float32))
+    composited = composite_over_array(values[:, 1:], background[:, None, :])
+    text, accents = composited[:, 0], composited[:, 1:]
+
+    accent_lch = oklab_to_oklch_array(srgb_to_oklab_array(accents))
+    chroma = accent_lch[..., 1]
+    hue = np.radians(accent_lch[..., 2])
+    # Chroma-weighted circular mean, so grey keys don't pull the hue around
+    dominant_hue = np.degrees(np.arctan2((chroma * np.sin(hue)).sum(axis=1), (chroma * np.cos(hue)).sum(axis=1))) % 360
+
+    return {
+        "bg_lightness": srgb_to_oklab_array(background)[:, 0],
+        "dominant_hue": dominant_hue.astype(np.float32),
+        "text_contrast": contrast_ratio_array(text, background).astype(np.float32),
+        "accent_saturation": chroma.mean(axis=1).astype(np.float32),
+    }
+
+
+def classify_themes(names: np.ndarray, categories: np.ndarray,
+                    derived: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Assign a category and emoji to a batch of themes.
+
+    A recognised metadata category wins, then name hints, then the colors:
+    grey accents are monochrome, soft light themes pastel, vivid accents on a
+    dark background neon, and everything else goes by the dominant hue.
+    """
+    names = np.char.lower(np.asarray(names, dtype=str))
+    categories = np.char.lower(np.asarray(categories, dtype=str))
+    hue, saturation = derived["dominant_hue"], derived["accent_saturation"]
+    lightness = derived["bg_lightness"]
+
+    by_color = np.select(
+        [saturation < 0.03,
+         (lightness > 0.75) & (saturation < 0.10),
+         (lightness < 0.30) & (saturation > 0.18),
+         (hue < 90) | (hue >= 350),
+         hue < 180,
+         hue < 280],
+        ["monochrome", "pastel", "neon", "fire", "nature", "space"],
+        "retro",
+    )
+
+    classification = by_color.astype(object)
+    emoji = np.full(len(names), None, dtype=object)
+    unresolved = np.ones(len(names), dtype=bool)
+    for substrings, category, hint_emoji in NAME_HINTS:
+        hit = unresolved & np.any([np.char.find(names, s) >= 0 for s in substrings], axis=0)
+        if category:
+            classification[hit] = category
+        emoji[hit] = hint_emoji
+        unresolved &= ~hit
+
+    known = np.isin(categories, list(CATEGORY_EMOJI))
+    classification[known] = categories[known]
+    emoji[known] = None
+
+    emoji = np.array([e or CATEGORY_EMOJI.get(c, DEFAULT_EMOJI) for e, c in zip(emoji, classification)])
+    return {"classification": classification.astype(str), "emoji": emoji}
+
+
+def theme_record(theme_file: Path, theme: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the metadata columns for one theme file."""
+    metadata = theme.get("metadata", {})
+    variant = metadata.get("variant") or ("light" if "light" in theme_file.stem.lower() else "dark")
+    return {
+        "path": theme_file.as_posix(),
+        "folder": theme_file.parent.name,
+        "name": str(metadata.get("name", theme_file.stem)),
+        "author": str(metadata.get("author", "")),
+        "category": str(metadata.get("category", "")),
+        "variant": variant,
+        "auto_generated": bool(metadata.get("auto_generated", theme_file.parent.name.startswith("random_"))),
+        "extra_keys": KEY_SEPARATOR.join(key for key in theme.get("imgui", {}) if key not in default_schema().index),
+        "content_hash": content_hash(theme),
+    }
+
+
+class ThemeCatalog:
+    """Columnar theme index backed by an ``.npz`` file.
+
+    ``key_mask[row, k]`` records whether a theme defines the k-th key of the
+    template schema; keys outside the schema are listed in ``extra_keys``.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["path"])
+
+    @classmethod
+    def empty(cls) -> "ThemeCatalog":
+        columns = {name: np.array([], dtype=str) for name in STRING_COLUMNS}
+        columns.update({name: np.array([], dtype=np.float32) for name in NUMERIC_COLUMNS})
+        columns["auto_generated"] = np.array([], dtype=bool)
+        columns["extra_keys"] = np.array([], dtype=str)
+        columns["key_mask"] = np.zeros((0, len(default_schema())), dtype=bool)
+        columns["mtime_ns"] = np.array([], dtype=np.int64)
+        columns["size"] = np.array([], dtype=np.int64)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, index_path: Path = INDEX_PATH) -> "ThemeCatalog":
+        if not index_path.exists():
+            return cls.empty()
+        with np.load(index_path) as data:
+            if (int(data["version"]) != INDEX_VERSION
+                    or data["key_schema"].tolist() != list(default_schema().keys)):
+                return cls.empty()
+            return cls({name: data[name] for name in data.files if name not in ("version", "key_schema")})
+
+    def save(self, index_path: Path = INDEX_PATH) -> None:
+        # np.savez appends .npz to names without it, so write via a file object
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, version=INDEX_VERSION, key_schema=np.array(default_schema().keys), **self.columns)
+        os.replace(tmp_path, index_path)
+
+    def refresh(self, themes_path: Path = Path("themes")) -> Dict[str, int]:
+        """Bring the index up to date with ``themes_path``, re-reading only changed files."""
+        previous = {path: i for i, path in enumerate(self.columns["path"].tolist())}
+        keep, new_files, seen = [], [], 0
+        for theme_file in sorted(themes_path.glob("*/*.json")):
+            stat = theme_file.stat()
+            row = previous.get(theme_file.as_posix())
+            seen += row is not None
+            if (row is not None and self.columns["mtime_ns"][row] == stat.st_mtime_ns
+                    and self.columns["size"][row] == stat.st_size):
+                keep.append(row)
+            else:
+                new_files.append((theme_file, stat))
+
+        loaded = []
+        for theme_file, stat in new_files:
+            try:
+                with open(theme_file, 'r') as file:
+                    loaded.append((theme_file, json.load(file), stat))
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Skipping {theme_file}: {e}")
+
+        self.columns = {name: column[keep] for name, column in self.columns.items()}
+        self.add_themes(loaded)
+        return {"updated": len(loaded), "unchanged": len(keep), "removed": len(previous) - seen}
+
+    def add_themes(self, entries: List[tuple]) -> None:
+        """Index already-loaded ``(theme file, theme, stat)`` entries in one vectorized batch.
+
+        Entries replace any existing rows for the same paths.
+        """
+        if not entries:
+            return
+        records = []
+        for theme_file, theme, stat in entries:
+            record = theme_record(theme_file, theme)
+            record["mtime_ns"], record["size"] = stat.st_mtime_ns, stat.st_size
+            records.append(record)
+
+        replaced = np.isin(self.columns["path"], [record["path"] for record in records])
+        columns = {name: column[~replaced] for name, column in self.columns.items()}
+        derived = derive_color_properties([theme for _, theme, _ in entries])
+        derived.update(classify_themes([r["name"] for r in records], [r["category"] for r in records], derived))
+        schema_keys = default_schema().keys
+        derived["key_mask"] = np.array([[key in imgui for key in schema_keys]
+                                        for imgui in (theme.get("imgui", {}) for _, theme, _ in entries)],
+                                       dtype=bool).reshape(len(entries), len(schema_keys))
+        for name in columns:
+            added = derived[name] if name in derived else np.array([r[name] for r in records])
+            if columns[name].dtype.kind != "U":  # string columns widen to the longest value
+                added = added.astype(columns[name].dtype)
+            columns[name] = np.concatenate([columns[name], added])
+
+        order = np.argsort(columns["path"], kind="stable")
+        self.columns = {name: column[order] for name, column in columns.items()}
+
+    def remove_folder(self, folder: Path) -> None:
+        """Drop the rows of every theme in ``folder``."""
+        keep = ~np.char.startswith(self.columns["path"], Path(folder).as_posix() + "/")
+        self.columns = {name: column[keep] for name, column in self.columns.items()}
+
+    def query(self, category: str = None, variant: str = None, author: str = None, folder: str = None,
+              auto_generated: bool = None, min_contrast: float = None, lightness: tuple = None,
+              hue: tuple = None, min_saturation: float = None, sort: str = None, limit: int = None) -> np.ndarray:
+        """Return the row indices matching every given filter, optionally sorted.
+
+        ``lightness`` and ``hue`` are (low, high) ranges; a hue range with
+        low > high wraps around 360°. ``sort`` is a column name, prefix ``-``
+        for descending.
+        """
+        c = self.columns
+        mask = np.ones(len(self), dtype=bool)
+        if category:
+            mask &= (np.char.lower(c["category"]) == category.lower()) | (c["classification"] == category.lower())
+        if variant:
+            mask &= c["variant"] == variant
+        if author:
+            mask &= np.char.find(np.char.lower(c["author"]), author.lower()) >= 0
+        if folder:
+            mask &= np.char.find(c["folder"], folder) >= 0
+        if auto_generated is not None:
+            mask &= c["auto_generated"] == auto_generated
+        if min_contrast is not None:
+            mask &= c["text_contrast"] >= min_contrast
+        if lightness:
+            mask &= (c["bg_lightness"] >= lightness[0]) & (c["bg_lightness"] <= lightness[1])
+        if hue:
+            low, high = hue
+            in_range = (c["dominant_hue"] >= low) & (c["dominant_hue"] <= high)
+            if low > high:
+                in_range = (c["dominant_hue"] >= low) | (c["dominant_hue"] <= high)
+            mask &= in_range
+        if min_saturation is not None:
+            mask &= c["accent_saturation"] >= min_saturation
+
+        rows = np.flatnonzero(mask)
+        if sort:
+            column = sort.lstrip("-")
+            order = np.argsort(c[column][rows], kind="stable")
+            rows = rows[order[::-1] if sort.startswith("-") else order]
+        return rows[:limit] if limit else rows
+
+    def classifications(self) -> Dict[str, tuple]:
+        """Map each indexed path to its ``(category, emoji)``."""
+        return dict(zip(self.columns["path"].tolist(),
+                        zip(self.columns["classification"].tolist(), self.columns["emoji"].tolist())))
+
+    def key_coverage(self, target_keys: List[str]) -> Tuple[np.ndarray, List[List[str]]]:
+        """Compare every theme's ImGui keys with ``target_keys``.
+
+        Returns a (themes x target keys) mask of missing keys and, per theme,
+        the keys it defines that are not in the target.
+        """
+        schema = default_schema()
+        extra = [set(filter(None, value.split(KEY_SEPARATOR))) for value in self.columns["extra_keys"].tolist()]
+        present = np.zeros((len(self), len(target_keys)), dtype=bool)
+        for j, key in enumerate(target_keys):
+            if key in schema.index:
+                present[:, j] = self.columns["key_mask"][:, schema.index[key]]
+            else:
+                present[:, j] = [key in keys for keys in extra]
+
+        outside = ~np.isin(np.array(schema.keys), list(target_keys))
+        obsolete = [[schema.keys[k] for k in np.flatnonzero(row & outside)] + sorted(keys.difference(target_keys))
+                    for row, keys in zip(self.columns["key_mask"], extra)]
+        return ~present, obsolete
+
+    def duplicates(self) -> List[List[str]]:
+        """Paths of themes that look identical (same content hash), grouped."""
+        _, inverse, counts = np.unique(self.columns["content_hash"], return_inverse=True, return_counts=True)
+        paths = self.columns["path"]
+        return [paths[inverse == group].tolist() for group in np.flatnonzero(counts > 1)]
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize rows as plain dicts for output."""
+        names = STRING_COLUMNS + ("auto_generated",) + NUMERIC_COLUMNS
+        return [{name: self.columns[name][row].item() for name in names} for row in rows]
+
+
+def load_catalog(themes_path: Path = Path("themes"), index_path: Path = INDEX_PATH, refresh: bool = True) -> ThemeCatalog:
+    """Load the index, refreshing and saving it if anything changed."""
+    catalog = ThemeCatalog.load(index_path)
+    if refresh or not len(catalog):
+        stats = catalog.refresh(themes_path)
+        if stats["updated"] or stats["removed"] or not index_path.exists():
+            catalog.save(index_path)
+    return catalog
+
+
+def parse_range(value: str) -> tuple:
+    """Parse a ``LOW-HIGH`` range."""
+    low, high = value.split("-")
+    return float(low), float(high)
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "yes", "true", "y")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index and query the theme catalog.")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--index", default=str(INDEX_PATH), help="index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("index", help="build or update the catalog index")
+
+    commands.add_parser("dupes", help="list themes that look identical (same content hash)")
+
+    query_parser = commands.add_parser("query", help="filter and sort themes")
+    query_parser.add_argument("--category", help="metadata or classified category")
+    query_parser.add_argument("--variant", choices=["dark", "light"])
+    query_parser.add_argument("--author", help="substring match")
+    query_parser.add_argument("--folder", help="substring match on the theme folder")
+    query_parser.add_argument("--auto-generated", type=parse_bool, metavar="yes|no")
+    query_parser.add_argument("--min-contrast", type=float, help="minimum text/background contrast ratio")
+    query_parser.add_argument("--lightness", type=parse_range, metavar="LOW-HIGH", help="background OKLab lightness (0-1)")
+    query_parser.add_argument("--hue", type=parse_range, metavar="LOW-HIGH", help="dominant hue in degrees (wraps)")
+    query_parser.add_argument("--min-saturation", type=float, help="minimum mean accent chroma")
+    query_parser.add_argument("--sort", choices=NUMERIC_COLUMNS + STRING_COLUMNS, help="column to sort by")
+    query_parser.add_argument("--desc", action="store_true", help="sort descending")
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--format", choices=["table", "json", "paths"], default="table")
+    query_parser.add_argument("--no-refresh", action="store_true", help="query the index as-is without checking the tree")
+
+    args = parser.parse_args()
+    themes_dir, index_file = Path(args.themes), Path(args.index)
+
+    if args.command == "index":
+        start = time.perf_counter()
+        catalog = ThemeCatalog.load(index_file)
+        stats = catalog.refresh(themes_dir)
+        catalog.save(index_file)
+        print(f"📇 Indexed {len(catalog)} themes ({stats['updated']} updated, {stats['unchanged']} unchanged, "
+              f"{stats['removed']} removed) in {time.perf_counter() - start:.2f}s")
+    elif args.command == "dupes":
+        catalog = load_catalog(themes_dir, index_file)
+        groups = catalog.duplicates()
+        for paths in groups:
+            print("🔁 " + "  ".join(paths))
+        print(f"{len(groups)} group(s) of identical-looking themes among {len(catalog)}")
+    else:
+        catalog = load_catalog(themes_dir, index_file, refresh=not args.no_refresh)
+        sort = f"-{args.sort}" if args.sort and args.desc else args.sort
+        start = time.perf_counter()
+        rows = catalog.query(args.category, args.variant, args.author, args.folder, args.auto_generated,
+                             args.min_contrast, args.lightness, args.hue, args.min_saturation, sort, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if args.format == "paths":
+            print("\n".join(catalog.columns["path"][rows].tolist()))
+        elif args.format == "json":
+            print(json.dumps(catalog.records(rows), indent=2))
+        else:
+            for record in catalog.records(rows):
+                print(f"{record['emoji']} {record['path']:<50} {record['variant']:<5} {record['classification']:<10} L={record['bg_lightness']:.2f} "
+                      f"hue={record['dominant_hue']:5.1f} contrast={record['text_contrast']:5.2f} "
+                      f"sat={record['accent_saturation']:.3f}")
+            print(f"\n🔎 {len(rows)} of {len(catalog)} themes matched in {elapsed_ms:.1f} ms")
@@ -0,0 +1,126 @@
+"""
+Change detection for the themes tree.
+Every file under themes/ is identified by its git blob ID: tracked, unmodified
+files are read from ``git ls-files`` without opening them, and only files git
+reports as modified or untracked are hashed. Without git every file is hashed
+the same way, so IDs are comparable either way. Paths are relative to the
+themes directory, wherever it is and whatever the working directory. Comparing the IDs with a
+stored manifest gives the theme folders that changed since the last run.
+"""
+
+import hashlib
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+MANIFEST_VERSION = 2  # 2: file paths relative to the themes directory
+
+
+def blob_id(data: bytes) -> str:
+    """The git blob ID of ``data`` (what ``git hash-object`` prints)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def run_git(*args: str) -> Optional[bytes]:
+    """Run a git command and return its output, or None if git or the repository is unavailable."""
+    try:
+        return subprocess.run(["git", *args], capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dirty_paths(themes_path: Path) -> Optional[Set[str]]:
+    """Files under ``themes_path`` (relative to it) that differ from HEAD or are untracked, or None without git."""
+    prefix = run_git("-C", themes_path.as_posix(), "rev-parse", "--show-prefix")
+    status = run_git("-C", themes_path.as_posix(), "status", "--porcelain", "-z", "--untracked-files=all", "--", ".")
+    if prefix is None or status is None:
+        return None
+    # Porcelain paths are relative to the repository root, whatever the directory git runs in
+    prefix = prefix.decode("utf-8").strip()
+    paths, records = set(), iter(status.split(b"\0"))
+    for record in records:
+        if not record:
+            continue
+        path = record[3:].decode("utf-8")
+        if record[:1] in (b"R", b"C"):  # renames and copies are followed by their source path
+            paths.add(next(records).decode("utf-8"))
+        paths.add(path)
+    return {path[len(prefix):] for path in paths if path.startswith(prefix)}
+
+
+def hash_tree(themes_path: Path) -> Dict[str, str]:
+    """Blob IDs of every theme folder file, hashing each one."""
+    return {path.relative_to(themes_path).as_posix(): blob_id(path.read_bytes())
+            for path in sorted(themes_path.glob("*/*")) if path.is_file()}
+
+
+def file_ids(themes_path: Path) -> Dict[str, str]:
+    """Blob IDs of every theme folder file (keyed relative to ``themes_path``), from git where possible."""
+    listed = run_git("-C", themes_path.as_posix(), "ls-files", "-s", "-z", "--", ".")
+    dirty = dirty_paths(themes_path) if listed is not None else None
+    if dirty is None:
+        return hash_tree(themes_path)
+
+    ids = {}
+    for record in listed.split(b"\0"):
+        if record:
+            meta, path = record.split(b"\t", 1)
+            ids[path.decode("utf-8")] = meta.split()[1].decode("ascii")
+    for path in dirty:
+        file_path = themes_path / path
+        if file_path.is_file():
+            ids[path] = blob_id(file_path.read_bytes())
+        else:
+            ids.pop(path, None)
+    # Only files directly inside a theme folder, like the glob above
+    return {path: ids[path] for path in sorted(ids) if len(Path(path).parts) == 2}
+
+
+def changed_folders(old: Dict[str, str], new: Dict[str, str]) -> Set[str]:
+    """Names of the theme folders with any file added, removed or changed between two ID maps."""
+    return {Path(path).parent.name for path in set(old) ^ set(new)} | \
+           {Path(path).parent.name for path in set(old) & set(new) if old[path] != new[path]}
+
+
+def last_updated(themes_path: Path = Path("themes")) -> datetime:
+    """When the themes last changed: the last commit touching them, or the newest uncommitted change.
+
+    Stable across runs on the same tree, unlike the time of generation.
+    """
+    dirty = dirty_paths(themes_path)
+    if dirty is None:  # without git every file counts as uncommitted
+        dirty = set(hash_tree(themes_path)) if themes_path.is_dir() else set()
+    timestamp = run_git("-C", themes_path.as_posix(), "log", "-1", "--format=%ct", "--", ".")
+    times = [int(timestamp)] if timestamp and timestamp.strip() else []
+    for path in dirty:
+        # A deleted file shows up in its folder's modification time
+        changed = next((p for p in (themes_path / path, (themes_path / path).parent) if p.exists()), themes_path)
+        times.append(changed.stat().st_mtime)
+    return datetime.fromtimestamp(max(times)) if times else datetime.now()
+
+
+def should_render_preview(json_path: Path, theme: dict, previews: str = "auto") -> bool:
+    """Decide whether a preview should be (re)rendered for a changed theme file.
+
+    In ``auto`` mode hand-made screenshots are never overwritten: only random
+    or auto-generated themes, or themes without a preview yet, are rendered.
+    """
+    if previews == "none":
+        return False
+    if previews == "all":
+        return True
+    return (json_path.parent.name.startswith("random_")
+            or theme.get("metadata", {}).get("auto_generated", False)
+            or not json_path.with_suffix(".png").exists())
+
+
+def load_manifest(manifest_path: Path) -> Dict[str, Any]:
+    """Load a generation manifest; an unreadable or outdated one counts as missing."""
+    try:
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
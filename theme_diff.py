@@ -0,0 +1,315 @@
+"""
+Color-level diff and patch tooling for themes.
+Compares two themes, two theme trees or two packs, reports per-key deltas
+(ΔE in OKLab, scaled x100, plus alpha change), writes minimal patch files and
+applies them in bulk. Trees are loaded into (themes x keys x RGBA) arrays so
+whole snapshots are compared in one vectorized pass.
+
+Usage:
+    python theme_diff.py diff OLD NEW            # .json theme, themes dir or .npz pack
+    python theme_diff.py patch OLD NEW -o fix.json
+    python theme_diff.py apply fix.json --root themes
+    python theme_diff.py pack themes snapshot.npz
+"""
+
+import argparse
+import difflib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from color_utils import delta_e_ok_array
+from theme_io import BatchWriter
+
+CHANNELS = ("r", "g", "b", "a")
+PATCH_FORMAT = "bakkesmod-theme-patch"
+
+
+class ThemeSnapshot:
+    """A set of themes as a dense array: ``values[theme, key] = (r, g, b, a)``.
+
+    Keys a theme does not define are NaN, so missing and obsolete keys show up
+    in diffs instead of being silently treated as black. Values are float32
+    (packs stay small) unless loaded with ``dtype=np.float64``, which keeps the
+    exact channel values patches have to write back.
+    """
+
+    def __init__(self, ids: List[str], keys: List[str], values: np.ndarray):
+        self.ids = list(ids)
+        self.keys = list(keys)
+        self.values = values
+
+    @classmethod
+    def from_themes(cls, themes: Dict[str, Dict[str, Any]], dtype=np.float32) -> "ThemeSnapshot":
+        ids = sorted(themes)
+        keys = sorted({key for theme in themes.values() for key, value in theme.get("imgui", {}).items()
+                       if isinstance(value, dict)})
+        key_index = {key: i for i, key in enumerate(keys)}
+        values = np.full((len(ids), len(keys), 4), np.nan, dtype=dtype)
+        for row, theme_id in enumerate(ids):
+            for key, color in themes[theme_id].get("imgui", {}).items():
+                if isinstance(color, dict):
+                    values[row, key_index[key]] = [color.get(c, np.nan) for c in CHANNELS]
+        return cls(ids, keys, values)
+
+    @classmethod
+    def load(cls, path: Path, dtype=np.float32) -> "ThemeSnapshot":
+        """Load a single theme file, a themes directory or an ``.npz`` pack."""
+        path = Path(path)
+        if path.suffix == ".npz":
+            with np.load(path) as pack:
+                return cls(pack["ids"].tolist(), pack["keys"].tolist(), pack["values"])
+        if path.is_dir():
+            themes = {}
+            for theme_file in sorted(path.glob("*/*.json")):
+                with open(theme_file, 'r') as file:
+                    themes[theme_file.relative_to(path).with_suffix("").as_posix()] = json.load(file)
+            return cls.from_themes(themes, dtype)
+        with open(path, 'r') as file:
+            return cls.from_themes({path.stem: json.load(file)}, dtype)
+
+    def save(self, path: Path) -> None:
+        """Save the snapshot as an ``.npz`` pack."""
+        np.savez_compressed(path, ids=np.array(self.ids), keys=np.array(self.keys), values=self.values)
+
+    def aligned(self, keys: List[str]) -> np.ndarray:
+        """Return values re-indexed onto ``keys`` (NaN where this snapshot lacks a key)."""
+        out = np.full((len(self.ids), len(keys), 4), np.nan, dtype=self.values.dtype)
+        own = {key: i for i, key in enumerate(self.keys)}
+        src = [own[k] for k in keys if k in own]
+        dst = [i for i, k in enumerate(keys) if k in own]
+        out[:, dst] = self.values[:, src]
+        return out
+
+
+def load_pair(old_path: str, new_path: str, dtype=np.float32) -> Tuple[ThemeSnapshot, ThemeSnapshot]:
+    """Load two snapshots; two single theme files are compared to each other regardless of name."""
+    old, new = ThemeSnapshot.load(old_path, dtype), ThemeSnapshot.load(new_path, dtype)
+    if Path(old_path).suffix == Path(new_path).suffix == ".json":
+        old.ids = new.ids
+    return old, new
+
+
+def diff_snapshots(old: ThemeSnapshot, new: ThemeSnapshot, tolerance: float = 1e-6) -> Dict[str, Any]:
+    """Diff two snapshots in one vectorized pass over the common themes."""
+    old_index = {theme_id: i for i, theme_id in enumerate(old.ids)}
+    common = [theme_id for theme_id in new.ids if theme_id in old_index]
+    keys = sorted(set(old.keys) | set(new.keys))
+
+    old_rows = old.aligned(keys)[[old_index[t] for t in common]]
+    new_index = {theme_id: i for i, theme_id in enumerate(new.ids)}
+    new_rows = new.aligned(keys)[[new_index[t] for t in common]]
+
+    old_missing = np.isnan(old_rows).any(axis=2)
+    new_missing = np.isnan(new_rows).any(axis=2)
+    both = ~old_missing & ~new_missing
+    # Rows with a missing key hold NaN, which never compares greater than tolerance
+    changed = both & (np.abs(old_rows - new_rows).max(axis=2, initial=0.0) > tolerance)
+
+    delta_e = np.zeros(changed.shape, dtype=np.float32)
+    delta_e[both] = delta_e_ok_array(new_rows[both][:, :3], old_rows[both][:, :3])
+    delta_alpha = np.where(both, new_rows[..., 3] - old_rows[..., 3], 0.0)
+
+    return {
+        "ids": common,
+        "keys": keys,
+        "old": old_rows,
+        "new": new_rows,
+        "changed": changed,
+        "added_keys": old_missing & ~new_missing,
+        "removed_keys": ~old_missing & new_missing,
+        "delta_e": delta_e,
+        "delta_alpha": delta_alpha,
+        "added_themes": sorted(set(new.ids) - set(old.ids)),
+        "removed_themes": sorted(set(old.ids) - set(new.ids)),
+    }
+
+
+def print_diff(result: Dict[str, Any], threshold: float = 0.0, limit: int = 50) -> None:
+    """Print a per-key delta report for every changed theme."""
+    for theme_id in result["added_themes"]:
+        print(f"➕ {theme_id}")
+    for theme_id in result["removed_themes"]:
+        print(f"➖ {theme_id}")
+
+    touched = result["changed"] | result["added_keys"] | result["removed_keys"]
+    rows = np.flatnonzero(touched.any(axis=1))
+    for row in rows[:limit]:
+        print(f"\n🎨 {result['ids'][row]}")
+        for col in np.flatnonzero(touched[row]):
+            key = result["keys"][col]
+            if result["added_keys"][row, col]:
+                print(f"   + {key}")
+            elif result["removed_keys"][row, col]:
+                print(f"   - {key}")
+            elif result["delta_e"][row, col] >= threshold or abs(result["delta_alpha"][row, col]) > 1e-6:
+                old = " ".join(f"{v:.3f}" for v in result["old"][row, col])
+                new = " ".join(f"{v:.3f}" for v in result["new"][row, col])
+                print(f"   ~ {key:<32} ΔE {result['delta_e'][row, col]:6.2f}  Δa {result['delta_alpha'][row, col]:+.3f}"
+                      f"  [{old}] -> [{new}]")
+    if len(rows) > limit:
+        print(f"\n... and {len(rows) - limit} more changed themes")
+
+    print(f"\n📊 {len(rows)} changed, {len(result['added_themes'])} added, "
+          f"{len(result['removed_themes'])} removed themes; {int(result['changed'].sum())} changed keys")
+
+
+def make_patch(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a minimal patch containing only the keys that differ.
+
+    Channels are written exactly when ``new`` was loaded as float64; float32
+    values (e.g. from a pack) are written as their shortest repr.
+    """
+    exact = result["new"].dtype == np.float64
+    themes = {}
+    touched = result["changed"] | result["added_keys"] | result["removed_keys"]
+    for row in np.flatnonzero(touched.any(axis=1)):
+        entry = {"set": {}, "remove": []}
+        for col in np.flatnonzero(touched[row]):
+            key = result["keys"][col]
+            if result["removed_keys"][row, col]:
+                entry["remove"].append(key)
+            else:
+                # str() of a float32 is its shortest repr, so 0.8 stays 0.8 instead of 0.800000011920929
+                r, g, b, a = (float(v) if exact else float(str(v)) for v in result["new"][row, col])
+                entry["set"][key] = {"a": a, "r": r, "g": g, "b": b}
+        if not entry["remove"]:
+            del entry["remove"]
+        themes[result["ids"][row]] = entry
+    return {"format": PATCH_FORMAT, "version": 1, "themes": themes}
+
+
+def imgui_key_lines(text: str, indent: int) -> List[Optional[str]]:
+    """The imgui key each line of a theme file belongs to (None outside the imgui entries)."""
+    owners, key, in_imgui = [], None, False
+    entry = " " * (2 * indent)
+    for line in text.split("\n"):
+        if line == " " * indent + '"imgui": {':
+            in_imgui = True
+        elif in_imgui and not line.startswith(entry):
+            in_imgui, key = False, None
+        elif in_imgui and line[len(entry):].startswith('"'):
+            key = json.loads(line.strip().split('": ', 1)[0] + '"')
+        owners.append(key if in_imgui else None)
+    return owners
+
+
+def stray_changes(old_text: str, new_text: str, keys: List[str], indent: int) -> int:
+    """Count the lines a rewrite changes outside the entries of ``keys``.
+
+    Commas are ignored, so adding or removing the last entry doesn't count
+    against the entry before it.
+    """
+    old_lines = [line.rstrip(",") for line in old_text.split("\n")]
+    new_lines = [line.rstrip(",") for line in new_text.split("\n")]
+    old_keys, new_keys = imgui_key_lines(old_text, indent), imgui_key_lines(new_text, indent)
+    stray = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+        if tag != "equal":
+            stray += sum(old_keys[i] not in keys for i in range(i1, i2))
+            stray += sum(new_keys[j] not in keys for j in range(j1, j2))
+    return stray
+
+
+def apply_patch(patch: Dict[str, Any], root: Path) -> Tuple[int, List[str], List[str]]:
+    """Apply a patch to the theme files under ``root`` as one atomic batch.
+
+    Theme IDs are paths relative to ``root`` without the ``.json`` suffix (a
+    bare name is matched as ``<name>/<name>``). Files keep their indentation,
+    so only the patched keys' lines change. Returns the number of patched
+    files, the IDs that could not be found and the IDs whose files were also
+    reformatted outside the patched keys. IDs that point outside ``root``
+    reject the whole patch.
+    """
+    if patch.get("format") != PATCH_FORMAT:
+        raise ValueError("not a theme patch file")
+    resolved_root = Path(root).resolve()
+    theme_files = {}
+    for theme_id in patch["themes"]:
+        theme_file = root / f"{theme_id}.json"
+        if not theme_file.exists() and "/" not in theme_id:
+            theme_file = root / theme_id / f"{theme_id}.json"
+        if not theme_file.resolve().is_relative_to(resolved_root):
+            raise ValueError(f"theme ID {theme_id} points outside {root}")
+        theme_files[theme_id] = theme_file
+
+    patched, missing, reformatted = 0, [], []
+    with BatchWriter() as batch:
+        for theme_id, entry in patch["themes"].items():
+            theme_file = theme_files[theme_id]
+            if not theme_file.exists():
+                missing.append(theme_id)
+                continue
+
+            text = theme_file.read_text()
+            theme = json.loads(text)
+            imgui = theme.setdefault("imgui", {})
+            imgui.update(entry.get("set", {}))
+            for key in entry.get("remove", []):
+                imgui.pop(key, None)
+            # Keep the file's indentation and trailing newline (themes use both 2 and 4 spaces)
+            second_line = text.split("\n", 2)[1] if "\n" in text else ""
+            indent = len(second_line) - len(second_line.lstrip(" ")) or 4
+            patched_text = json.dumps(theme, indent=indent) + ("\n" if text.endswith("\n") else "")
+            keys = list(entry.get("set", {})) + entry.get("remove", [])
+            if stray_changes(text, patched_text, keys, indent):
+                reformatted.append(theme_id)
+            batch.write_text(theme_file, patched_text)
+            patched += 1
+    return patched, missing, reformatted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff, patch and pack BakkesMod themes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    diff_parser = commands.add_parser("diff", help="print per-key deltas between OLD and NEW")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("--threshold", type=float, default=0.0, help="hide color changes below this ΔE")
+    diff_parser.add_argument("--limit", type=int, default=50, help="max themes to print")
+
+    patch_parser = commands.add_parser("patch", help="write a minimal patch turning OLD into NEW")
+    patch_parser.add_argument("old")
+    patch_parser.add_argument("new")
+    patch_parser.add_argument("-o", "--output", required=True, help="patch file to write")
+
+    apply_parser = commands.add_parser("apply", help="apply patch files to a themes directory")
+    apply_parser.add_argument("patches", nargs="+")
+    apply_parser.add_argument("--root", default="themes", help="themes directory")
+
+    pack_parser = commands.add_parser("pack", help="save a themes directory as an .npz snapshot")
+    pack_parser.add_argument("source")
+    pack_parser.add_argument("output")
+
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        print_diff(diff_snapshots(*load_pair(args.old, args.new)), args.threshold, args.limit)
+    elif args.command == "patch":
+        patch = make_patch(diff_snapshots(*load_pair(args.old, args.new, np.float64)))
+        with BatchWriter() as batch:
+            batch.write_json(Path(args.output), patch)
+        print(f"✅ Patch for {len(patch['themes'])} theme(s) written to {args.output}")
+    elif args.command == "apply":
+        for patch_path in args.patches:
+            try:
+                with open(patch_path, 'r') as file:
+                    count, not_found, reformatted = apply_patch(json.load(file), Path(args.root))
+            except ValueError as e:
+                print(f"❌ {patch_path}: {e}")
+                sys.exit(1)
+            print(f"✅ {patch_path}: patched {count} theme(s)")
+            for theme_id in not_found:
+                print(f"   ⚠️  {theme_id} not found under {args.root}")
+            for theme_id in reformatted:
+                print(f"   ⚠️  {theme_id}: lines outside the patched keys were reformatted too")
+    elif args.command == "pack":
+        snapshot = ThemeSnapshot.load(Path(args.source))
+        snapshot.save(Path(args.output))
+        print(f"📦 Packed {len(snapshot.ids)} themes x {len(snapshot.keys)} keys into {args.output} "
+              f"({os.path.getsize(args.output) / 1024:.1f} KiB)")
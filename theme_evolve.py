@@ -0,0 +1,349 @@
+"""
+Breed new themes from the curated ones.
+Parents are the hand-made themes in themes/ of the requested variant. Each
+generation makes children by key-group crossover and perceptual (OKLab)
+interpolation, mutates them, scores the whole population in one vectorized
+pass and keeps the fittest. Fitness rewards readable text, accents that stand
+out from the background, visible hover/active states, a background that fits
+the variant, and distance from the parents and from each other.
+
+Usage:
+    python theme_evolve.py evolve --generations 30 --save 3
+    python theme_evolve.py evolve --light --mutation 0.5 --seed 7
+    python theme_evolve.py blend themes/cyber/cyber.json themes/space/space.json --t 0.3 -o blend.json
+    python theme_evolve.py compare --budget 2000     # against randomize_theme at equal cost
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from color_utils import composite_over_array, contrast_ratio_array, oklab_to_srgb_array, srgb_to_oklab_array
+from theme_catalog import ACCENT_KEYS, BACKGROUND_KEY, TEXT_KEY
+from theme_io import BatchWriter, atomic_write_json
+from theme_model import Theme, default_schema
+from theme_randomizer import (PREVIEW_ENCODINGS, RANDOM_AUTHOR, encode_preview, generate_theme_preview, load_theme,
+                              randomize_theme)
+
+# Keys that are recombined together; any other key is grouped with its
+# hovered/active/collapsed/unfocused states (Button, ButtonHovered, ButtonActive, ...)
+KEY_GROUPS = {
+    "background": ("WindowBg", "ChildBg", "PopupBg", "MenuBarBg", "ScrollbarBg", "ModalWindowDimBg",
+                   "NavWindowingDimBg"),
+    "text": ("Text", "TextDisabled", "TextSelectedBg"),
+    "border": ("Border", "BorderShadow", "Separator", "SeparatorHovered", "SeparatorActive"),
+}
+STATE_SUFFIXES = ("UnfocusedActive", "Unfocused", "Hovered", "Active", "Collapsed")
+
+FITNESS_WEIGHTS = {
+    "text_contrast": 0.30,    # text over the window, scaled to WCAG AAA (7:1)
+    "accent_contrast": 0.20,  # accent keys vs the window, ΔE 25 scores full marks
+    "states": 0.15,           # share of hovered/active keys visibly different from their base key
+    "variant": 0.10,          # background lightness fits dark or light
+    "diversity": 0.25,        # mean ΔE per key to the nearest parent or other candidate
+}
+MUTATION_SCALE = np.array([0.06, 0.04, 0.04], dtype=np.float32)  # OKLab L, a, b std at strength 1
+
+
+class BreedingSpace:
+    """Key layout, groups and curated parents for one variant, as arrays."""
+
+    def __init__(self, is_light: bool, themes_path: Path = Path("themes")):
+        self.is_light = is_light
+        self.schema = default_schema()
+        keys = self.schema.keys
+        index = self.schema.index
+
+        group_names = {f"ImGuiCol_{name}": group for group, names in KEY_GROUPS.items() for name in names}
+        groups = []
+        for key in keys:
+            group = group_names.get(key)
+            if group is None:
+                group = key[len("ImGuiCol_"):]
+                for suffix in STATE_SUFFIXES:
+                    if group.endswith(suffix) and len(group) > len(suffix):
+                        group = group[:-len(suffix)]
+                        break
+            groups.append(group)
+        self.group_names = sorted(set(groups))
+        self.group_index = np.array([self.group_names.index(g) for g in groups])
+
+        self.background = index[BACKGROUND_KEY]
+        self.text = index[TEXT_KEY]
+        self.accents = np.array([index[key] for key in ACCENT_KEYS if key in index])
+        self.state_pairs = np.array([(index[key[:-len(s)]], i) for i, key in enumerate(keys)
+                                     for s in ("Hovered", "Active") if key.endswith(s) and key[:-len(s)] in index])
+
+        template_name = "template_light.json" if is_light else "template.json"
+        self.template = Theme.load(Path("defaults/template") / template_name, self.schema).as_array()
+        files = sorted(f for f in themes_path.glob("*/*.json")
+                       if not f.parent.name.startswith("random_") and f.stem.endswith("_light") == is_light)
+        parents = [Theme.load(f, self.schema) for f in files]
+        if len(parents) < 2:
+            raise ValueError(f"need at least two curated {self.variant} themes in {themes_path}")
+        self.parent_names = [theme.metadata.get("name", f.stem) for theme, f in zip(parents, files)]
+        self.parent_sections = [theme.sections for theme in parents]  # style etc., not bred
+        self.parents = to_lab(np.stack([self.fill(theme.as_array()) for theme in parents]))
+        self.parent_features = self.features(self.parents)[1]
+
+    @property
+    def variant(self) -> str:
+        return "light" if self.is_light else "dark"
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Take keys a theme doesn't define from the variant's template."""
+        return np.where(np.isnan(values), self.template, values).astype(np.float32)
+
+    def features(self, lab: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The window color and every key composited over it, as ImGui draws them (sRGB, then OKLab)."""
+        rgba = from_lab(lab)
+        background = composite_over_array(rgba[:, self.background], np.zeros(3, dtype=np.float32))
+        composited = composite_over_array(rgba, background[:, None, :])
+        return background, srgb_to_oklab_array(composited)
+
+
+def to_lab(rgba: np.ndarray) -> np.ndarray:
+    """(..., 4) sRGB + alpha -> (..., 4) OKLab + alpha."""
+    return np.concatenate([srgb_to_oklab_array(rgba[..., :3]), rgba[..., 3:]], axis=-1).astype(np.float32)
+
+
+def from_lab(lab: np.ndarray) -> np.ndarray:
+    """(..., 4) OKLab + alpha -> (..., 4) clamped sRGB + alpha."""
+    return np.concatenate([oklab_to_srgb_array(lab[..., :3]), np.clip(lab[..., 3:], 0.0, 1.0)], axis=-1)
+
+
+def interpolate(a: np.ndarray, b: np.ndarray, t) -> np.ndarray:
+    """Blend themes in OKLab, so halfway looks halfway; ``t`` broadcasts per theme."""
+    return a + (b - a) * np.asarray(t, dtype=np.float32).reshape(-1, *([1] * (a.ndim - 1)))
+
+
+def crossover(a: np.ndarray, b: np.ndarray, group_index: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Take each key group whole from one parent or the other."""
+    from_a = rng.random((len(a), group_index.max() + 1)) < 0.5
+    return np.where(from_a[:, group_index, None], a, b)
+
+
+def mutate(lab: np.ndarray, group_index: np.ndarray, strength: float, rng: np.random.Generator) -> np.ndarray:
+    """Shift each key group in OKLab, plus a smaller per-key jitter; alpha is inherited."""
+    scale = MUTATION_SCALE * strength
+    group_shift = rng.normal(size=(len(lab), group_index.max() + 1, 3)).astype(np.float32) * scale
+    jitter = rng.normal(size=lab[..., :3].shape).astype(np.float32) * scale * 0.25
+    mutated = lab.copy()
+    mutated[..., :3] += group_shift[:, group_index] + jitter
+    mutated[..., 0] = np.clip(mutated[..., 0], 0.0, 1.0)
+    return mutated
+
+
+def evaluate(lab: np.ndarray, space: BreedingSpace) -> Dict[str, np.ndarray]:
+    """Score a population of (themes x keys x 4) OKLab themes; returns each component and the weighted total."""
+    background, features = space.features(lab)
+    background_lab = srgb_to_oklab_array(background)
+    text = oklab_to_srgb_array(features[:, space.text])
+
+    scores = {"text_contrast": np.clip((contrast_ratio_array(text, background) - 1) / 6, 0, 1)}
+    accent_delta = 100 * np.linalg.norm(features[:, space.accents] - background_lab[:, None], axis=-1)
+    scores["accent_contrast"] = np.clip(accent_delta.mean(axis=1) / 25, 0, 1)
+    pairs = space.state_pairs
+    state_delta = 100 * np.linalg.norm(features[:, pairs[:, 0]] - features[:, pairs[:, 1]], axis=-1)
+    scores["states"] = ((state_delta >= 3) & (state_delta <= 30)).mean(axis=1)
+    lightness = background_lab[:, 0]
+    scores["variant"] = np.clip((lightness - 0.6) / 0.15 if space.is_light else (0.5 - lightness) / 0.15, 0, 1)
+
+    # Distance to every parent and every other candidate, averaged over keys
+    others = np.concatenate([space.parent_features, features])
+    distance = 100 * np.linalg.norm(features[:, None] - others[None], axis=-1).mean(axis=2)
+    distance[np.arange(len(lab)), len(space.parent_features) + np.arange(len(lab))] = np.inf
+    scores["diversity"] = np.clip(distance.min(axis=1) / 20, 0, 1)
+
+    scores["fitness"] = sum(FITNESS_WEIGHTS[name] * scores[name] for name in FITNESS_WEIGHTS)
+    return scores
+
+
+def breed(pool: np.ndarray, lineage: np.ndarray, fitness: np.ndarray, count: int, space: BreedingSpace,
+          mutation: float, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Make ``count`` children from ``pool`` by tournament selection, crossover or interpolation, and mutation.
+
+    ``lineage`` holds each theme's share of every curated parent; children inherit the blend.
+    """
+    def tournament() -> np.ndarray:
+        a, b = rng.integers(len(pool), size=(2, count))
+        return np.where(fitness[a] >= fitness[b], a, b)
+
+    first, second = tournament(), tournament()
+    crossed = crossover(pool[first], pool[second], space.group_index, rng)
+    t = rng.uniform(0.2, 0.8, size=count)
+    blended = interpolate(pool[first], pool[second], t)
+    use_crossover = rng.random(count) < 0.5
+    children = np.where(use_crossover[:, None, None], crossed, blended)
+    share = np.where(use_crossover, 0.5, t)[:, None]
+    return mutate(children, space.group_index, mutation, rng), lineage[first] * (1 - share) + lineage[second] * share
+
+
+def evolve(space: BreedingSpace, population_size: int = 64, generations: int = 30, mutation: float = 0.35,
+           seed: int = None, verbose: bool = True) -> Dict[str, Any]:
+    """Run a (mu + lambda) evolution from the curated parents; returns the final population, best first."""
+    rng = np.random.default_rng(seed)
+    parent_lineage = np.eye(len(space.parents), dtype=np.float32)
+    parent_fitness = np.ones(len(space.parents))
+
+    population, lineage = breed(space.parents, parent_lineage, parent_fitness, population_size, space, mutation, rng)
+    scores = evaluate(population, space)
+    evaluations = population_size
+    for generation in range(1, generations + 1):
+        children, child_lineage = breed(population, lineage, scores["fitness"], population_size, space, mutation, rng)
+        combined = np.concatenate([population, children])
+        combined_lineage = np.concatenate([lineage, child_lineage])
+        combined_scores = evaluate(combined, space)
+        evaluations += len(combined)
+        survivors = np.argsort(-combined_scores["fitness"])[:population_size]
+        population, lineage = combined[survivors], combined_lineage[survivors]
+        scores = {name: values[survivors] for name, values in combined_scores.items()}
+        if verbose and (generation % 5 == 0 or generation == generations):
+            print(f"  generation {generation:>3}: best {scores['fitness'][0]:.3f}, "
+                  f"mean {scores['fitness'].mean():.3f}")
+    return {"population": population, "lineage": lineage, "scores": scores, "evaluations": evaluations}
+
+
+def main_parents(space: BreedingSpace, lineage: np.ndarray, count: int = 3) -> List[str]:
+    """Names of the curated parents that contributed most to a theme."""
+    order = np.argsort(-lineage)[:count]
+    return [space.parent_names[i] for i in order if lineage[i] >= 0.1]
+
+
+def theme_from_lab(lab: np.ndarray, space: BreedingSpace, metadata: Dict[str, Any],
+                   sections: Dict[str, Any] = None) -> Dict[str, Any]:
+    return Theme.from_array(np.round(from_lab(lab), 4), metadata, space.schema, sections).to_dict()
+
+
+def save_themes(result: Dict[str, Any], space: BreedingSpace, count: int, themes_path: Path = Path("themes"),
+                encoding: str = "default") -> List[Path]:
+    """Write the ``count`` fittest themes as random theme folders with previews, as one batch."""
+    existing = {p.name for p in themes_path.glob("random_*")}
+    free_ids = [i for i in range(1000, 10000) if f"random_{i}" not in existing]
+    with BatchWriter() as batch:
+        for lab, ancestry, theme_id in zip(result["population"], result["lineage"], random.sample(free_ids, count)):
+            theme = theme_from_lab(lab, space, {
+                "name": f"Random {theme_id}",
+                "author": RANDOM_AUTHOR,
+                "description": f"A {space.variant} theme bred mostly from {', '.join(main_parents(space, ancestry))}",
+                "variant": space.variant,
+            }, space.parent_sections[int(np.argmax(ancestry))])  # style of the main parent
+            stem = f"random_{theme_id}{'_light' if space.is_light else ''}"
+            folder = themes_path / f"random_{theme_id}"
+            batch.write_json(folder / f"{stem}.json", theme)
+            image = generate_theme_preview(theme, is_light=space.is_light)
+            encode_preview(image, batch.stage(folder / f"{stem}.png"), PREVIEW_ENCODINGS[encoding])
+            image.close()
+    return [path for path in batch.committed if path.suffix == ".json"]
+
+
+def random_baseline(space: BreedingSpace, budget: int, batch_size: int = 64) -> Dict[str, Any]:
+    """Score ``budget`` themes from ``randomize_theme`` in batches of ``batch_size``, best first."""
+    template = load_theme(Path("defaults/template") / ("template_light.json" if space.is_light else "template.json"))
+    batches, batch_fitness = [], []
+    for start in range(0, budget, batch_size):
+        samples = [randomize_theme(template, is_light=space.is_light)
+                   for _ in range(min(batch_size, budget - start))]
+        lab = to_lab(np.stack([space.fill(Theme.from_dict(t, space.schema).as_array()) for t in samples]))
+        fitness = evaluate(lab, space)["fitness"]
+        batches.append(lab)
+        batch_fitness.append(fitness)
+    fitness = np.concatenate(batch_fitness)
+    order = np.argsort(-fitness)
+    return {"population": np.concatenate(batches)[order], "fitness": fitness[order]}
+
+
+def compare(space: BreedingSpace, budget: int, population_size: int, mutation: float, seed: int, top: int = 10) -> None:
+    """Evolution vs ``randomize_theme`` with the same number of fitness evaluations."""
+    generations = max(1, (budget - population_size) // (2 * population_size))
+    start = time.perf_counter()
+    evolved = evolve(space, population_size, generations, mutation, seed, verbose=False)
+    evolve_seconds = time.perf_counter() - start
+
+    random.seed(seed)
+    start = time.perf_counter()
+    sampled = random_baseline(space, evolved["evaluations"], population_size)
+    random_seconds = time.perf_counter() - start
+
+    # Rescore both shortlists together so diversity is measured against the same set
+    shortlist = np.concatenate([evolved["population"][:top], sampled["population"][:top]])
+    scores = evaluate(shortlist, space)
+    print(f"{'method':<10} {'evals':>6} {'seconds':>8} {'best':>6} {f'top {top}':>7}  "
+          + " ".join(f"{name[:8]:>8}" for name in FITNESS_WEIGHTS))
+    for name, rows, evaluations, seconds in (("evolve", slice(0, top), evolved["evaluations"], evolve_seconds),
+                                             ("random", slice(top, None), evolved["evaluations"], random_seconds)):
+        fitness = scores["fitness"][rows]
+        print(f"{name:<10} {evaluations:>6} {seconds:>8.2f} {fitness.max():>6.3f} {fitness.mean():>7.3f}  "
+              + " ".join(f"{scores[c][rows].mean():>8.3f}" for c in FITNESS_WEIGHTS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Breed new themes from the curated themes.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_breeding_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--light", action="store_true", help="breed light themes from the light variants")
+        sub.add_argument("--themes", default="themes", help="themes directory")
+        sub.add_argument("--population", type=int, default=64, help="themes kept per generation")
+        sub.add_argument("--mutation", type=float, default=0.35, help="mutation strength (0 disables)")
+        sub.add_argument("--seed", type=int, help="random seed")
+
+    evolve_parser = subparsers.add_parser("evolve", help="evolve a population and show or save the best")
+    add_breeding_args(evolve_parser)
+    evolve_parser.add_argument("--generations", type=int, default=30)
+    evolve_parser.add_argument("--show", type=int, default=5, help="number of top themes to list")
+    evolve_parser.add_argument("--save", type=int, default=0, help="save the N best as random theme folders")
+    evolve_parser.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="default",
+                               help="preview encoding preset")
+
+    blend_parser = subparsers.add_parser("blend", help="interpolate two themes in OKLab")
+    blend_parser.add_argument("first")
+    blend_parser.add_argument("second")
+    blend_parser.add_argument("--t", type=float, default=0.5, help="0 gives the first theme, 1 the second")
+    blend_parser.add_argument("-o", "--output", required=True, help="theme file to write")
+
+    compare_parser = subparsers.add_parser("compare", help="compare against randomize_theme at equal cost")
+    add_breeding_args(compare_parser)
+    compare_parser.add_argument("--budget", type=int, default=2000, help="fitness evaluations per method")
+    args = parser.parse_args()
+
+    if args.command == "blend":
+        first, second = load_theme(args.first), load_theme(args.second)
+        schema = default_schema()
+        values = [to_lab(Theme.from_dict(t, schema).as_array().astype(np.float32)) for t in (first, second)]
+        blended = from_lab(interpolate(values[0][None], values[1][None], args.t)[0])
+        # Keys only one theme defines come out NaN; keep them from whichever theme has them
+        blended = np.where(np.isnan(blended), np.where(np.isnan(values[0]), from_lab(values[1]), from_lab(values[0])),
+                           blended)
+        first_meta, second_meta = first.get("metadata", {}), second.get("metadata", {})
+        metadata = {
+            "name": f"{first_meta.get('name', 'Theme')} × {second_meta.get('name', 'Theme')}",
+            "author": first_meta.get("author", RANDOM_AUTHOR),
+            "description": f"{args.t:.0%} of the way from {Path(args.first).stem} to {Path(args.second).stem}",
+            "variant": first_meta.get("variant", "dark"),
+        }
+        # Style and other sections come from the theme the blend is closer to
+        sections = Theme.from_dict(first if args.t < 0.5 else second, schema).sections
+        atomic_write_json(args.output, Theme.from_array(np.round(blended, 4), metadata, schema, sections).to_dict())
+        print(f"✅ Blended theme saved to {args.output}")
+    elif args.command == "compare":
+        compare(BreedingSpace(args.light, Path(args.themes)), args.budget, args.population, args.mutation, args.seed)
+    else:
+        space = BreedingSpace(args.light, Path(args.themes))
+        print(f"🧬 Breeding {space.variant} themes from {len(space.parents)} parents")
+        start = time.perf_counter()
+        result = evolve(space, args.population, args.generations, args.mutation, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"\n{result['evaluations']} evaluations in {elapsed:.2f}s "
+              f"({result['evaluations'] / elapsed:.0f} themes/s)\n")
+        scores = result["scores"]
+        for rank in range(min(args.show, len(result["population"]))):
+            parts = " ".join(f"{name}={scores[name][rank]:.2f}" for name in FITNESS_WEIGHTS)
+            print(f"{rank + 1:>2}. fitness {scores['fitness'][rank]:.3f}  {parts}  ← {', '.join(main_parents(space, result['lineage'][rank]))}")
+        if args.save:
+            for path in save_themes(result, space, args.save, Path(args.themes), args.encoding):
+                print(f"✅ Saved {path}")
@@ -0,0 +1,215 @@
+"""
+Install themes into a BakkesMod data folder and select one in config.cfg.
+Themes are synced to ``<bakkesmod>/data/themes/themes/<folder>/`` so they load
+with the paths the README uses (``theme_load /themes/cyberpunk/cyberpunk_light``).
+A manifest at the destination records the git blob ID of every installed
+file; a sync compares it with the source IDs (read from git for unmodified
+files) and copies only what changed, so re-syncing the whole collection
+costs a stat per file. The BakkesMod folder is remembered after the first
+run, and any directory can stand in for it.
+
+Usage:
+    python theme_install.py sync --all --bakkesmod "%APPDATA%/bakkesmod/bakkesmod"
+    python theme_install.py sync cyberpunk solarflare --use cyberpunk_light
+    python theme_install.py sync --variant dark --prune --dry-run
+    python theme_install.py use themes/cyber/cyber.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from theme_catalog import INDEX_PATH, load_catalog
+from theme_changes import blob_id, file_ids
+from theme_io import BatchWriter, atomic_write_bytes, atomic_write_json
+
+INSTALL_CONFIG = Path(".install.json")  # remembers the BakkesMod folder between runs
+INSTALL_MANIFEST = ".theme_install.json"
+MANIFEST_VERSION = 1
+THEMES_SUBDIR = Path("data/themes/themes")
+CONFIG_FILE = Path("cfg/config.cfg")
+CONFIG_LINE = re.compile(r'^(\s*bakkesmod_style_theme\s+)(?:"[^"]*"|\S+)(.*)$')
+
+
+def bakkesmod_dir(path: str = None) -> Path:
+    """The BakkesMod folder: ``path`` (remembered for later runs), the remembered one or %APPDATA%'s."""
+    if path:
+        resolved = Path(os.path.expandvars(os.path.expanduser(path))).resolve()
+        if not INSTALL_CONFIG.exists() or json.loads(INSTALL_CONFIG.read_text()).get("bakkesmod") != str(resolved):
+            atomic_write_json(INSTALL_CONFIG, {"bakkesmod": str(resolved)})
+        return resolved
+    if INSTALL_CONFIG.exists():
+        return Path(json.loads(INSTALL_CONFIG.read_text())["bakkesmod"])
+    if os.environ.get("APPDATA"):
+        return Path(os.environ["APPDATA"]) / "bakkesmod" / "bakkesmod"
+    raise ValueError("no BakkesMod folder known; pass --bakkesmod DIR")
+
+
+def select_themes(themes_path: Path, names: List[str] = None, all_themes: bool = False,
+                  variant: str = None, category: str = None) -> List[Path]:
+    """Theme JSON files to install: whole folders or single themes by name, or catalog filters."""
+    if all_themes or variant or category:
+        catalog = load_catalog(themes_path, INDEX_PATH)
+        selected = {Path(path) for path in catalog.columns["path"][catalog.query(category, variant)].tolist()}
+    else:
+        selected = set()
+    for name in names or []:
+        matches = resolve_theme(themes_path, name, folders=True)
+        if not matches:
+            raise ValueError(f"no theme or theme folder named {name}")
+        selected.update(matches)
+    return sorted(selected)
+
+
+def resolve_theme(themes_path: Path, name: str, folders: bool = False) -> List[Path]:
+    """Theme files for a path, a ``folder/theme`` name, a theme name or (with ``folders``) a folder name."""
+    name = name[:-5] if name.endswith(".json") else name
+    if Path(name + ".json").is_file():
+        return [Path(name + ".json")]
+    if (themes_path / (name + ".json")).is_file():
+        return [themes_path / (name + ".json")]
+    if folders and (themes_path / name).is_dir():
+        return sorted((themes_path / name).glob("*.json"))
+    return sorted(themes_path.glob(f"*/{name}.json"))
+
+
+def load_install_manifest(themes_dir: Path) -> Dict[str, str]:
+    """Installed file -> blob ID; an unreadable or outdated manifest means nothing is known to be installed."""
+    try:
+        with open(themes_dir / INSTALL_MANIFEST, 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("files", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def sync_themes(theme_files: List[Path], target: Path, themes_path: Path = Path("themes"), prune: bool = False,
+                verify: bool = False, dry_run: bool = False) -> Dict[str, List[str]]:
+    """Copy every new or changed theme file into ``target``'s themes folder.
+
+    ``verify`` re-hashes installed files to catch edits made at the destination;
+    ``prune`` removes previously installed themes that are no longer selected.
+    Returns the relative paths copied, unchanged and removed.
+    """
+    themes_dir = target / THEMES_SUBDIR
+    installed = load_install_manifest(themes_dir)
+    source_ids = file_ids(themes_path)
+    result = {"copied": [], "unchanged": [], "removed": []}
+
+    wanted = {}
+    for theme_file in theme_files:
+        relative = theme_file.relative_to(themes_path).as_posix()
+        wanted[relative] = source_ids.get(relative) or blob_id(theme_file.read_bytes())
+    for relative, file_id in wanted.items():
+        destination = themes_dir / relative
+        current = installed.get(relative) == file_id and destination.is_file()
+        if current and verify:
+            current = blob_id(destination.read_bytes()) == file_id
+        result["unchanged" if current else "copied"].append(relative)
+    if prune:
+        result["removed"] = sorted(set(installed) - set(wanted))
+    if dry_run:
+        return result
+
+    manifest = {relative: file_id for relative, file_id in installed.items() if relative not in result["removed"]}
+    if result["copied"]:
+        with BatchWriter(target) as batch:
+            for relative in result["copied"]:
+                batch.write_bytes(themes_dir / relative, (themes_path / relative).read_bytes())
+    for relative in result["removed"]:
+        (themes_dir / relative).unlink(missing_ok=True)
+        if (themes_dir / relative).parent.is_dir() and not any((themes_dir / relative).parent.iterdir()):
+            (themes_dir / relative).parent.rmdir()
+    manifest.update((relative, wanted[relative]) for relative in result["copied"])
+    if result["copied"] or result["removed"] or manifest != installed:
+        atomic_write_json(themes_dir / INSTALL_MANIFEST, {"version": MANIFEST_VERSION, "files": dict(sorted(manifest.items()))})
+    return result
+
+
+def set_active_theme(target: Path, theme_path: str) -> bool:
+    """Point ``bakkesmod_style_theme`` in config.cfg at ``theme_path``, in place; returns whether the file changed.
+
+    Line endings, the trailing comment and every other line are kept; the
+    setting is appended if the config does not have it yet.
+    """
+    config_path = target / CONFIG_FILE
+    text = config_path.read_bytes().decode("utf-8") if config_path.exists() else ""
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.split(newline) if text else []
+
+    for i, line in enumerate(lines):
+        match = CONFIG_LINE.match(line)
+        if match:
+            lines[i] = f'{match.group(1)}"{theme_path}"{match.group(2)}'
+            break
+    else:
+        if lines and lines[-1] == "":
+            lines.pop()
+        lines += [f'bakkesmod_style_theme "{theme_path}" //Theme to use', ""]
+
+    updated = newline.join(lines)
+    if updated == text:
+        return False
+    atomic_write_bytes(config_path, updated.encode("utf-8"))
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Install themes into BakkesMod and select the active theme.")
+    parser.add_argument("--bakkesmod", help="BakkesMod folder (with data/ and cfg/); remembered for later runs")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="copy new and changed themes to BakkesMod")
+    sync_parser.add_argument("names", nargs="*", help="theme folders, theme names or theme files")
+    sync_parser.add_argument("--all", action="store_true", help="install every theme")
+    sync_parser.add_argument("--variant", choices=["dark", "light"], help="install every theme of a variant")
+    sync_parser.add_argument("--category", help="install every theme of a category")
+    sync_parser.add_argument("--prune", action="store_true", help="remove installed themes that are not selected")
+    sync_parser.add_argument("--verify", action="store_true", help="re-hash installed files instead of trusting the manifest")
+    sync_parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    sync_parser.add_argument("--use", metavar="THEME", help="also make this theme the active one")
+
+    use_parser = commands.add_parser("use", help="install one theme and make it the active one")
+    use_parser.add_argument("theme", help="theme name, folder/theme or theme file")
+
+    args = parser.parse_args()
+    themes_dir = Path(args.themes)
+    try:
+        target = bakkesmod_dir(args.bakkesmod)
+        active = args.theme if args.command == "use" else args.use
+        active_files = resolve_theme(themes_dir, active) if active else []
+        if active and len(active_files) != 1:
+            raise ValueError(f"{active} matches {len(active_files)} themes; use folder/theme")
+
+        start = time.perf_counter()
+        if args.command == "sync":
+            theme_files = select_themes(themes_dir, args.names, args.all, args.variant, args.category)
+            if not theme_files and not args.prune:
+                raise ValueError("nothing selected; name themes or use --all, --variant or --category")
+        else:
+            theme_files = active_files
+        theme_files = sorted(set(theme_files) | set(active_files))
+        result = sync_themes(theme_files, target, themes_dir, prune=getattr(args, "prune", False),
+                             verify=getattr(args, "verify", False), dry_run=getattr(args, "dry_run", False))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    action = "Would copy" if getattr(args, "dry_run", False) else "Copied"
+    for relative in result["copied"]:
+        print(f"   📄 {relative}")
+    for relative in result["removed"]:
+        print(f"   🗑️  {relative}")
+    print(f"✅ {action} {len(result['copied'])}, {len(result['unchanged'])} unchanged, {len(result['removed'])} removed "
+          f"in {target / THEMES_SUBDIR} ({time.perf_counter() - start:.2f}s)")
+
+    if active_files and not getattr(args, "dry_run", False):
+        theme_path = (Path("themes") / active_files[0].relative_to(themes_dir)).as_posix()
+        changed = set_active_theme(target, theme_path)
+        print(f"🎨 {'Set' if changed else 'Already using'} {theme_path} in {target / CONFIG_FILE}")
@@ -0,0 +1,264 @@
+"""
+Crash-safe file writes for theme tools.
+Single files are written to a temp file and atomically renamed into place.
+Batches (theme JSONs, previews, README) are staged under .staging/, flushed to
+disk once and then committed with atomic renames; a journal lets an
+interrupted commit be resumed on the next run.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, TextIO, Tuple
+
+STAGING_DIR = ".staging"
+JOURNAL_NAME = "journal.json"
+OWNER_NAME = "owner.pid"
+# Batches this process is still writing; recovery must not touch them even
+# though their owner pid is our own
+_open_batches = set()
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, 'rb') as file:
+        os.fsync(file.fileno())
+
+
+def sync_paths(paths: List[Path]) -> None:
+    """Flush written files to disk: one ``sync()`` where available, else fsync each file."""
+    if hasattr(os, "sync"):
+        os.sync()
+    else:
+        for path in paths:
+            _fsync_file(path)
+
+
+def atomic_write_bytes(file_path, data: bytes) -> None:
+    """Write ``data`` to a temp file next to ``file_path``, fsync it and rename it into place."""
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_writer(file_path, encoding: str = 'utf-8') -> Iterator[TextIO]:
+    """Stream text into a temp file that replaces ``file_path`` only if the block succeeds.
+
+    For outputs too large to build as one string first.
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(file_path, text: str, encoding: str = 'utf-8') -> None:
+    """Atomically replace a text file."""
+    atomic_write_bytes(file_path, text.encode(encoding))
+
+
+def atomic_write_json(file_path, data: Any, indent: int = 4) -> None:
+    """Atomically replace a JSON file."""
+    atomic_write_text(file_path, json.dumps(data, indent=indent))
+
+
+class BatchWriter:
+    """Stage all outputs of a batch and commit them together.
+
+    Use as a context manager: files are committed when the block exits
+    normally and discarded if it raises, so a failed or interrupted batch never
+    leaves a theme JSON without its preview or a truncated file behind.
+
+        with BatchWriter() as batch:
+            batch.write_json(Path("themes/x/x.json"), theme)
+            image.save(batch.stage(Path("themes/x/x.png")))
+    """
+
+    def __init__(self, root: Path = Path(".")):
+        self.root = Path(root)
+        self.batch_dir = self.root / STAGING_DIR / uuid.uuid4().hex
+        self.entries: List[Tuple[Path, Path]] = []
+        self.committed: List[Path] = []
+
+    def stage(self, target: Path) -> Path:
+        """Return a staging path to write ``target`` to.
+
+        Each target gets its own staging folder and everything written into it
+        is moved into the target's folder on commit, so writers that change the
+        file extension (e.g. PNG -> WebP) still commit correctly.
+        """
+        if not self.entries:
+            self.batch_dir.mkdir(parents=True)
+            _open_batches.add(self.batch_dir.name)
+            (self.batch_dir / OWNER_NAME).write_text(str(os.getpid()))
+        entry_dir = self.batch_dir / str(len(self.entries))
+        entry_dir.mkdir()
+        self.entries.append((entry_dir, Path(target).parent))
+        return entry_dir / Path(target).name
+
+    def write_bytes(self, target: Path, data: bytes) -> None:
+        with open(self.stage(target), 'wb') as file:
+            file.write(data)
+
+    def write_text(self, target: Path, text: str, encoding: str = 'utf-8') -> None:
+        self.write_bytes(target, text.encode(encoding))
+
+    def write_json(self, target: Path, data: Any, indent: int = 4) -> None:
+        self.write_text(target, json.dumps(data, indent=indent))
+
+    def commit(self) -> List[Path]:
+        """Flush the batch to disk, journal it and rename every file into place.
+
+        The cost is a fixed number of syncs per batch, however many files it has.
+        """
+        if not self.entries:
+            self.abort()
+            return []
+
+        # Staged data must be on disk before the journal that makes it replayable
+        sync_paths([path for entry_dir, _ in self.entries for path in entry_dir.iterdir()])
+        journal = {"entries": [[str(entry_dir.resolve()), str(target_dir.resolve())]
+                               for entry_dir, target_dir in self.entries]}
+        with open(self.batch_dir / JOURNAL_NAME, 'w') as file:
+            json.dump(journal, file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        try:
+            self.committed = _apply_entries(self.entries)
+            sync_paths(self.committed)
+            shutil.rmtree(self.batch_dir, ignore_errors=True)
+            _remove_if_empty(self.batch_dir.parent)
+        finally:
+            # Journaled now, so a failed commit is safe to replay on the next run
+            _open_batches.discard(self.batch_dir.name)
+        return self.committed
+
+    def abort(self) -> None:
+        """Discard every staged file."""
+        shutil.rmtree(self.batch_dir, ignore_errors=True)
+        _remove_if_empty(self.batch_dir.parent)
+        _open_batches.discard(self.batch_dir.name)
+        self.entries = []
+
+    def __enter__(self) -> "BatchWriter":
+        recover_batches(self.root)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+def _apply_entries(entries: List[Tuple[Path, Path]]) -> List[Path]:
+    """Move staged files into their target folders (idempotent, used for resume too)."""
+    committed = []
+    for entry_dir, target_dir in entries:
+        if not entry_dir.exists():
+            continue
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for staged in entry_dir.iterdir():
+            target = target_dir / staged.name
+            os.replace(staged, target)
+            committed.append(target)
+    return committed
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        # Our own open batches are skipped by name; any other batch with our pid
+        # was left by an earlier process that had the same pid (e.g. in a container)
+        return False
+    if os.name == "nt":
+        # os.kill() would terminate the process on Windows, so query it instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _remove_if_empty(path: Path) -> None:
+    try:
+        path.rmdir()
+    except OSError:
+        pass
+
+
+def recover_batches(root: Path = Path(".")) -> int:
+    """Finish or discard batches left behind by an interrupted run.
+
+    Batches with a journal were fully staged and flushed, so their commit is
+    replayed; batches without one never reached commit and are discarded.
+    Returns the number of files recovered.
+    """
+    staging_root = Path(root) / STAGING_DIR
+    if not staging_root.is_dir():
+        return 0
+
+    recovered = 0
+    for batch_dir in staging_root.iterdir():
+        # Leave batches still being written, here or by other running processes (e.g. parallel shards), alone
+        if batch_dir.name in _open_batches:
+            continue
+        try:
+            if _process_alive(int((batch_dir / OWNER_NAME).read_text())):
+                continue
+        except (OSError, ValueError):
+            pass
+
+        journal_path = batch_dir / JOURNAL_NAME
+        if journal_path.exists():
+            try:
+                with open(journal_path, 'r') as file:
+                    journal = json.load(file)
+                entries = [(Path(entry_dir), Path(target_dir)) for entry_dir, target_dir in journal["entries"]]
+                committed = _apply_entries(entries)
+                sync_paths(committed)
+                recovered += len(committed)
+                print(f"♻️  Resumed interrupted batch {batch_dir.name}: {len(committed)} file(s) committed")
+            except (ValueError, KeyError) as e:
+                print(f"⚠️  Discarding batch {batch_dir.name} with unreadable journal: {e}")
+        else:
+            print(f"🗑️  Discarding incomplete batch {batch_dir.name}")
+        shutil.rmtree(batch_dir, ignore_errors=True)
+
+    _remove_if_empty(staging_root)
+    return recovered
@@ -0,0 +1,195 @@
+"""
+Bring every theme's ImGui keys in line with a target key set.
+Missing and obsolete keys are found from the catalog index without opening
+any theme file. Missing keys are filled from the theme's own colors where
+possible: a renamed key takes the old key's color, a hovered/active key is
+its base key made lighter (darker on light themes), and anything else falls
+back to the template of the theme's variant. Only affected files are
+rewritten, in parallel.
+
+Usage:
+    python theme_migrate.py report                                   # against the template's keys
+    python theme_migrate.py apply --keys ImGuiCol_TabSelected,ImGuiCol_NavCursor
+    python theme_migrate.py apply --target new_keys.txt --drop-obsolete
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from color_utils import oklab_to_srgb, srgb_to_oklab, theme_color
+from theme_catalog import INDEX_PATH, load_catalog
+from theme_io import atomic_write_text
+from theme_randomizer import load_theme
+
+TEMPLATE_DIR = Path("defaults/template")
+
+# New or renamed ImGui keys -> (key to derive from, OKLab lightness shift, alpha scale)
+DERIVED_KEYS = {
+    "ImGuiCol_TabSelected": ("ImGuiCol_TabActive", 0.0, 1.0),
+    "ImGuiCol_TabDimmed": ("ImGuiCol_TabUnfocused", 0.0, 1.0),
+    "ImGuiCol_TabDimmedSelected": ("ImGuiCol_TabUnfocusedActive", 0.0, 1.0),
+    "ImGuiCol_TabSelectedOverline": ("ImGuiCol_HeaderActive", 0.0, 1.0),
+    "ImGuiCol_TabDimmedSelectedOverline": ("ImGuiCol_HeaderActive", 0.0, 0.5),
+    "ImGuiCol_NavCursor": ("ImGuiCol_NavHighlight", 0.0, 1.0),
+    "ImGuiCol_TableHeaderBg": ("ImGuiCol_Header", -0.05, 1.0),
+    "ImGuiCol_TableBorderStrong": ("ImGuiCol_Border", 0.0, 1.0),
+    "ImGuiCol_TableBorderLight": ("ImGuiCol_Border", 0.0, 0.6),
+    "ImGuiCol_TableRowBg": ("ImGuiCol_WindowBg", 0.0, 0.0),
+    "ImGuiCol_TableRowBgAlt": ("ImGuiCol_Text", 0.0, 0.06),
+    "ImGuiCol_TextLink": ("ImGuiCol_HeaderActive", 0.0, 1.0),
+    "ImGuiCol_InputTextCursor": ("ImGuiCol_Text", 0.0, 1.0),
+    "ImGuiCol_DockingPreview": ("ImGuiCol_HeaderActive", 0.0, 0.7),
+    "ImGuiCol_DockingEmptyBg": ("ImGuiCol_WindowBg", 0.05, 1.0),
+    "ImGuiCol_TreeLines": ("ImGuiCol_Border", 0.0, 1.0),
+    "ImGuiCol_DragDropTargetBg": ("ImGuiCol_DragDropTarget", 0.0, 0.2),
+}
+# Lightness shift of a state key relative to its base key (negated on light themes)
+STATE_SHIFTS = {"Hovered": 0.06, "Active": 0.12}
+
+
+def read_target(target: str = None, keys: str = None) -> List[str]:
+    """The target key set: the ImGui keys of a theme file or one key per line of a text file, plus ``keys``."""
+    target_keys = []
+    if target is None or target.endswith(".json"):
+        target_keys = list(load_theme(target or TEMPLATE_DIR / "template.json").get("imgui", {}))
+    else:
+        with open(target, 'r') as file:
+            target_keys = [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    for key in (keys or "").split(","):
+        if key.strip() and key.strip() not in target_keys:
+            target_keys.append(key.strip())
+    return target_keys
+
+
+def shifted(color: Dict[str, float], lightness: float, alpha: float) -> Dict[str, float]:
+    r, g, b, a = theme_color(color)
+    if lightness:
+        lab = srgb_to_oklab((r, g, b))
+        r, g, b = oklab_to_srgb((min(max(lab[0] + lightness, 0.0), 1.0), lab[1], lab[2]))
+    return {"a": round(a * alpha, 4), "r": round(r, 4), "g": round(g, 4), "b": round(b, 4)}
+
+
+def derive_key(key: str, imgui: Dict[str, Any], template: Dict[str, Any], is_light: bool) -> Tuple[Any, str]:
+    """Fill value for a missing key and how it was derived."""
+    if key in DERIVED_KEYS:
+        source, lightness, alpha = DERIVED_KEYS[key]
+        if isinstance(imgui.get(source), dict):
+            return shifted(imgui[source], lightness, alpha), "renamed/related key"
+    for suffix, shift in STATE_SHIFTS.items():
+        base = key[:-len(suffix)]
+        if key.endswith(suffix) and isinstance(imgui.get(base), dict):
+            return shifted(imgui[base], -shift if is_light else shift, 1.0), "base key"
+    if key in template:
+        return template[key], "template"
+    return None, "unresolved"
+
+
+def migrate_file(theme_file: str, missing: List[str], obsolete: List[str], templates: Dict[bool, Dict[str, Any]]) -> Dict[str, Any]:
+    """Add ``missing`` keys to one theme and drop ``obsolete`` ones, keeping its JSON layout."""
+    with open(theme_file, 'r') as file:
+        text = file.read()
+    theme = json.loads(text)
+    imgui = theme.setdefault("imgui", {})
+    is_light = theme.get("metadata", {}).get("variant") == "light" or Path(theme_file).stem.endswith("_light")
+
+    sources, added = {}, []
+    for key in missing:
+        value, source = derive_key(key, imgui, templates[is_light], is_light)
+        sources[key] = source
+        if value is not None:
+            imgui[key] = value
+            added.append(key)
+    for key in obsolete:
+        imgui.pop(key, None)
+    result = {"path": theme_file, "sources": sources, "dropped": obsolete, "written": bool(added or obsolete)}
+    if not result["written"]:
+        return result
+
+    existing = [key for key in imgui if key not in missing]
+    if existing == sorted(existing):
+        theme["imgui"] = dict(sorted(imgui.items()))
+    # Keep the file's indentation (themes use both 2 and 4 spaces)
+    second_line = text.split("\n", 2)[1] if "\n" in text else ""
+    indent = len(second_line) - len(second_line.lstrip(" ")) or 4
+    atomic_write_text(theme_file, json.dumps(theme, indent=indent) + ("\n" if text.endswith("\n") else ""))
+    return result
+
+
+def plan_migration(catalog, target_keys: List[str], drop_obsolete: bool = False) -> List[Tuple[str, List[str], List[str]]]:
+    """``(path, missing keys, keys to drop)`` for every theme that needs changes."""
+    missing, obsolete = catalog.key_coverage(target_keys)
+    paths = catalog.columns["path"].tolist()
+    plan = []
+    for row in np.flatnonzero(missing.any(axis=1) | np.array([bool(drop_obsolete and keys) for keys in obsolete])):
+        plan.append((paths[row], [target_keys[j] for j in np.flatnonzero(missing[row])],
+                     obsolete[row] if drop_obsolete else []))
+    return plan
+
+
+def print_report(catalog, target_keys: List[str]) -> None:
+    missing, obsolete = catalog.key_coverage(target_keys)
+    counts = missing.sum(axis=0)
+    obsolete_counts = Counter(key for keys in obsolete for key in keys)
+    print(f"📋 {len(catalog)} themes against {len(target_keys)} target keys")
+    print(f"   {int(missing.any(axis=1).sum())} themes are missing keys, "
+          f"{sum(bool(keys) for keys in obsolete)} have keys outside the target")
+    for j in np.argsort(-counts, kind="stable"):
+        if counts[j]:
+            print(f"   ➕ {target_keys[j]:<40} missing in {counts[j]}")
+    for key, count in obsolete_counts.most_common():
+        print(f"   ➖ {key:<40} obsolete in {count}")
+
+
+def apply_migration(plan, workers: int = None) -> List[Dict[str, Any]]:
+    """Rewrite the planned files in parallel."""
+    templates = {is_light: load_theme(TEMPLATE_DIR / name).get("imgui", {})
+                 for is_light, name in ((False, "template.json"), (True, "template_light.json"))}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(migrate_file, path, missing, obsolete, templates) for path, missing, obsolete in plan]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report and migrate ImGui key coverage across themes.")
+    parser.add_argument("command", choices=["report", "apply"])
+    parser.add_argument("--target", help="theme JSON or text file (one key per line) with the target keys; "
+                                         "defaults to the template")
+    parser.add_argument("--keys", help="comma-separated keys to add to the target")
+    parser.add_argument("--drop-obsolete", action="store_true", help="remove keys that are not in the target")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parallel file rewrites")
+    args = parser.parse_args()
+
+    catalog = load_catalog(Path(args.themes), INDEX_PATH)
+    target = read_target(args.target, args.keys)
+    if args.command == "report":
+        print_report(catalog, target)
+    else:
+        plan = plan_migration(catalog, target, args.drop_obsolete)
+        if not plan:
+            print(f"✅ All {len(catalog)} themes already match the {len(target)} target keys")
+        else:
+            start = time.perf_counter()
+            results = apply_migration(plan, args.workers)
+            elapsed = time.perf_counter() - start
+            load_catalog(Path(args.themes), INDEX_PATH)  # re-index the rewritten files
+
+            sources = Counter(source for result in results for source in result["sources"].values()
+                              if source != "unresolved")
+            dropped = sum(len(result["dropped"]) for result in results)
+            written = sum(result["written"] for result in results)
+            print(f"✅ Migrated {written} of {len(catalog)} themes in {elapsed:.2f}s: "
+                  f"{sum(sources.values())} keys added, {dropped} dropped")
+            for source, count in sources.most_common():
+                print(f"   {count:>5} from {source}")
+            unresolved = sorted({key for r in results for key, s in r["sources"].items() if s == "unresolved"})
+            if unresolved:
+                print(f"⚠️  No value for {', '.join(unresolved)}; add them to DERIVED_KEYS or the template")
@@ -0,0 +1,195 @@
+"""
+Compact in-memory theme representation.
+A theme's ImGui colors live in one flat ``array('d')`` of r, g, b, a channels
+laid out by a shared key schema (the color keys of the template, interned and
+loaded once), instead of a dict of ~50 small dicts. Copying a theme copies
+one buffer, and the channels can be viewed as an (N, 4) NumPy array without
+copying.
+
+Usage:
+    python theme_model.py --measure themes    # memory per theme, dict vs Theme
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from array import array
+from copy import deepcopy
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+TEMPLATE_PATH = Path("defaults/template/template.json")
+MISSING = float("nan")
+
+
+class ThemeSchema:
+    """Ordered, interned ImGui color keys shared by many themes."""
+
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(sys.intern(key) for key in keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_theme(cls, theme: Dict[str, Any]) -> "ThemeSchema":
+        return cls(key for key, value in theme.get("imgui", {}).items() if isinstance(value, dict))
+
+
+@lru_cache(maxsize=None)
+def default_schema(template_path: Path = TEMPLATE_PATH) -> ThemeSchema:
+    """The schema of the template theme, loaded once per process."""
+    with open(template_path, 'r') as file:
+        return ThemeSchema.from_theme(json.load(file))
+
+
+class Theme:
+    """A theme backed by a flat channel buffer laid out by a ``ThemeSchema``.
+
+    Keys the theme does not define hold NaN. ImGui entries outside the schema
+    (or that are not colors) are kept verbatim in ``extra``, and top-level
+    sections other than metadata and imgui (``style``) in ``sections``, so a
+    dict round trip loses nothing.
+    """
+
+    __slots__ = ("schema", "channels", "metadata", "extra", "sections")
+
+    def __init__(self, schema: ThemeSchema, channels: array, metadata: Dict[str, Any], extra: Dict[str, Any] = None,
+                 sections: Dict[str, Any] = None):
+        self.schema = schema
+        self.channels = channels
+        self.metadata = metadata
+        self.extra = extra or {}
+        self.sections = sections or {}
+
+    @classmethod
+    def from_dict(cls, theme: Dict[str, Any], schema: ThemeSchema = None) -> "Theme":
+        schema = schema or default_schema()
+        channels = array('d', [MISSING]) * (len(schema) * 4)
+        extra = {}
+        for key, color in theme.get("imgui", {}).items():
+            row = schema.index.get(key)
+            if row is None or not isinstance(color, dict):
+                extra[key] = color
+                continue
+            base = row * 4
+            channels[base] = color.get("r", 0.0)
+            channels[base + 1] = color.get("g", 0.0)
+            channels[base + 2] = color.get("b", 0.0)
+            channels[base + 3] = color.get("a", 1.0)
+        sections = {name: value for name, value in theme.items() if name not in ("metadata", "imgui")}
+        return cls(schema, channels, dict(theme.get("metadata", {})), extra, sections)
+
+    @classmethod
+    def from_array(cls, values, metadata: Dict[str, Any], schema: ThemeSchema = None,
+                   sections: Dict[str, Any] = None) -> "Theme":
+        """Build a theme from a (keys x 4) array of r, g, b, a channels."""
+        import numpy as np
+        channels = array('d')
+        channels.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        return cls(schema or default_schema(), channels, dict(metadata), sections=dict(sections or {}))
+
+    @classmethod
+    def load(cls, file_path, schema: ThemeSchema = None) -> "Theme":
+        with open(file_path, 'r') as file:
+            return cls.from_dict(json.load(file), schema)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the JSON theme format."""
+        imgui = {}
+        channels = self.channels
+        for row, key in enumerate(self.schema.keys):
+            base = row * 4
+            if channels[base] == channels[base]:  # NaN marks a key this theme doesn't define
+                imgui[key] = {"a": channels[base + 3], "r": channels[base], "g": channels[base + 1], "b": channels[base + 2]}
+        imgui.update(self.extra)
+        return {"metadata": dict(self.metadata), "imgui": imgui, **self.sections}
+
+    def copy(self) -> "Theme":
+        """Copy the theme; the colors are one buffer copy."""
+        return Theme(self.schema, array('d', self.channels), dict(self.metadata), dict(self.extra), dict(self.sections))
+
+    def __contains__(self, key: str) -> bool:
+        row = self.schema.index.get(key)
+        return row is not None and self.channels[row * 4] == self.channels[row * 4]
+
+    def __getitem__(self, key: str) -> Tuple[float, float, float, float]:
+        if key not in self:
+            raise KeyError(key)
+        base = self.schema.index[key] * 4
+        return tuple(self.channels[base:base + 4])
+
+    def __setitem__(self, key: str, rgba: Tuple[float, float, float, float]) -> None:
+        base = self.schema.index[key] * 4
+        self.channels[base:base + 4] = array('d', rgba)
+
+    def keys(self) -> Iterator[str]:
+        return (key for key in self.schema.keys if key in self)
+
+    def as_array(self):
+        """A zero-copy (keys x 4) NumPy view of the channels; edits write through."""
+        import numpy as np
+        return np.frombuffer(self.channels, dtype=np.float64).reshape(len(self.schema), 4)
+
+
+def measure(themes_path: Path, copies: int = 200) -> None:
+    """Compare memory per theme and copy time for dict themes and ``Theme`` objects."""
+    theme_dicts = []
+    for theme_file in sorted(themes_path.glob("*/*.json")):
+        with open(theme_file, 'r') as file:
+            theme_dicts.append(json.load(file))
+    schema = default_schema()
+    count = len(theme_dicts) * copies
+
+    results = {}
+    for name, build, duplicate in (
+        ("dict", lambda theme: json.loads(json.dumps(theme)), None),
+        ("Theme", lambda theme: Theme.from_dict(theme, schema), Theme.copy),
+    ):
+        tracemalloc.start()
+        kept = [build(theme) for _ in range(copies) for theme in theme_dicts]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for theme in kept[:1000]:
+            (duplicate or deepcopy)(theme)
+        copy_us = (time.perf_counter() - start) * 1e6 / min(len(kept), 1000)
+        results[name] = (size / count, copy_us)
+        del kept
+
+    print(f"{'representation':<15} {'bytes/theme':>12} {'copy µs':>9}")
+    for name, (per_theme, copy_us) in results.items():
+        print(f"{name:<15} {per_theme:>12.0f} {copy_us:>9.1f}")
+    print(f"\n📉 {results['dict'][0] / results['Theme'][0]:.1f}x less memory, "
+          f"{results['dict'][1] / results['Theme'][1]:.0f}x faster copies ({count} themes, {len(schema)} keys)")
+
+
+def round_trip_ok(theme: Dict[str, Any], schema: Optional[ThemeSchema] = None) -> bool:
+    """True if converting ``theme`` to a ``Theme`` and back gives an equal dict (metadata and imgui may be absent)."""
+    return Theme.from_dict(theme, schema).to_dict() == {"metadata": {}, "imgui": {}, **theme}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact theme representation tools.")
+    parser.add_argument("--measure", metavar="THEMES", help="report memory per theme for a themes directory")
+    parser.add_argument("--copies", type=int, default=200, help="copies of each theme to hold while measuring")
+    parser.add_argument("--check", metavar="THEMES", help="verify that every theme round-trips through Theme")
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(Path(args.measure), args.copies)
+    elif args.check:
+        failures = [str(f) for f in sorted(Path(args.check).glob("*/*.json"))
+                    if not round_trip_ok(json.loads(f.read_text()))]
+        for failure in failures:
+            print(f"❌ {failure} does not round-trip")
+        print("✅ Round trip OK" if not failures else f"\n{len(failures)} theme(s) failed")
+    else:
+        parser.error("give --measure THEMES or --check THEMES")
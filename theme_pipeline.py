@@ -0,0 +1,249 @@
+"""
+Pipelined batch generation of random themes.
+Generation, JSON writes, preview rendering, image encoding and catalog
+indexing run as concurrent stages connected by bounded queues: rendering runs
+in a process pool while writes and encoding run in a thread pool, and a stage
+that falls behind fills its input queue and blocks the stages feeding it.
+Stage utilization is printed at the end so the limiting stage is visible.
+
+Usage:
+    python theme_pipeline.py --count 200
+    python theme_pipeline.py --count 1000 --workers 8 --queue-size 16 --encoding png-fast
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from generate_readme import peak_rss_mb
+from preview_render import render_layered_preview
+from theme_canonical import canonical_theme, quantize_theme
+from theme_catalog import INDEX_PATH, ThemeCatalog
+from theme_io import BatchWriter
+from theme_randomizer import (DEFAULT_PROFILE, PREVIEW_ENCODINGS, encode_preview, generate_theme_preview,
+                              load_profile, load_theme, randomize_theme)
+
+DONE = object()
+INDEX_CHUNK = 512
+
+
+class Stage:
+    """One pipeline stage: a function run by ``concurrency`` workers on an executor."""
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 executor: Optional[Executor], concurrency: int):
+        self.name = name
+        self.fn = fn
+        self.executor = executor
+        self.concurrency = concurrency
+        self.items = 0
+        self.busy = 0.0     # seconds spent working, summed over workers
+        self.blocked = 0.0  # seconds spent waiting for room in the next queue
+
+    def utilization(self, elapsed: float) -> float:
+        return self.busy / (elapsed * self.concurrency) if elapsed else 0.0
+
+
+async def run_stage(stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]) -> None:
+    """Process items from ``inbox`` until it is drained, passing results to ``outbox``."""
+    loop = asyncio.get_running_loop()
+
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is DONE:
+                return
+            start = time.perf_counter()
+            result = await loop.run_in_executor(stage.executor, stage.fn, item)
+            stage.busy += time.perf_counter() - start
+            stage.items += 1
+            if outbox is not None:
+                start = time.perf_counter()
+                await outbox.put(result)
+                stage.blocked += time.perf_counter() - start
+
+    await asyncio.gather(*(worker() for _ in range(stage.concurrency)))
+
+
+async def run_pipeline(items: Iterable[Dict[str, Any]], stages: List[Stage], queue_size: int) -> None:
+    """Push ``items`` through ``stages`` with a bounded queue in front of every stage.
+
+    ``items`` is consumed lazily, so only the items in flight are held in memory.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def feed() -> None:
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(DONE)
+
+    async def drive(index: int) -> None:
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        await run_stage(stages[index], queues[index], outbox)
+        # Every worker of this stage has finished, so the next stage can drain and stop
+        if outbox is not None:
+            for _ in range(stages[index + 1].concurrency):
+                await outbox.put(DONE)
+
+    await asyncio.gather(feed(), *(drive(i) for i in range(len(stages))))
+
+
+# Stage functions take and return one work item (a dict per theme variant)
+
+def make_generate_item(templates: Dict[bool, Dict[str, Any]], profile: Dict[str, Any] = DEFAULT_PROFILE,
+                       quantize: bool = False) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def generate_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        item["theme"] = randomize_theme(templates[item["is_light"]], is_light=item["is_light"], theme_id=item["theme_id"],
+                                        profile=profile)
+        if quantize:
+            item["theme"] = canonical_theme(quantize_theme(item["theme"]))
+        return item
+    return generate_item
+
+
+def write_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    with open(item["json_stage"], 'w') as file:
+        json.dump(item["theme"], file, indent=4)
+    return item
+
+
+def render_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a preview in a worker process; the item comes back with its image."""
+    if item["layout"]:
+        item["image"] = render_layered_preview(item["theme"], is_light=item["is_light"],
+                                               deterministic=item["deterministic"], layout=item["layout"])
+    else:
+        item["image"] = generate_theme_preview(item["theme"], is_light=item["is_light"],
+                                               deterministic=item["deterministic"])
+    return item
+
+
+def make_encode_item(encoding: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def encode_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        encode_preview(item.pop("image"), item["png_stage"], encoding)  # release the image right away
+        return item
+    return encode_item
+
+
+def generate_batch(count: int, themes_path: Path = Path("themes"), light: bool = True, workers: int = None,
+                   queue_size: int = 8, encoding: str = "default", deterministic: bool = False,
+                   index: bool = True, id_range: range = range(1000, 10000),
+                   profile: Dict[str, Any] = DEFAULT_PROFILE, quantize: bool = False,
+                   layout: str = None, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """Generate ``count`` random themes (plus light variants) through the pipeline and commit them as one batch.
+
+    Theme IDs are drawn from ``id_range``, skipping IDs already in ``themes_path`` and the folder
+    names in ``exclude`` (e.g. the main tree, when generating elsewhere). Previews use the
+    layered renderer with ``layout`` if one is given, the flat renderer otherwise.
+    """
+    existing = {p.name for p in themes_path.glob("random_*")} | set(exclude)
+    free_ids = [i for i in id_range if f"random_{i}" not in existing]
+    if count > len(free_ids):
+        raise ValueError(f"only {len(free_ids)} random theme IDs are still free")
+    workers = workers or os.cpu_count() or 1
+
+    batch = BatchWriter()
+    variants = (False, True) if light else (False,)
+
+    def work_items() -> Iterator[Dict[str, Any]]:
+        for theme_id in random.sample(free_ids, count):
+            for is_light in variants:
+                stem = f"random_{theme_id}{'_light' if is_light else ''}"
+                folder = themes_path / f"random_{theme_id}"
+                yield {
+                    "theme_id": theme_id, "is_light": is_light, "deterministic": deterministic, "layout": layout,
+                    "json_path": folder / f"{stem}.json",
+                    "json_stage": batch.stage(folder / f"{stem}.json"),
+                    "png_stage": batch.stage(folder / f"{stem}.png"),
+                }
+
+    catalog = ThemeCatalog.load(INDEX_PATH) if index else None
+    pending = []
+
+    def index_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        # Index in chunks so the themes don't all stay in memory until the end
+        pending.append((item["json_path"], item.pop("theme"), os.stat(item["json_stage"])))
+        if len(pending) >= INDEX_CHUNK:
+            catalog.add_themes(pending)
+            pending.clear()
+        return {}
+
+    templates = {is_light: load_theme(Path("defaults/template") / name)
+                 for is_light, name in ((False, "template.json"), (True, "template_light.json"))}
+    encoders = max(1, workers // 2)
+    render_pool = ProcessPoolExecutor(max_workers=workers)
+    io_pool = ThreadPoolExecutor(max_workers=encoders + 3)
+
+    stages = [
+        Stage("generate", make_generate_item(templates, profile, quantize), io_pool, 1),
+        Stage("write json", write_item, io_pool, 1),
+        Stage("render", render_item, render_pool, workers),
+        Stage("encode", make_encode_item(PREVIEW_ENCODINGS[encoding]), io_pool, encoders),
+    ]
+    if index:
+        stages.append(Stage("index", index_item, io_pool, 1))
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(run_pipeline(work_items(), stages, queue_size))
+        batch.commit()
+    except BaseException:
+        batch.abort()
+        raise
+    finally:
+        render_pool.shutdown(cancel_futures=True)
+        io_pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    if catalog is not None:
+        catalog.add_themes(pending)
+        catalog.save(INDEX_PATH)
+
+    print(f"{'stage':<12} {'workers':>7} {'items':>6} {'busy s':>8} {'util':>6} {'blocked s':>10}")
+    for stage in stages:
+        print(f"{stage.name:<12} {stage.concurrency:>7} {stage.items:>6} {stage.busy:>8.2f} "
+              f"{stage.utilization(elapsed):>6.0%} {stage.blocked:>10.2f}")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS (main process): {peak:.1f} MiB")
+    bottleneck = max(stages, key=lambda s: s.utilization(elapsed))
+    total = count * len(variants)
+    print(f"\n✅ {count} themes ({total} files + previews) in {elapsed:.2f}s "
+          f"({total / elapsed:.1f} variants/s); busiest stage: {bottleneck.name}")
+    return {"elapsed": elapsed, "stages": {s.name: s.utilization(elapsed) for s in stages}}
+
+
+def parse_id_range(value: str) -> range:
+    """Parse an inclusive ``LOW-HIGH`` theme ID range."""
+    low, high = (int(part) for part in value.split("-"))
+    return range(low, high + 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate many random themes with a pipelined executor.")
+    parser.add_argument("--count", type=int, default=10, help="number of themes to generate")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--no-light", action="store_true", help="only generate dark variants")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="render worker processes")
+    parser.add_argument("--queue-size", type=int, default=8, help="max items waiting in front of each stage")
+    parser.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="default",
+                        help="preview encoding preset")
+    parser.add_argument("--deterministic", action="store_true", help="deterministic previews (bundled font, no popup)")
+    parser.add_argument("--no-index", action="store_true", help="skip updating the catalog index")
+    parser.add_argument("--id-range", type=parse_id_range, default=range(1000, 10000), metavar="LOW-HIGH",
+                        help="theme IDs to draw from (inclusive)")
+    parser.add_argument("--profile", help="randomizer profile JSON (see theme_stats.py)")
+    parser.add_argument("--quantize", action="store_true", help="save channels quantized to 8 bits, in canonical order")
+    parser.add_argument("--layout", help="render previews from this layout spec (e.g. bakkesmod) with the layered renderer")
+    args = parser.parse_args()
+
+    generate_batch(args.count, Path(args.themes), not args.no_light, args.workers, args.queue_size,
+                   args.encoding, args.deterministic, not args.no_index, args.id_range, load_profile(args.profile),
+                   args.quantize, args.layout)
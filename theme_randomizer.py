@@ -4,12 +4,20 @@ Create a random theme shuffling every value from the template theme.
 
 import random
 from typing import Any, Dict
-from copy import deepcopy
 from pathlib import Path
 import json
 from PIL import Image, ImageDraw, ImageFont
+import argparse
 import os
+import time
 
+from color_utils import composite_over, theme_color, to_rgb8
+from theme_canonical import canonical_theme, quantize_theme
+from theme_io import atomic_write_json, BatchWriter
+from theme_style import border_width, default_overlay, randomize_style
+
+
+RANDOM_AUTHOR = "[@borgox](https://github.com/borgox) | [@borghettoo](https://discord.gg/XrqsmAANkC)"
 
 def load_theme(file_path: str) -> Dict[str, Any]:
     """Load a theme from a JSON file."""
@@ -18,89 +26,86 @@ def load_theme(file_path: str) -> Dict[str, Any]:
 
 
 def save_theme(file_path: str, theme: Dict[str, Any]) -> None:
-    """Save a theme to a JSON file."""
-    with open(file_path, 'w') as file:
-        json.dump(theme, file, indent=4)
+    """Save a theme to a JSON file (atomically, never leaves a truncated file)."""
+    atomic_write_json(file_path, theme, indent=4)
+
+# Sampling probabilities and ranges. Each rule draws from ``likely`` with
+# probability ``p`` and from ``rare`` otherwise; a background that misses its
+# ``likely`` range is randomized like any other key instead.
+DEFAULT_PROFILE = {
+    "background_alpha": {"p": 0.95, "likely": [0.85, 1.0], "rare": [0.6, 0.85]},
+    "alpha": {"p": 0.8, "likely": [0.7, 1.0], "rare": [0.0, 0.7]},
+    "dark_color": {"p": 0.99, "likely": [0.0, 0.6], "rare": [0.6, 1.0]},
+    "light_color": {"p": 0.99, "likely": [0.4, 1.0], "rare": [0.0, 0.4]},
+    "dark_background": {"p": 0.995, "likely": [0.0, 0.3]},
+    "light_background": {"p": 0.995, "likely": [0.7, 1.0]},
+}
+BACKGROUND_KEYS = ("ImGuiCol_WindowBg", "ImGuiCol_ChildBg", "ImGuiCol_PopupBg", "ImGuiCol_MenuBarBg")
+
+
+def load_profile(file_path: str = None) -> Dict[str, Dict[str, Any]]:
+    """Load a randomizer profile; rules it leaves out (or fields of a rule) keep their defaults."""
+    profile = {name: dict(rule) for name, rule in DEFAULT_PROFILE.items()}
+    if file_path is None:
+        return profile
+    for name, rule in load_theme(file_path).items():
+        if name not in profile:
+            raise ValueError(f"unknown profile rule {name} in {file_path}")
+        profile[name].update(rule)
+        if not 0.0 <= profile[name]["p"] <= 1.0:
+            raise ValueError(f"{name}.p must be between 0 and 1 in {file_path}")
+        for bounds in (profile[name]["likely"], profile[name].get("rare", [0.0, 1.0])):
+            if len(bounds) != 2 or not 0.0 <= bounds[0] <= bounds[1] <= 1.0:
+                raise ValueError(f"{name} ranges must be [low, high] within 0-1 in {file_path}")
+    return profile
+
 
-def randomize_value(value, is_light: bool = False, component: str = "color", element_key: str = ""):
+def draw(rule: Dict[str, Any]) -> float:
+    """Draw one value from a profile rule."""
+    low, high = rule["likely"] if random.random() < rule["p"] else rule["rare"]
+    return random.uniform(low, high)
+
+
+def randomize_value(value, is_light: bool = False, component: str = "color", element_key: str = "",
+                    profile: Dict[str, Dict[str, Any]] = DEFAULT_PROFILE):
     """Randomize a JSON RGBA value based on variant"""
     if component == "alpha":
-        # Special handling for window/background alpha - keep them mostly opaque
-        if element_key in ["ImGuiCol_WindowBg", "ImGuiCol_ChildBg", "ImGuiCol_PopupBg", "ImGuiCol_MenuBarBg"]:
-            # 95% chance of being mostly opaque (0.85-1.0)
-            if random.random() < 0.95:
-                return random.uniform(0.85, 1.0)
-            else:
-                # 5% chance of being semi-transparent (0.6-0.85)
-                return random.uniform(0.6, 0.85)
-        else:
-            # Other alpha values can be more varied but still bias towards visibility
-            # 80% chance of being mostly opaque (0.7-1.0), 20% chance of being transparent (0.0-0.7)
-            if random.random() < 0.8:
-                return random.uniform(0.7, 1.0)
-            else:
-                return random.uniform(0.0, 0.7)
-    
-    if is_light:
-        # Light variant: favor brighter values (0.4-1.0) with 99% probability
-        if random.random() < 0.99:
-            return random.uniform(0.4, 1.0)
-        else:
-            # 1% chance for darker accent
-            return random.uniform(0.0, 0.4)
-    else:
-        # Dark variant: favor darker values (0.0-0.6) with 99% probability
-        if random.random() < 0.99:
-            return random.uniform(0.0, 0.6)
-        else:
-            # 1% chance for brighter accent
-            return random.uniform(0.6, 1.0)
+        # Window/background alpha stays mostly opaque; other alpha values are
+        # more varied but still biased towards visibility
+        return draw(profile["background_alpha" if element_key in BACKGROUND_KEYS else "alpha"])
+    # Light variants favor brighter values and dark variants darker ones, with rare accents
+    return draw(profile["light_color" if is_light else "dark_color"])
 
-def randomize_super_key(key: Dict[str, Any], is_light: bool = False, element_key: str = "") -> Dict[str, Any]:
+def randomize_super_key(key: Dict[str, Any], is_light: bool = False, element_key: str = "",
+                        profile: Dict[str, Dict[str, Any]] = DEFAULT_PROFILE) -> Dict[str, Any]:
     """Randomize a super key (RGBA values) based on variant."""
     result = {}
     for k, v in key.items():
         component_type = "alpha" if k == "a" else "color"
-        result[k] = randomize_value(v, is_light, component_type, element_key)
+        result[k] = randomize_value(v, is_light, component_type, element_key, profile)
     return result
 
-def randomize_theme(theme: Dict[str, Any], is_light: bool = False, theme_id: int = None) -> Dict[str, Any]:
+def randomize_theme(theme: Dict[str, Any], is_light: bool = False, theme_id: int = None,
+                    profile: Dict[str, Dict[str, Any]] = DEFAULT_PROFILE) -> Dict[str, Any]:
     """Randomize the theme by picking random values for each key based on variant."""
-    randomized_theme = deepcopy(theme.get("imgui", {}))
-    
-    # Special handling for background colors - ensure they stay true to variant
-    background_keys = ["ImGuiCol_WindowBg", "ImGuiCol_ChildBg", "ImGuiCol_PopupBg", "ImGuiCol_MenuBarBg"]
+    randomized_theme = dict(theme.get("imgui", {}))  # every value is replaced below, so no deep copy
+    background = profile["light_background" if is_light else "dark_background"]
     
     for key, value in randomized_theme.items():
         if isinstance(value, dict):
-            if key in background_keys:
-                # Force backgrounds to be more consistent with variant AND opaque
-                if is_light:
-                    # Light backgrounds: very high chance of bright values (0.7-1.0)
-                    if random.random() < 0.995:
-                        randomized_theme[key] = {
-                            "a": randomize_value(value.get("a", 1), is_light, "alpha", key),
-                            "r": random.uniform(0.7, 1.0),
-                            "g": random.uniform(0.7, 1.0),
-                            "b": random.uniform(0.7, 1.0)
-                        }
-                    else:
-                        randomized_theme[key] = randomize_super_key(value, is_light, key)
-                else:
-                    # Dark backgrounds: very high chance of dark values (0.0-0.3)
-                    if random.random() < 0.995:
-                        randomized_theme[key] = {
-                            "a": randomize_value(value.get("a", 1), is_light, "alpha", key),
-                            "r": random.uniform(0.0, 0.3),
-                            "g": random.uniform(0.0, 0.3),
-                            "b": random.uniform(0.0, 0.3)
-                        }
-                    else:
-                        randomized_theme[key] = randomize_super_key(value, is_light, key)
+            # Force backgrounds to be consistent with the variant AND opaque
+            if key in BACKGROUND_KEYS and random.random() < background["p"]:
+                low, high = background["likely"]
+                randomized_theme[key] = {
+                    "a": randomize_value(value.get("a", 1), is_light, "alpha", key, profile),
+                    "r": random.uniform(low, high),
+                    "g": random.uniform(low, high),
+                    "b": random.uniform(low, high)
+                }
             else:
-                randomized_theme[key] = randomize_super_key(value, is_light, key)
+                randomized_theme[key] = randomize_super_key(value, is_light, key, profile)
         else:
-            randomized_theme[key] = randomize_value(value, is_light, "color", key)
+            randomized_theme[key] = randomize_value(value, is_light, "color", key, profile)
     
     # Create metadata for the randomized theme
     if theme_id is None:
@@ -109,12 +114,13 @@ def randomize_theme(theme: Dict[str, Any], is_light: bool = False, theme_id: int
     
     metadata = {
         "name": f"Random {theme_id}",
-        "author": "[@borgox](https://github.com/borgox) | [@borghettoo](https://discord.gg/XrqsmAANkC)",
+        "author": RANDOM_AUTHOR,
         "description": f"A randomly generated {variant} theme with unique color combinations",
         "variant": variant
     }
     
-    return {"metadata": metadata, "imgui": randomized_theme}
+    style = randomize_style(default_overlay().resolve_style(theme))
+    return {"metadata": metadata, "imgui": randomized_theme, "style": style}
 
 def ensure_unique_theme_id(theme_folder: Path) -> int:
     """Ensure the generated theme ID is unique within the themes directory."""
@@ -126,34 +132,135 @@ def ensure_unique_theme_id(theme_folder: Path) -> int:
 
 def rgba_to_rgb(rgba_dict: Dict[str, float], background=(0, 0, 0)) -> tuple:
     """Convert RGBA dict to RGB tuple, applying alpha blending over background."""
-    r, g, b, a = rgba_dict['r'], rgba_dict['g'], rgba_dict['b'], rgba_dict['a']
-    
-    # Alpha blending: result = foreground * alpha + background * (1 - alpha)
-    final_r = int((r * a + background[0] / 255 * (1 - a)) * 255)
-    final_g = int((g * a + background[1] / 255 * (1 - a)) * 255)
-    final_b = int((b * a + background[2] / 255 * (1 - a)) * 255)
-    
-    return (min(255, max(0, final_r)), min(255, max(0, final_g)), min(255, max(0, final_b)))
+    return to_rgb8(composite_over(theme_color(rgba_dict), tuple(c / 255 for c in background)))
 
-def get_default_font():
-    """Get a default font for text rendering."""
+def get_default_font(size: int = 12, deterministic: bool = False):
+    """Get a default font for text rendering.
+
+    In deterministic mode the font bundled with Pillow is used, so renders do
+    not depend on which system fonts a machine has.
+    """
+    if deterministic:
+        return ImageFont.load_default(size)
     try:
         # Try to use a system font
         if os.name == 'nt':  # Windows
-            return ImageFont.truetype("arial.ttf", 12)
+            return ImageFont.truetype("arial.ttf", size)
         else:  # Unix-like systems
-            return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
-    except:
+            return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", size)
+    except OSError:
         # Fallback to default PIL font
         return ImageFont.load_default()
 
-def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output_path: str = None) -> None:
-    """Generate a comprehensive preview image for the theme."""
-    imgui_colors = theme.get('imgui', {})
+def get_title_font(deterministic: bool = False, size: int = 16):
+    """Get the bold title font, falling back to the regular font."""
+    if deterministic:
+        return ImageFont.load_default(size)
+    try:
+        if os.name == 'nt':
+            return ImageFont.truetype("arial.ttf", size)
+        else:
+            return ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return get_default_font()
+
+# Named encoding presets for preview images. Previews are flat UI mock-ups with
+# only a few dozen distinct colors, so palette PNG and lossless WebP shrink them
+# a lot compared to PIL's default RGB PNG.
+PREVIEW_ENCODINGS = {
+    "default": {"format": "png"},
+    "png-max": {"format": "png", "compress_level": 9},
+    "png-fast": {"format": "png", "compress_level": 1},
+    "png-palette": {"format": "png", "quantize": True, "colors": 64, "compress_level": 9},
+    "webp": {"format": "webp", "quality": 90},
+    "webp-lossless": {"format": "webp", "lossless": True},
+    "thumb": {"format": "png", "quantize": True, "colors": 64, "compress_level": 9, "thumbnail": (400, 300)},
+}
+
+
+def parse_size(value: str) -> tuple:
+    """Parse a ``WIDTHxHEIGHT`` size such as ``400x300``."""
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def encode_preview(image: Image.Image, output_path: str, encoding: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Encode a preview image to disk and report encode time and output size.
+
+    ``encoding`` is either a preset from ``PREVIEW_ENCODINGS`` or a dict with the
+    keys ``format`` (png/webp), ``compress_level`` (0-9), ``quantize``/``colors``
+    (palette PNG), ``quality``/``lossless`` (WebP) and ``thumbnail`` (max size).
+    """
+    encoding = dict(encoding or PREVIEW_ENCODINGS["default"])
+    fmt = encoding.get("format", "png").lower()
+    output_path = str(output_path)
+    if fmt == "webp" and output_path.lower().endswith(".png"):
+        output_path = output_path[:-4] + ".webp"
+
+    start = time.perf_counter()
+    if encoding.get("thumbnail"):
+        image = image.copy()
+        image.thumbnail(tuple(encoding["thumbnail"]), Image.LANCZOS)
+
+    if fmt == "png":
+        if encoding.get("quantize"):
+            image = image.quantize(colors=encoding.get("colors", 64), method=Image.FASTOCTREE, dither=Image.NONE)
+        save_kwargs = {}
+        if "compress_level" in encoding:
+            save_kwargs["compress_level"] = encoding["compress_level"]
+        image.save(output_path, "PNG", **save_kwargs)
+    elif fmt == "webp":
+        if encoding.get("lossless"):
+            image.save(output_path, "WEBP", lossless=True, quality=100, method=encoding.get("method", 4))
+        else:
+            image.save(output_path, "WEBP", quality=encoding.get("quality", 90), method=encoding.get("method", 4))
+    else:
+        raise ValueError(f"Unsupported preview format: {fmt}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "path": output_path,
+        "format": fmt,
+        "size": image.size,
+        "bytes": os.path.getsize(output_path),
+        "encode_ms": elapsed_ms,
+    }
+
+
+def compare_preview_encodings(image: Image.Image, output_dir: Path, presets=None) -> list:
+    """Encode one preview with several presets and print a size/time table."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for name in presets or PREVIEW_ENCODINGS:
+        stats = encode_preview(image, output_dir / f"preview_{name}.png", PREVIEW_ENCODINGS[name])
+        stats["preset"] = name
+        results.append(stats)
+
+    print(f"{'preset':<15} {'size':>9} {'bytes':>9} {'encode ms':>10}")
+    for stats in results:
+        size = f"{stats['size'][0]}x{stats['size'][1]}"
+        print(f"{stats['preset']:<15} {size:>9} {stats['bytes']:>9} {stats['encode_ms']:>10.1f}")
+    return results
+
+
+def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output_path: str = None,
+                           encoding: Dict[str, Any] = None, show_popup: bool = None,
+                           deterministic: bool = False) -> Image.Image:
+    """Generate a comprehensive preview image for the theme.
+
+    ``show_popup`` toggles the popup; when left as None it is shown at random
+    (30% of the time) unless ``deterministic`` is set. Deterministic renders
+    use Pillow's bundled font and are byte-identical across machines.
+    """
+    if show_popup is None:
+        show_popup = not deterministic and random.random() < 0.3
+    # Keys and style variables the theme leaves out come from defaults/default.json
+    overlay = default_overlay()
+    imgui_colors = overlay.resolve_colors(theme)
+    style = overlay.resolve_style(theme)
     
     # Get background color for alpha blending
-    window_bg = imgui_colors.get('ImGuiCol_WindowBg', {'r': 0.1, 'g': 0.1, 'b': 0.1, 'a': 1.0})
-    bg_color = rgba_to_rgb(window_bg)
+    bg_color = rgba_to_rgb(imgui_colors['ImGuiCol_WindowBg'])
     
     # Create image (800x600 for detailed preview)
     width, height = 800, 600
@@ -161,25 +268,27 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     draw = ImageDraw.Draw(image)
     
     # Get font
-    font = get_default_font()
-    title_font = get_default_font()
-    
-    try:
-        if os.name == 'nt':
-            title_font = ImageFont.truetype("arial.ttf", 16)
-        else:
-            title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 16)
-    except:
-        title_font = font
+    font = get_default_font(deterministic=deterministic)
+    title_font = get_title_font(deterministic)
     
     # Helper function to get color
-    def get_color(key, fallback=(128, 128, 128)):
-        color_data = imgui_colors.get(key, {'r': 0.5, 'g': 0.5, 'b': 0.5, 'a': 1.0})
-        return rgba_to_rgb(color_data, bg_color)
+    def get_color(key):
+        return rgba_to_rgb(imgui_colors[key], bg_color)
+    
+    # Rectangle with the style's rounding and border size (no outline at size 0)
+    def box(xy, rounding, border=None, fill=None, outline=None, base_width=1):
+        width = border_width(style, border, base_width) if border else 0
+        outline = outline if width else None
+        radius = style[rounding] if rounding else 0
+        if radius > 0:
+            draw.rounded_rectangle(xy, radius=radius, fill=fill, outline=outline, width=width)
+        else:
+            draw.rectangle(xy, fill=fill, outline=outline, width=width)
     
     # Draw main window frame
     frame_color = get_color('ImGuiCol_Border')
-    draw.rectangle([10, 10, width-10, height-10], outline=frame_color, width=2)
+    box([10, 10, width-10, height-10], 'ImGuiStyleVar_WindowRounding', 'ImGuiStyleVar_WindowBorderSize',
+        outline=frame_color, base_width=2)
     
     # Draw title bar
     title_bg = get_color('ImGuiCol_TitleBg')
@@ -208,7 +317,8 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     
     # Left panel (tree/list)
     child_bg = get_color('ImGuiCol_ChildBg')
-    draw.rectangle([20, content_y, 250, height-30], fill=child_bg, outline=frame_color, width=1)
+    box([20, content_y, 250, height-30], 'ImGuiStyleVar_ChildRounding', 'ImGuiStyleVar_ChildBorderSize',
+        fill=child_bg, outline=frame_color)
     
     # Tree nodes
     tree_items = ["🗂️ Game Settings", "  🏎️ Car Physics", "  🎮 Controls", "  📊 Stats", "🗂️ Plugins", "  📈 Training", "  🎨 Themes"]
@@ -219,7 +329,8 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
         y_pos += 20
     
     # Main content panel
-    draw.rectangle([260, content_y, width-20, height-120], fill=child_bg, outline=frame_color, width=1)
+    box([260, content_y, width-20, height-120], 'ImGuiStyleVar_ChildRounding', 'ImGuiStyleVar_ChildBorderSize',
+        fill=child_bg, outline=frame_color)
     
     # Buttons showcase
     button_y = content_y + 20
@@ -232,7 +343,8 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     for i, (color_key, label) in enumerate(button_colors):
         button_color = get_color(color_key)
         button_x = 280 + (i * 140)
-        draw.rectangle([button_x, button_y, button_x + 120, button_y + 30], fill=button_color, outline=frame_color)
+        box([button_x, button_y, button_x + 120, button_y + 30], 'ImGuiStyleVar_FrameRounding',
+            'ImGuiStyleVar_FrameBorderSize', fill=button_color, outline=frame_color)
         
         # Button text
         text_bbox = draw.textbbox([0, 0], label, font=font)
@@ -247,33 +359,37 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     input_bg = get_color('ImGuiCol_FrameBg')
     
     # Text input
-    draw.rectangle([280, input_y, 500, input_y + 25], fill=input_bg, outline=frame_color)
+    box([280, input_y, 500, input_y + 25], 'ImGuiStyleVar_FrameRounding', 'ImGuiStyleVar_FrameBorderSize',
+        fill=input_bg, outline=frame_color)
     draw.text([285, input_y + 5], "Sample text input field...", fill=menu_text_color, font=font)
     
     # Slider
     slider_y = input_y + 40
-    draw.rectangle([280, slider_y, 500, slider_y + 20], fill=input_bg, outline=frame_color)
+    box([280, slider_y, 500, slider_y + 20], 'ImGuiStyleVar_FrameRounding', 'ImGuiStyleVar_FrameBorderSize',
+        fill=input_bg, outline=frame_color)
     
     # Slider handle
     slider_handle_color = get_color('ImGuiCol_SliderGrab')
     handle_pos = 350  # Sample position
-    draw.rectangle([handle_pos-5, slider_y-2, handle_pos+5, slider_y+22], fill=slider_handle_color)
+    box([handle_pos-5, slider_y-2, handle_pos+5, slider_y+22], 'ImGuiStyleVar_GrabRounding', fill=slider_handle_color)
     
     # Checkbox
     check_y = slider_y + 35
     checkbox_bg = get_color('ImGuiCol_CheckMark')
-    draw.rectangle([280, check_y, 295, check_y + 15], fill=input_bg, outline=frame_color)
+    box([280, check_y, 295, check_y + 15], 'ImGuiStyleVar_FrameRounding', 'ImGuiStyleVar_FrameBorderSize',
+        fill=input_bg, outline=frame_color)
     draw.text([285, check_y + 2], "✓", fill=checkbox_bg, font=font)
     draw.text([305, check_y], "Enable advanced settings", fill=title_text_color, font=font)
     
     # Progress bar
     progress_y = check_y + 30
-    draw.rectangle([280, progress_y, 500, progress_y + 15], fill=input_bg, outline=frame_color)
+    box([280, progress_y, 500, progress_y + 15], 'ImGuiStyleVar_FrameRounding', 'ImGuiStyleVar_FrameBorderSize',
+        fill=input_bg, outline=frame_color)
     
     # Progress fill
     progress_color = get_color('ImGuiCol_PlotHistogram')
     progress_width = int(220 * 0.65)  # 65% progress
-    draw.rectangle([280, progress_y, 280 + progress_width, progress_y + 15], fill=progress_color)
+    box([280, progress_y, 280 + progress_width, progress_y + 15], 'ImGuiStyleVar_FrameRounding', fill=progress_color)
     
     # Tabs
     tab_y = progress_y + 35
@@ -287,7 +403,8 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     for color_key, label in tab_colors:
         tab_color = get_color(color_key)
         tab_width = len(label) * 8 + 20
-        draw.rectangle([tab_x, tab_y, tab_x + tab_width, tab_y + 25], fill=tab_color, outline=frame_color)
+        box([tab_x, tab_y, tab_x + tab_width, tab_y + 25], 'ImGuiStyleVar_TabRounding', 'ImGuiStyleVar_FrameBorderSize',
+            fill=tab_color, outline=frame_color)
         
         text_bbox = draw.textbbox([0, 0], label, font=font)
         text_w = text_bbox[2] - text_bbox[0]
@@ -300,12 +417,13 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     draw.text([20, height-20], f"Ready | Theme: {theme_name} | FPS: 144", fill=menu_text_color, font=font)
     
     # Popup/tooltip simulation
-    if random.random() < 0.3:  # 30% chance to show popup
+    if show_popup:
         popup_bg = get_color('ImGuiCol_PopupBg')
         popup_x, popup_y = 400, 200
         popup_w, popup_h = 180, 80
         
-        draw.rectangle([popup_x, popup_y, popup_x + popup_w, popup_y + popup_h], fill=popup_bg, outline=frame_color, width=2)
+        box([popup_x, popup_y, popup_x + popup_w, popup_y + popup_h], 'ImGuiStyleVar_PopupRounding',
+            'ImGuiStyleVar_PopupBorderSize', fill=popup_bg, outline=frame_color, base_width=2)
         draw.text([popup_x + 10, popup_y + 10], "Tooltip/Popup", fill=title_text_color, font=title_font)
         draw.text([popup_x + 10, popup_y + 30], "This shows how popups", fill=menu_text_color, font=font)
         draw.text([popup_x + 10, popup_y + 45], "and tooltips look in", fill=menu_text_color, font=font)
@@ -313,51 +431,68 @@ def generate_theme_preview(theme: Dict[str, Any], is_light: bool = False, output
     
     # Save the image
     if output_path:
-        image.save(output_path)
-        print(f"Theme preview saved to {output_path}")
+        stats = encode_preview(image, output_path, encoding)
+        print(f"Theme preview saved to {stats['path']} ({stats['bytes'] / 1024:.1f} KiB, {stats['encode_ms']:.1f} ms)")
     
     return image
-def main(light_ver = True):
+
+def main(light_ver = True, encoding: str = "default", deterministic: bool = False, profile: Dict[str, Any] = DEFAULT_PROFILE,
+         quantize: bool = False):
     # Generate a unique theme ID
     theme_id = ensure_unique_theme_id(theme_folder=Path("./themes"))
     theme_folder = Path("./themes") / f"random_{theme_id}"
     
-    # Create theme folder if it doesn't exist
-    theme_folder.mkdir(exist_ok=True)
+    variants = [(False, "template.json", "")]
+    if light_ver:
+        variants.append((True, "template_light.json", "_light"))
     
+    # Theme JSONs and previews are staged and committed together, so a failure
+    # or Ctrl-C never leaves a folder with a JSON but no preview
     try:
-        # Generate dark theme
-        template_path = Path("./defaults/template/template.json")
-        output_path = theme_folder / f"random_{theme_id}.json"
-        theme = load_theme(template_path)
-        randomized_theme = randomize_theme(theme, is_light=False, theme_id=theme_id)
-        save_theme(output_path, randomized_theme)
-        print(f"Randomized dark theme saved to {output_path}")
+        with BatchWriter() as batch:
+            for is_light, template_name, suffix in variants:
+                variant = "light" if is_light else "dark"
+                theme = load_theme(Path("./defaults/template") / template_name)
+                randomized_theme = randomize_theme(theme, is_light=is_light, theme_id=theme_id, profile=profile)
+                if quantize:
+                    randomized_theme = canonical_theme(quantize_theme(randomized_theme))
+                output_path = theme_folder / f"random_{theme_id}{suffix}.json"
+                batch.write_json(output_path, randomized_theme)
+                print(f"Randomized {variant} theme staged for {output_path}")
+                
+                preview_path = theme_folder / f"random_{theme_id}{suffix}.png"
+                image = generate_theme_preview(randomized_theme, is_light=is_light, deterministic=deterministic)
+                stats = encode_preview(image, batch.stage(preview_path), PREVIEW_ENCODINGS[encoding])
+                image.close()  # free the pixel buffer now rather than when main returns
+                print(f"Theme preview staged for {preview_path} ({stats['bytes'] / 1024:.1f} KiB, {stats['encode_ms']:.1f} ms)")
         
-        # Generate dark theme preview
-        preview_path = theme_folder / f"random_{theme_id}.png"
-        generate_theme_preview(randomized_theme, is_light=False, output_path=str(preview_path))
-
-        if light_ver:
-            # Generate light theme
-            template_path = Path("./defaults/template/template_light.json")
-            output_path = theme_folder / f"random_{theme_id}_light.json"
-            theme = load_theme(template_path)
-            randomized_theme_light = randomize_theme(theme, is_light=True, theme_id=theme_id)
-            save_theme(output_path, randomized_theme_light)
-            print(f"Randomized light theme saved to {output_path}")
-            
-            # Generate light theme preview
-            preview_path_light = theme_folder / f"random_{theme_id}_light.png"
-            generate_theme_preview(randomized_theme_light, is_light=True, output_path=str(preview_path_light))
-            
+        for path in batch.committed:
+            print(f"✅ Saved {path}")
     except ImportError as e:
         print(f"Warning: Could not generate previews. PIL (Pillow) is not installed.")
         print(f"To enable preview generation, install Pillow: pip install Pillow")
         print(f"Error details: {e}")
     except Exception as e:
-        print(f"Warning: Could not generate previews due to error: {e}")
-        print("Themes were still created successfully.")
+        print(f"❌ Could not generate theme random_{theme_id}: {e}")
+        print("Nothing was written.")
 
 if __name__ == "__main__":
-    main(light_ver=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate a random BakkesMod theme with previews.")
+    parser.add_argument("--no-light", action="store_true", help="only generate the dark variant")
+    parser.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="default",
+                        help="preview encoding preset")
+    parser.add_argument("--compare-encodings", metavar="DIR",
+                        help="render one random preview and write it with every encoding preset into DIR")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="render previews with the bundled font and no random popup")
+    parser.add_argument("--profile", help="randomizer profile JSON overriding DEFAULT_PROFILE")
+    parser.add_argument("--quantize", action="store_true", help="save channels quantized to 8 bits, in canonical order")
+    args = parser.parse_args()
+    profile = load_profile(args.profile)
+
+    if args.compare_encodings:
+        sample = randomize_theme(load_theme("./defaults/template/template.json"), is_light=False, profile=profile)
+        compare_preview_encodings(generate_theme_preview(sample), Path(args.compare_encodings))
+    else:
+        main(light_ver=not args.no_light, encoding=args.encoding, deterministic=args.deterministic, profile=profile,
+             quantize=args.quantize)
\ No newline at end of file
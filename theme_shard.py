@@ -0,0 +1,259 @@
+"""
+Sharded random theme generation for running sweeps on several machines.
+Each shard draws theme IDs from its own slice of the ID range (skipping IDs
+the target tree already has), generates into a private directory and writes a self-contained pack (a zip of theme folders)
+plus a manifest with file and content hashes. ``merge`` checks the packs for
+ID and content collisions with each other and with the main tree, writes
+every theme as one batch and then updates the catalog index and README once.
+
+Usage:
+    python theme_shard.py generate --shard 0 --shards 4 --count 250 --out shards/ --themes themes
+    python theme_shard.py merge shards/*.manifest.json
+    python theme_shard.py local --shards 4 --count 50      # run 4 shard processes here, then merge
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import PIL
+
+from generate_readme import generate_readme
+from theme_canonical import content_hash
+from theme_catalog import INDEX_PATH, load_catalog
+from theme_io import BatchWriter, atomic_write_json
+from theme_pipeline import generate_batch, parse_id_range
+from theme_randomizer import PREVIEW_ENCODINGS
+
+MANIFEST_FORMAT = "bakkesmod-theme-shard"
+MANIFEST_VERSION = 2  # 2: content hashes over 8-bit quantized colors and style
+DEFAULT_ID_RANGE = range(1000, 10000)
+
+
+def shard_id_range(shard: int, shards: int, id_range: range = DEFAULT_ID_RANGE) -> range:
+    """The contiguous slice of ``id_range`` owned by ``shard`` (0-based) of ``shards``."""
+    if not 0 <= shard < shards:
+        raise ValueError(f"shard must be in 0..{shards - 1}")
+    size = len(id_range)
+    return id_range[size * shard // shards:size * (shard + 1) // shards]
+
+
+def shard_name(shard: int, shards: int) -> str:
+    return f"shard-{shard + 1:0{len(str(shards))}d}-of-{shards}"
+
+
+def generate_shard(shard: int, shards: int, count: int, out_dir: Path, id_range: range = DEFAULT_ID_RANGE,
+                   light: bool = True, workers: int = None, encoding: str = "default", seed: int = None,
+                   themes_path: Path = Path("themes")) -> Path:
+    """Generate ``count`` themes for one shard and write its pack and manifest; returns the manifest path.
+
+    IDs already in ``themes_path`` (the tree the shard will be merged into) are skipped.
+    """
+    ids = shard_id_range(shard, shards, id_range)
+    taken = {p.name for p in themes_path.glob("random_*")}
+    if seed is not None:
+        random.seed(seed * shards + shard)
+    name = shard_name(shard, shards)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{name}.", dir=out_dir))
+    try:
+        generate_batch(count, work_dir, light=light, workers=workers, encoding=encoding, index=False, id_range=ids,
+                       exclude=taken)
+
+        entries = []
+        pack_path = out_dir / f"{name}.zip"
+        tmp_pack = pack_path.with_name(pack_path.name + ".tmp")
+        with zipfile.ZipFile(tmp_pack, "w") as pack:
+            for file_path in sorted(work_dir.glob("random_*/*")):
+                relative = file_path.relative_to(work_dir).as_posix()
+                data = file_path.read_bytes()
+                entry = {"path": relative, "sha256": hashlib.sha256(data).hexdigest()}
+                if file_path.suffix == ".json":
+                    entry["content_hash"] = content_hash(json.loads(data))
+                    pack.writestr(relative, data, compress_type=zipfile.ZIP_DEFLATED)
+                else:
+                    pack.writestr(relative, data, compress_type=zipfile.ZIP_STORED)  # PNGs are already compressed
+                entries.append(entry)
+        os.replace(tmp_pack, pack_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "shard": shard,
+        "shards": shards,
+        "id_range": [ids.start, ids.stop - 1],
+        "host": socket.gethostname(),
+        "pillow": PIL.__version__,
+        "pack": pack_path.name,
+        "pack_sha256": hashlib.sha256(pack_path.read_bytes()).hexdigest(),
+        "files": entries,
+    }
+    manifest_path = out_dir / f"{name}.manifest.json"
+    atomic_write_json(manifest_path, manifest)
+    print(f"📦 {name}: {len(entries)} files for IDs {ids.start}-{ids.stop - 1} in {pack_path}")
+    return manifest_path
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    """Load a shard manifest, given either the manifest or its pack."""
+    path = Path(path)
+    if path.suffix == ".zip":
+        path = path.with_name(path.stem + ".manifest.json")
+    with open(path, 'r') as file:
+        manifest = json.load(file)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not a shard manifest")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path} is manifest version {manifest.get('version')}; regenerate the shard")
+    manifest["pack_path"] = path.parent / manifest["pack"]
+    return manifest
+
+
+def folder_id(relative: str) -> str:
+    return relative.split("/", 1)[0]
+
+
+def find_collisions(manifests: List[Dict[str, Any]], themes_path: Path) -> List[Tuple[str, str]]:
+    """Check shards against each other and the tree; returns ``(kind, description)`` for every collision."""
+    collisions = []
+    existing_folders = {p.name for p in themes_path.glob("random_*")}
+    catalog = load_catalog(themes_path, INDEX_PATH)  # content hashes of the tree, without reading unchanged files
+    existing_hashes = {}
+    for path, theme_hash in zip(catalog.columns["path"].tolist(), catalog.columns["content_hash"].tolist()):
+        existing_hashes.setdefault(theme_hash, path)
+
+    folder_owner, hash_owner = {}, dict(existing_hashes)
+    for manifest in manifests:
+        name = shard_name(manifest["shard"], manifest["shards"])
+        for folder in sorted({folder_id(entry["path"]) for entry in manifest["files"]}):
+            if folder in existing_folders:
+                collisions.append(("id", f"{folder} from {name} already exists in {themes_path}"))
+            elif folder in folder_owner:
+                collisions.append(("id", f"{folder} is in both {folder_owner[folder]} and {name}"))
+            folder_owner.setdefault(folder, name)
+        for entry in manifest["files"]:
+            if "content_hash" not in entry:
+                continue
+            owner = hash_owner.setdefault(entry["content_hash"], f"{name}:{entry['path']}")
+            if owner != f"{name}:{entry['path']}":
+                collisions.append(("content", f"{name}:{entry['path']} has the same colors as {owner}"))
+    return collisions
+
+
+def merge_shards(manifest_paths: List[Path], themes_path: Path = Path("themes"), readme: bool = True) -> int:
+    """Verify every pack, check for collisions and commit all shards to the tree as one batch.
+
+    Nothing is written if a pack is damaged or any ID or content hash collides.
+    Returns the number of theme folders merged.
+    """
+    manifests = [load_manifest(path) for path in manifest_paths]
+    for manifest in manifests:
+        if hashlib.sha256(manifest["pack_path"].read_bytes()).hexdigest() != manifest["pack_sha256"]:
+            raise ValueError(f"{manifest['pack_path']} does not match its manifest")
+
+    collisions = find_collisions(manifests, themes_path)
+    if collisions:
+        for kind, description in collisions:
+            print(f"❌ {kind} collision: {description}")
+        raise ValueError(f"{len(collisions)} collision(s); nothing was merged")
+
+    folders = set()
+    with BatchWriter() as batch:
+        for manifest in manifests:
+            with zipfile.ZipFile(manifest["pack_path"]) as pack:
+                for entry in manifest["files"]:
+                    data = pack.read(entry["path"])
+                    if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+                        raise ValueError(f"{entry['path']} in {manifest['pack']} does not match its manifest")
+                    batch.write_bytes(themes_path / entry["path"], data)
+                    folders.add(folder_id(entry["path"]))
+
+    # Index and README are updated once for all shards
+    load_catalog(themes_path, INDEX_PATH)
+    if readme:
+        generate_readme()
+    return len(folders)
+
+
+def run_local(shards: int, count: int, out_dir: Path, id_range: range, light: bool, encoding: str,
+              seed: int = None, themes_path: Path = Path("themes")) -> None:
+    """Run ``shards`` generate processes on this host at once, then merge their packs."""
+    workers = max(1, (os.cpu_count() or 1) // shards)
+    processes = []
+    for shard in range(shards):
+        command = [sys.executable, __file__, "generate", "--shard", str(shard), "--shards", str(shards),
+                   "--count", str(count), "--out", str(out_dir), "--workers", str(workers),
+                   "--id-range", f"{id_range.start}-{id_range.stop - 1}", "--encoding", encoding,
+                   "--themes", str(themes_path)]
+        if not light:
+            command.append("--no-light")
+        if seed is not None:
+            command += ["--seed", str(seed)]
+        processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL))
+
+    failed = [shard for shard, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"shard(s) {', '.join(map(str, failed))} failed; nothing was merged")
+    merged = merge_shards([out_dir / f"{shard_name(shard, shards)}.manifest.json" for shard in range(shards)],
+                          themes_path)
+    print(f"✅ Merged {merged} themes from {shards} shards")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate random themes in shards and merge them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_generation_args(sub: argparse.ArgumentParser) -> None:
+        sub.add_argument("--shards", type=int, required=True, help="total number of shards")
+        sub.add_argument("--count", type=int, default=10, help="themes per shard")
+        sub.add_argument("--out", default="shards", help="directory for packs and manifests")
+        sub.add_argument("--id-range", type=parse_id_range, default=DEFAULT_ID_RANGE, metavar="LOW-HIGH",
+                         help="theme IDs shared out between the shards (inclusive)")
+        sub.add_argument("--no-light", action="store_true", help="only generate dark variants")
+        sub.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="default",
+                         help="preview encoding preset")
+        sub.add_argument("--themes", default="themes", help="themes directory whose IDs the shards must not reuse")
+        sub.add_argument("--seed", type=int, help="base random seed; each shard derives its own")
+
+    generate_parser = commands.add_parser("generate", help="generate one shard")
+    add_generation_args(generate_parser)
+    generate_parser.add_argument("--shard", type=int, required=True, help="this shard's index (0-based)")
+    generate_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="render worker processes")
+
+    merge_parser = commands.add_parser("merge", help="merge shard packs into the themes tree")
+    merge_parser.add_argument("manifests", nargs="+", help="shard manifests or packs")
+    merge_parser.add_argument("--themes", default="themes", help="themes directory")
+    merge_parser.add_argument("--no-readme", action="store_true", help="don't regenerate README.md")
+
+    local_parser = commands.add_parser("local", help="run every shard on this host, then merge")
+    add_generation_args(local_parser)
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    try:
+        if args.command == "generate":
+            generate_shard(args.shard, args.shards, args.count, Path(args.out), args.id_range, not args.no_light,
+                           args.workers, args.encoding, args.seed, Path(args.themes))
+        elif args.command == "merge":
+            merged = merge_shards([Path(path) for path in args.manifests], Path(args.themes), not args.no_readme)
+            print(f"✅ Merged {merged} themes from {len(args.manifests)} shards in {time.perf_counter() - start:.2f}s")
+        else:
+            run_local(args.shards, args.count, Path(args.out), args.id_range, not args.no_light, args.encoding,
+                      args.seed, Path(args.themes))
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
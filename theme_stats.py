@@ -0,0 +1,173 @@
+"""
+Measure what the random theme generator produces under a profile.
+Themes are sampled in one vectorized NumPy pass that follows the same rules
+as ``randomize_theme`` (see ``DEFAULT_PROFILE``), so large samples are cheap.
+The report shows per-key channel histograms, how often a theme breaks
+readability (text against the surfaces it is drawn on) and throughput,
+including readable themes per CPU-second of ``randomize_theme``, the number
+to tune a profile for.
+
+Usage:
+    python theme_stats.py --count 100000
+    python theme_stats.py --count 100000 --variant light --profile my_profile.json --keys Text,WindowBg
+    python theme_stats.py --count 20000 --json stats.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from color_utils import composite_over_array, contrast_ratio_array
+from theme_randomizer import BACKGROUND_KEYS, DEFAULT_PROFILE, load_profile, load_theme, randomize_theme
+
+CHANNELS = "rgba"
+HISTOGRAM_BINS = 10
+SPARK = " ▁▂▃▄▅▆▇█"
+MIN_CONTRAST = 4.5  # WCAG AA for body text
+# Text is checked against every surface it is drawn on in the preview
+READABILITY_SURFACES = ("ImGuiCol_WindowBg", "ImGuiCol_ChildBg", "ImGuiCol_PopupBg", "ImGuiCol_MenuBarBg",
+                        "ImGuiCol_Button", "ImGuiCol_FrameBg")
+SCALAR_SAMPLE = 2000
+
+
+def sample_rule(rule: Dict[str, Any], shape: tuple, rng: np.random.Generator) -> np.ndarray:
+    """Vectorized ``draw``: ``likely`` with probability ``p``, ``rare`` otherwise."""
+    likely = rng.random(shape) < rule["p"]
+    low = np.where(likely, rule["likely"][0], rule["rare"][0])
+    high = np.where(likely, rule["likely"][1], rule["rare"][1])
+    return rng.uniform(low, high)
+
+
+def sample_themes(keys: List[str], count: int, is_light: bool, profile: Dict[str, Any] = DEFAULT_PROFILE,
+                  rng: np.random.Generator = None) -> np.ndarray:
+    """Sample ``count`` random themes as a (count, keys, 4) RGBA array, with ``randomize_theme``'s distribution."""
+    rng = rng or np.random.default_rng()
+    is_background = np.isin(keys, BACKGROUND_KEYS)
+    colors = np.empty((count, len(keys), 4))
+    colors[..., :3] = sample_rule(profile["light_color" if is_light else "dark_color"], (count, len(keys), 3), rng)
+
+    background = profile["light_background" if is_light else "dark_background"]
+    n_backgrounds = int(is_background.sum())
+    forced = rng.random((count, n_backgrounds)) < background["p"]
+    values = rng.uniform(*background["likely"], size=(count, n_backgrounds, 3))
+    colors[:, is_background, :3] = np.where(forced[..., None], values, colors[:, is_background, :3])
+
+    colors[:, ~is_background, 3] = sample_rule(profile["alpha"], (count, int((~is_background).sum())), rng)
+    colors[:, is_background, 3] = sample_rule(profile["background_alpha"], (count, n_backgrounds), rng)
+    return colors
+
+
+def themes_to_array(themes: List[Dict[str, Any]], keys: List[str]) -> np.ndarray:
+    return np.array([[[theme["imgui"][key][c] for c in CHANNELS] for key in keys] for theme in themes])
+
+
+def text_contrast(colors: np.ndarray, keys: List[str]) -> np.ndarray:
+    """Contrast of text on each readability surface, (themes, surfaces), blended like the preview."""
+    index = {key: i for i, key in enumerate(keys)}
+    window = composite_over_array(colors[:, index["ImGuiCol_WindowBg"]], np.zeros(3, dtype=np.float32))
+    surfaces = np.stack([window if key == "ImGuiCol_WindowBg" else composite_over_array(colors[:, index[key]], window)
+                         for key in READABILITY_SURFACES], axis=1)
+    text = composite_over_array(colors[:, None, index["ImGuiCol_Text"]], surfaces)
+    return contrast_ratio_array(text, surfaces)
+
+
+def histograms(colors: np.ndarray, keys: List[str]) -> Dict[str, Dict[str, List[int]]]:
+    """Per-key, per-channel counts in ``HISTOGRAM_BINS`` equal bins over 0-1."""
+    bins = np.minimum((colors * HISTOGRAM_BINS).astype(np.int64), HISTOGRAM_BINS - 1)
+    # One bincount for every (key, channel, bin) at once
+    flat = (np.arange(len(keys) * 4).reshape(len(keys), 4) * HISTOGRAM_BINS + bins).ravel()
+    counts = np.bincount(flat, minlength=len(keys) * 4 * HISTOGRAM_BINS).reshape(len(keys), 4, HISTOGRAM_BINS)
+    return {key: {c: counts[i, j].tolist() for j, c in enumerate(CHANNELS)} for i, key in enumerate(keys)}
+
+
+def sparkline(counts: List[int]) -> str:
+    peak = max(counts) or 1
+    return "".join(SPARK[int(np.ceil(count / peak * (len(SPARK) - 1)))] for count in counts)
+
+
+def collect_stats(count: int, is_light: bool, profile: Dict[str, Any], min_contrast: float = MIN_CONTRAST,
+                  seed: int = None) -> Dict[str, Any]:
+    """Sample ``count`` themes vectorized plus a scalar check sample, and summarize both."""
+    template = load_theme(Path("defaults/template") / ("template_light.json" if is_light else "template.json"))
+    keys = list(template["imgui"])
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    colors = sample_themes(keys, count, is_light, profile, np.random.default_rng(seed))
+    contrast = text_contrast(colors, keys)
+    vector_cpu, vector_wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    # randomize_theme is what generation actually runs; time it and cross-check the readability rate
+    random.seed(seed)
+    scalar_count = min(count, SCALAR_SAMPLE)
+    cpu = time.process_time()
+    scalar_themes = [randomize_theme(template, is_light, theme_id=0, profile=profile) for _ in range(scalar_count)]
+    scalar_cpu = time.process_time() - cpu
+    scalar_contrast = text_contrast(themes_to_array(scalar_themes, keys), keys)
+
+    readable = (contrast >= min_contrast).all(axis=1)
+    readable_rate = float(readable.mean())
+    scalar_rate = float((scalar_contrast >= min_contrast).all(axis=1).mean())
+    return {
+        "variant": "light" if is_light else "dark",
+        "count": count,
+        "min_contrast": min_contrast,
+        "profile": profile,
+        "readable_rate": readable_rate,
+        "scalar_readable_rate": scalar_rate,
+        "surface_fail_rates": dict(zip(READABILITY_SURFACES, (contrast < min_contrast).mean(axis=0).tolist())),
+        "contrast_quantiles": dict(zip(("p10", "p50", "p90"), np.quantile(contrast.min(axis=1), [0.1, 0.5, 0.9]).tolist())),
+        "vectorized_themes_per_s": count / max(vector_wall, 1e-9),
+        "vectorized_cpu_s": vector_cpu,
+        "scalar_themes_per_cpu_s": scalar_count / max(scalar_cpu, 1e-9),
+        "readable_per_cpu_s": readable_rate * scalar_count / max(scalar_cpu, 1e-9),
+        "histograms": histograms(colors, keys),
+    }
+
+
+def print_report(stats: Dict[str, Any], keys: List[str] = None) -> None:
+    print(f"📊 {stats['count']} {stats['variant']} themes, text contrast >= {stats['min_contrast']:g} on "
+          f"{len(READABILITY_SURFACES)} surfaces")
+    print(f"\n{'key':<36} " + " ".join(f"{c:<{HISTOGRAM_BINS}}" for c in CHANNELS))
+    for key, channels in stats["histograms"].items():
+        short = key.replace("ImGuiCol_", "")
+        if keys and short not in keys and key not in keys:
+            continue
+        print(f"{short:<36} " + " ".join(sparkline(channels[c]) for c in CHANNELS))
+
+    print(f"\n📖 Readable: {stats['readable_rate']:.1%} (randomize_theme sample: {stats['scalar_readable_rate']:.1%})")
+    quantiles = stats["contrast_quantiles"]
+    print(f"   worst-surface contrast p10 {quantiles['p10']:.2f}, p50 {quantiles['p50']:.2f}, p90 {quantiles['p90']:.2f}")
+    for surface, rate in sorted(stats["surface_fail_rates"].items(), key=lambda item: -item[1]):
+        print(f"   ❌ {surface.replace('ImGuiCol_', ''):<12} fails in {rate:.1%}")
+    print(f"\n⚡ Vectorized sampling: {stats['vectorized_themes_per_s']:,.0f} themes/s")
+    print(f"   randomize_theme: {stats['scalar_themes_per_cpu_s']:,.0f} themes per CPU-second, "
+          f"{stats['readable_per_cpu_s']:,.0f} readable")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report statistics of randomly generated themes.")
+    parser.add_argument("--count", type=int, default=10000, help="themes to sample")
+    parser.add_argument("--variant", choices=["dark", "light"], default="dark")
+    parser.add_argument("--profile", help="randomizer profile JSON overriding DEFAULT_PROFILE")
+    parser.add_argument("--min-contrast", type=float, default=MIN_CONTRAST, help="text contrast that counts as readable")
+    parser.add_argument("--keys", help="comma-separated keys to show histograms for (default: all)")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--json", metavar="FILE", help="also write the full statistics as JSON")
+    args = parser.parse_args()
+
+    try:
+        profile = load_profile(args.profile)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    stats = collect_stats(args.count, args.variant == "light", profile, args.min_contrast, args.seed)
+    print_report(stats, args.keys.split(",") if args.keys else None)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(stats, file, indent=2)
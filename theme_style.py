@@ -0,0 +1,139 @@
+"""
+ImGui style variables (rounding, padding, border sizes) and theme defaults.
+A theme may carry a ``style`` section next to ``imgui``; anything it leaves
+out, colors included, comes from defaults/default.json. The defaults are
+loaded once into a ``DefaultsOverlay`` and each theme is resolved with one
+dict copy and update per section instead of a fallback lookup per key.
+
+Usage:
+    python theme_style.py validate themes
+"""
+
+import argparse
+import json
+import random
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+DEFAULTS_PATH = Path("defaults/default.json")
+
+# name -> (kind, minimum, maximum); "vec2" values are [x, y] lists
+STYLE_VARS = {
+    "ImGuiStyleVar_Alpha": ("float", 0.1, 1.0),
+    "ImGuiStyleVar_WindowPadding": ("vec2", 0.0, 32.0),
+    "ImGuiStyleVar_WindowRounding": ("float", 0.0, 16.0),
+    "ImGuiStyleVar_WindowBorderSize": ("float", 0.0, 4.0),
+    "ImGuiStyleVar_ChildRounding": ("float", 0.0, 16.0),
+    "ImGuiStyleVar_ChildBorderSize": ("float", 0.0, 4.0),
+    "ImGuiStyleVar_PopupRounding": ("float", 0.0, 16.0),
+    "ImGuiStyleVar_PopupBorderSize": ("float", 0.0, 4.0),
+    "ImGuiStyleVar_FramePadding": ("vec2", 0.0, 20.0),
+    "ImGuiStyleVar_FrameRounding": ("float", 0.0, 12.0),
+    "ImGuiStyleVar_FrameBorderSize": ("float", 0.0, 4.0),
+    "ImGuiStyleVar_ItemSpacing": ("vec2", 0.0, 20.0),
+    "ImGuiStyleVar_ItemInnerSpacing": ("vec2", 0.0, 20.0),
+    "ImGuiStyleVar_IndentSpacing": ("float", 0.0, 40.0),
+    "ImGuiStyleVar_ScrollbarSize": ("float", 1.0, 30.0),
+    "ImGuiStyleVar_ScrollbarRounding": ("float", 0.0, 16.0),
+    "ImGuiStyleVar_GrabMinSize": ("float", 1.0, 30.0),
+    "ImGuiStyleVar_GrabRounding": ("float", 0.0, 12.0),
+    "ImGuiStyleVar_TabRounding": ("float", 0.0, 12.0),
+}
+ROUNDING_VARS = tuple(name for name in STYLE_VARS if name.endswith("Rounding"))
+BORDER_VARS = tuple(name for name in STYLE_VARS if name.endswith("BorderSize"))
+SPACING_VARS = tuple(name for name, (kind, _, _) in STYLE_VARS.items() if kind == "vec2")
+
+
+class DefaultsOverlay:
+    """Default colors and style values, resolved under a theme's own values."""
+
+    __slots__ = ("colors", "style")
+
+    def __init__(self, defaults: Dict[str, Any]):
+        self.colors = dict(defaults.get("imgui", {}))
+        self.style = dict(defaults.get("style", {}))
+
+    def resolve_colors(self, theme: Dict[str, Any]) -> Dict[str, Any]:
+        """Every default ImGui color, overridden by the theme's."""
+        colors = self.colors.copy()
+        colors.update(theme.get("imgui", {}))
+        return colors
+
+    def resolve_style(self, theme: Dict[str, Any]) -> Dict[str, Any]:
+        """Every default style variable, overridden by the theme's."""
+        style = self.style.copy()
+        style.update(theme.get("style", {}))
+        return style
+
+
+@lru_cache(maxsize=None)
+def default_overlay(defaults_path: Path = DEFAULTS_PATH) -> DefaultsOverlay:
+    """The overlay for ``defaults_path``, loaded once per process."""
+    with open(defaults_path, 'r') as file:
+        return DefaultsOverlay(json.load(file))
+
+
+def validate_style(style: Dict[str, Any]) -> List[str]:
+    """Return a message for every unknown, malformed or out-of-range style variable."""
+    errors = []
+    for name, value in style.items():
+        if name not in STYLE_VARS:
+            errors.append(f"unknown style variable {name}")
+            continue
+        kind, low, high = STYLE_VARS[name]
+        components = value if kind == "vec2" else [value]
+        if (kind == "vec2" and (not isinstance(value, list) or len(value) != 2)) or \
+                not all(isinstance(c, (int, float)) and not isinstance(c, bool) for c in components):
+            errors.append(f"{name} must be {'an [x, y] pair of numbers' if kind == 'vec2' else 'a number'}")
+        elif not all(low <= c <= high for c in components):
+            errors.append(f"{name} = {value} is outside {low:g}-{high:g}")
+    return errors
+
+
+def randomize_style(base: Dict[str, Any]) -> Dict[str, Any]:
+    """Randomize ``base`` (a resolved style) with one shared roundness so the widgets look consistent."""
+    style = dict(base)
+    roundness = 0.0 if random.random() < 0.4 else random.uniform(2.0, 8.0)
+    for name in ROUNDING_VARS:
+        high = STYLE_VARS[name][2]
+        style[name] = round(min(high, roundness * random.uniform(0.8, 1.25)), 1)
+    for name in BORDER_VARS:
+        style[name] = 0.0 if random.random() < 0.25 else 1.0
+    for name in SPACING_VARS:
+        _, low, high = STYLE_VARS[name]
+        style[name] = [round(min(high, max(low, c * random.uniform(0.75, 1.5)))) for c in base[name]]
+    return style
+
+
+def border_width(style: Dict[str, Any], name: str, base: int = 1) -> int:
+    """Preview outline width for a border size variable; the defaults (1.0) draw ``base`` pixels."""
+    return round(style[name] * base)
+
+
+def validate_tree(themes_path: Path) -> List[Tuple[Path, str]]:
+    """Validate the style section of every theme under ``themes_path``."""
+    problems = []
+    for theme_file in sorted(themes_path.glob("*/*.json")):
+        with open(theme_file, 'r') as file:
+            theme = json.load(file)
+        if not isinstance(theme.get("style", {}), dict):
+            problems.append((theme_file, "style must be an object"))
+            continue
+        problems.extend((theme_file, error) for error in validate_style(theme.get("style", {})))
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate ImGui style sections of themes.")
+    parser.add_argument("command", choices=["validate"])
+    parser.add_argument("themes", nargs="?", default="themes", help="themes directory")
+    args = parser.parse_args()
+
+    problems = validate_tree(Path(args.themes))
+    for theme_file, error in problems:
+        print(f"❌ {theme_file}: {error}")
+    if problems:
+        sys.exit(1)
+    print("✅ All style sections are valid")
@@ -0,0 +1,284 @@
+"""
+Headless watch mode for theme authors.
+Monitors the themes directory (inotify on Linux, mtime polling elsewhere) and,
+after a short debounce, re-renders only the previews and README section of the
+theme folders that changed.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Set
+
+from generate_readme import build_readme, classify_themes, collect_themes, get_theme_info, render_theme_section
+from theme_catalog import INDEX_PATH, load_catalog
+from theme_changes import should_render_preview
+from theme_io import atomic_write_text
+from theme_randomizer import generate_theme_preview, load_theme, PREVIEW_ENCODINGS
+
+# inotify event flags from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+FOLDER_MASK = IN_CLOSE_WRITE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Watch the themes root and each theme folder with Linux inotify via ctypes."""
+
+    def __init__(self, themes_path: Path):
+        libc_name = ctypes.util.find_library("c")
+        if os.name == "nt" or not libc_name:
+            raise OSError("inotify is not available on this platform")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.themes_path = themes_path
+        self.folders_by_wd: Dict[int, str] = {}
+        self.root_wd = self._add_watch(themes_path, ROOT_MASK)
+        for folder in themes_path.iterdir():
+            if folder.is_dir():
+                self.folders_by_wd[self._add_watch(folder, FOLDER_MASK)] = folder.name
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Block up to ``timeout`` seconds and return the names of changed theme folders."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0").decode()
+            offset += EVENT_HEADER.size + length
+
+            if wd == self.root_wd:
+                if mask & IN_ISDIR:
+                    changed.add(name)
+                    folder = self.themes_path / name
+                    if mask & (IN_CREATE | IN_MOVED_TO) and folder.is_dir():
+                        self.folders_by_wd[self._add_watch(folder, FOLDER_MASK)] = name
+            elif mask & IN_IGNORED:
+                self.folders_by_wd.pop(wd, None)
+            elif wd in self.folders_by_wd and (name.endswith(".json") or mask & IN_DELETE_SELF):
+                changed.add(self.folders_by_wd[wd])
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares folder and JSON mtimes at a fixed interval.
+
+    Only ``stat`` calls are made per poll; theme files are re-read only for the
+    folders whose snapshot changed.
+    """
+
+    def __init__(self, themes_path: Path, interval: float = 0.5):
+        self.themes_path = themes_path
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        with os.scandir(self.themes_path) as folders:
+            for folder in folders:
+                if not folder.is_dir():
+                    continue
+                with os.scandir(folder.path) as entries:
+                    snapshot[folder.name] = tuple(sorted(
+                        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                        for entry in entries if entry.name.endswith(".json")
+                    ))
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        changed = {name for name in current.keys() | self.snapshot.keys()
+                   if current.get(name) != self.snapshot.get(name)}
+        self.snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class ThemeWatchSession:
+    """Cached README sections and random theme info, updated one folder at a time."""
+
+    def __init__(self, themes_path: Path, previews: str = "auto", encoding: str = "default"):
+        self.themes_path = themes_path
+        self.previews = previews
+        self.encoding = PREVIEW_ENCODINGS[encoding]
+
+        # One full refresh at startup; after that only changed folders are re-indexed
+        self.catalog = load_catalog(themes_path)
+        self.catalog_changed = False
+        regular_themes, random_themes, _ = collect_themes(str(themes_path), self.catalog)
+        self.folders: Set[str] = {p.name for p in themes_path.iterdir() if p.is_dir()}
+        self.sections: Dict[str, str] = {
+            theme_folder: render_theme_section(theme_folder, theme_info)
+            for theme_folder, theme_info in regular_themes
+        }
+        self.file_counts: Dict[str, int] = {folder: len(info) for folder, info in regular_themes}
+        self.random_by_folder: Dict[str, List[dict]] = {}
+        for theme in random_themes:
+            self.random_by_folder.setdefault(theme['theme_folder'], []).append(theme)
+        for folder, themes in self.random_by_folder.items():
+            self.file_counts[folder] = len(themes)
+
+    def should_render_preview(self, json_path: Path, theme: dict) -> bool:
+        """Decide whether a preview should be (re)rendered for a changed theme file."""
+        return should_render_preview(json_path, theme, self.previews)
+
+    def render_previews(self, folder_path: Path) -> None:
+        """Render previews for JSON files in ``folder_path`` that are newer than their PNG."""
+        for json_path in folder_path.glob("*.json"):
+            preview_path = json_path.with_suffix(".png")
+            if preview_path.exists() and preview_path.stat().st_mtime >= json_path.stat().st_mtime:
+                continue
+            try:
+                theme = load_theme(str(json_path))
+            except Exception as e:
+                print(f"⚠️  Skipping preview for {json_path}: {e}")
+                continue
+            if self.should_render_preview(json_path, theme):
+                is_light = theme.get("metadata", {}).get("variant") == "light" or json_path.stem.endswith("_light")
+                generate_theme_preview(theme, is_light=is_light, output_path=str(preview_path),
+                                       encoding=self.encoding)
+
+    def update_folder(self, folder: str) -> None:
+        """Re-read one theme folder and refresh its cached README fragment."""
+        folder_path = self.themes_path / folder
+        self.sections.pop(folder, None)
+        self.random_by_folder.pop(folder, None)
+        self.file_counts.pop(folder, None)
+        self.catalog.remove_folder(folder_path)
+        self.catalog_changed = True
+
+        if not folder_path.is_dir():
+            self.folders.discard(folder)
+            print(f"🗑️  Removed {folder}")
+            return
+
+        self.folders.add(folder)
+        themes = []
+        theme_info = get_theme_info(str(folder_path), themes)
+        if not theme_info:
+            return
+        theme_files = [folder_path / theme['filename'] for theme in theme_info]
+        self.catalog.add_themes([(path, theme, path.stat()) for path, theme in zip(theme_files, themes)])
+
+        self.file_counts[folder] = len(theme_info)
+        if folder.startswith('random_'):
+            self.random_by_folder[folder] = theme_info
+        else:
+            self.sections[folder] = render_theme_section(folder, classify_themes(str(self.themes_path), theme_info,
+                                                                                 self.catalog))
+        self.render_previews(folder_path)
+        print(f"🔄 Updated {folder}")
+
+    def write_readme(self, readme_path: Path = Path("README.md")) -> None:
+        """Assemble the README from the cached fragments."""
+        sections = [self.sections[folder] for folder in sorted(self.sections)]
+        random_themes = [theme for folder in sorted(self.random_by_folder) for theme in self.random_by_folder[folder]]
+        content = build_readme(sections, random_themes, len(self.folders), sum(self.file_counts.values()))
+        atomic_write_text(readme_path, content)
+
+    def save_catalog(self) -> None:
+        """Write the index once, on exit, rather than after every edit."""
+        if self.catalog_changed:
+            self.catalog.save(INDEX_PATH)
+
+
+def create_watcher(themes_path: Path, force_polling: bool = False, poll_interval: float = 0.5):
+    """Create an inotify watcher, falling back to polling where inotify is unavailable."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(themes_path)
+        except OSError as e:
+            print(f"⚠️  inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(themes_path, poll_interval)
+
+
+def watch(themes_path: Path, debounce: float = 0.15, force_polling: bool = False, poll_interval: float = 0.5,
+          previews: str = "auto", encoding: str = "default") -> None:
+    """Run the watch loop until interrupted."""
+    session = ThemeWatchSession(themes_path, previews, encoding)
+    watcher = create_watcher(themes_path, force_polling, poll_interval)
+    print(f"👀 Watching {themes_path} with {type(watcher).__name__} (Ctrl-C to stop)")
+
+    try:
+        while True:
+            changed = watcher.wait(1.0)
+            if not changed:
+                continue
+
+            # Debounce: keep collecting until the burst of events goes quiet
+            started = time.perf_counter()
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+
+            for folder in sorted(changed):
+                session.update_folder(folder)
+            session.write_readme()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"✅ Rebuilt {len(changed)} folder(s) and README.md in {elapsed_ms:.0f} ms")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+        session.save_catalog()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch themes/ and rebuild previews and README.md on changes.")
+    parser.add_argument("--themes", default="themes", help="themes directory")
+    parser.add_argument("--debounce", type=float, default=0.15, help="quiet period in seconds before rebuilding")
+    parser.add_argument("--poll", action="store_true", help="force the polling watcher")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="polling interval in seconds")
+    parser.add_argument("--previews", choices=["auto", "all", "none"], default="auto",
+                        help="auto: only random/auto-generated themes or missing previews")
+    parser.add_argument("--encoding", choices=sorted(PREVIEW_ENCODINGS), default="default",
+                        help="preview encoding preset")
+    args = parser.parse_args()
+
+    watch(Path(args.themes), args.debounce, args.poll, args.poll_interval, args.previews, args.encoding)